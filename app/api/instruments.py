@@ -1,25 +1,92 @@
 # app/api/instruments.py
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, Header, Query
+from typing import List, Optional
+from app.core.http_cache import is_not_modified, not_modified, set_version_headers
+from app.core.serialization import RawJSONResponse, VersionedCache, dumps
+from app.models.candle import CandleSeries
 from app.models.instrument import Instrument
-from app.store.memory import INSTRUMENTS
+from app.services.candles import CANDLE_HISTORY, INTERVALS
+from app.services.engine_ops import dispatch
+from app.store.records import to_iso
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+# Encoded pages of the current instrument version (LTPs included)
+_pages = VersionedCache()
+# Per page, for the current static master version: its symbols and each
+# row encoded up to the LTP, so an LTP change only re-encodes the prices
+_rows = VersionedCache()
+
+
+def _static_row(inst: dict) -> bytes:
+    # '{"symbol":...,"instrument_type":...,"last_traded_price":'
+    static = {k: v for k, v in inst.items() if k != "last_traded_price"}
+    return dumps(static)[:-1] + b',"last_traded_price":'
+
+
+def _encode_page(rows: List[bytes], prices: List[Optional[float]]) -> bytes:
+    # Floats never contain a comma, so one encode covers every price
+    encoded = dumps(prices)[1:-1].split(b",") if prices else []
+    return b"[" + b",".join(row + price + b"}" for row, price in zip(rows, encoded)) + b"]"
+
 @router.get("/instruments", response_model=List[Instrument], tags=["Instruments"])
-def get_instruments():
+async def get_instruments(
+    exchange: Optional[str] = Query(None, description="Filter by exchange, e.g. NSE"),
+    instrument_type: Optional[str] = Query(None, description="Filter by instrument type, e.g. EQ"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    if_none_match: Optional[str] = Header(None),
+):
     """
-    Return all available instruments (seeded in-memory).
+    Return a page of instruments, optionally filtered by exchange and type.
+    Pages are served as cached JSON until the master (or an LTP) changes;
+    after an LTP change only the prices are fetched and encoded again.
     """
-    return INSTRUMENTS
+    versions = await dispatch("instruments_version")
+    token = versions["version"]
+    if is_not_modified(if_none_match, token):
+        return not_modified(token)
+
+    key = (exchange and exchange.upper(), instrument_type and instrument_type.upper(), offset, limit)
+    body = _pages.get(token, key)
+    if body is None:
+        page = _rows.get(versions["master"], key)
+        if page is None:
+            insts = await dispatch(
+                "list_instruments", exchange=exchange, instrument_type=instrument_type, offset=offset, limit=limit
+            )
+            page = ([i["symbol"] for i in insts], [_static_row(i) for i in insts])
+            _rows.put(versions["master"], key, page)
+            prices = [i["last_traded_price"] for i in insts]
+        else:
+            prices = await dispatch("last_traded_prices", symbols=page[0])
+        body = _encode_page(page[1], prices)
+        _pages.put(token, key, body)
+    response = RawJSONResponse(body)
+    set_version_headers(response, token)
+    return response
 
 @router.get("/instruments/{symbol}", response_model=Instrument, tags=["Instruments"])
-def get_instrument(symbol: str):
+async def get_instrument(symbol: str):
     """
     Return a single instrument by symbol (case-insensitive).
     """
-    symbol_upper = symbol.upper()
-    for inst in INSTRUMENTS:
-        if inst["symbol"].upper() == symbol_upper:
-            return inst
-    raise HTTPException(status_code=404, detail="Instrument not found")
+    return await dispatch("get_instrument", symbol=symbol)
+
+@router.get("/instruments/{symbol}/candles", response_model=CandleSeries, tags=["Instruments"])
+async def get_candles(
+    symbol: str,
+    interval: str = Query("1m", pattern="^(" + "|".join(INTERVALS) + ")$", description="Bar length: 1s, 1m or 5m"),
+    limit: int = Query(100, ge=1, le=max(CANDLE_HISTORY.values())),
+):
+    """
+    Return the last `limit` OHLCV bars of a symbol, oldest first, plus its
+    running volume and VWAP. The last bar may still be forming.
+    """
+    series = await dispatch("get_candles", symbol=symbol, interval=interval, limit=limit)
+    for candle in series["candles"]:
+        candle["start"] = to_iso(candle["start"] * 1_000_000_000)
+    return series
@@ -0,0 +1,20 @@
+# app/api/metrics.py
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core import metrics
+from app.services import engine_ops
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, tags=["Monitoring"])
+async def get_metrics():
+    """
+    Prometheus text exposition. Behind a separate engine process
+    (ENGINE_MODE=client) the engine's lock and matcher metrics are merged
+    with this worker's own.
+    """
+    blocks = metrics.exposition()
+    if engine_ops.REMOTE is not None:
+        blocks = {**await engine_ops.dispatch("metrics"), **blocks}
+    return PlainTextResponse(metrics.render(blocks), media_type="text/plain; version=0.0.4")
@@ -1,76 +1,73 @@
 # app/api/orders.py
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, Depends, Header
+from typing import Optional
 from app.core.auth import get_current_user
-from app.models.order import OrderRequest, OrderResponse, OrderState
-from app.store import memory
-from app.services.execution_engine import execute_if_possible, find_instrument
-from uuid import uuid4
-from datetime import datetime
-from typing import Dict
+from app.models.order import (
+    BatchCancelRequest,
+    BatchOrderRequest,
+    BatchOrderResponse,
+    OrderRequest,
+    OrderResponse,
+)
+from app.services.engine_ops import dispatch
+from app.store.records import format_order
 
 router = APIRouter()
 
+
+def _format_results(results: list) -> dict:
+    for result in results:
+        if result.get("order") is not None:
+            result["order"] = format_order(result["order"])
+    return {"results": results}
+
+
 @router.post("/orders", response_model=OrderResponse, tags=["Orders"])
-async def place_order(payload: OrderRequest, user_id: str = Depends(get_current_user)):
+async def place_order(
+    payload: OrderRequest,
+    user_id: str = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+):
     """
     Place an order. 
     Async handler to allow non-blocking execution of the matching engine.
+    Retries carrying the same Idempotency-Key get the first order back.
     """
-    # basic instrument existence check
-    inst = find_instrument(payload.symbol)
-    if not inst:
-        raise HTTPException(status_code=404, detail="Instrument not found")
+    order = await dispatch(
+        "place_order", user_id=user_id, payload=payload.model_dump(mode="json"), idempotency_key=idempotency_key
+    )
+    # return the current order state (it might have changed to EXECUTED inside execute_if_possible)
+    return OrderResponse(**format_order(order))
 
-    order_id = str(uuid4())
-    now = datetime.utcnow().isoformat()
-    order: Dict = {
-        "order_id": order_id,
-        "symbol": payload.symbol.upper(),
-        "order_type": payload.order_type.value,
-        "order_style": payload.order_style.value,
-        "quantity": payload.quantity,
-        "price": float(payload.price) if payload.price is not None else None,
-        "state": OrderState.PLACED.value,
-        "created_at": now,
-        "executed_at": None,
-        "user_id": user_id
-    }
 
-    # Save the order in memory
-    memory.ORDERS[order_id] = order
+@router.post("/orders/batch", response_model=BatchOrderResponse, tags=["Orders"])
+async def place_orders(payload: BatchOrderRequest, user_id: str = Depends(get_current_user)):
+    """
+    Place a basket of orders in one engine pass.
+    The whole basket is validated up front (422 if any order is malformed);
+    engine rejections such as an unknown symbol are reported per order.
+    """
+    payloads = [order.model_dump(mode="json") for order in payload.orders]
+    results = await dispatch("place_orders", user_id=user_id, payloads=payloads)
+    return _format_results(results)
 
-    # Try executing immediately (MARKET or hitting LIMIT)
-    try:
-        # We now AWAIT the execution engine
-        await execute_if_possible(order)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
 
-    # return the current order state (it might have changed to EXECUTED inside execute_if_possible)
-    return OrderResponse(**order)
+@router.post("/orders/cancel-batch", response_model=BatchOrderResponse, tags=["Orders"])
+async def cancel_orders(payload: BatchCancelRequest, user_id: str = Depends(get_current_user)):
+    """
+    Cancel several orders; each id gets its own result.
+    """
+    results = await dispatch("cancel_orders", user_id=user_id, order_ids=payload.order_ids)
+    return _format_results(results)
 
 
 @router.post("/orders/{order_id}/cancel", response_model=OrderResponse, tags=["Orders"])
-def cancel_order(order_id: str, user_id: str = Depends(get_current_user)):
-    order = memory.ORDERS.get(order_id)
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-    if order.get("user_id") != user_id:
-        raise HTTPException(status_code=403, detail="Forbidden")
-    if order.get("state") in (OrderState.EXECUTED.value, OrderState.CANCELLED.value):
-        raise HTTPException(status_code=400, detail="Cannot cancel executed or already cancelled order")
-    
-    order["state"] = OrderState.CANCELLED.value
-    order["executed_at"] = None
-    memory.ORDERS[order_id] = order
-    return OrderResponse(**order)
+async def cancel_order(order_id: str, user_id: str = Depends(get_current_user)):
+    order = await dispatch("cancel_order", user_id=user_id, order_id=order_id)
+    return OrderResponse(**format_order(order))
 
 @router.get("/orders/{order_id}", response_model=OrderResponse, tags=["Orders"])
-def get_order(order_id: str, user_id: str = Depends(get_current_user)):
-    order = memory.ORDERS.get(order_id)
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-    if order.get("user_id") != user_id:
-        raise HTTPException(status_code=403, detail="Forbidden")
-    return OrderResponse(**order)
\ No newline at end of file
+async def get_order(order_id: str, user_id: str = Depends(get_current_user)):
+    order = await dispatch("get_order", user_id=user_id, order_id=order_id)
+    return OrderResponse(**format_order(order))
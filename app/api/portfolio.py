@@ -1,10 +1,11 @@
 # app/api/portfolio.py
 
-from fastapi import APIRouter, Depends
-from app.models.portfolio import PortfolioResponse, Holding
-from app.store.memory import PORTFOLIO, INSTRUMENTS
-from app.services.execution_engine import find_instrument
+from fastapi import APIRouter, Depends, Header, Query, Response
+from typing import Optional
+from app.models.portfolio import PortfolioResponse
+from app.services.engine_ops import dispatch
 from app.core.auth import get_current_user
+from app.core.http_cache import is_not_modified, not_modified, set_version_headers
 
 router = APIRouter()   # 🔥 REQUIRED — DO NOT REMOVE
 
@@ -13,30 +14,21 @@ router = APIRouter()   # 🔥 REQUIRED — DO NOT REMOVE
     response_model=PortfolioResponse,
     tags=["Portfolio"]
 )
-def get_portfolio(user_id: str = Depends(get_current_user)):
+async def get_portfolio(
+    response: Response,
+    user_id: str = Depends(get_current_user),
+    since_version: Optional[str] = Query(None, description="Only holdings changed after this version (an ETag value)"),
+    if_none_match: Optional[str] = Header(None),
+):
     """
-    Get portfolio holdings for a user (default: demo-user)
+    Get portfolio holdings for a user (default: demo-user).
+    The ETag is the user's portfolio version; a matching If-None-Match gets a 304.
     """
-    user_portfolio = PORTFOLIO.get(user_id, {})
-    holdings = []
+    if if_none_match:
+        token = await dispatch("portfolio_version", user_id=user_id)
+        if is_not_modified(if_none_match, token):
+            return not_modified(token)
 
-    for symbol, data in user_portfolio.items():
-        qty = int(data.get("quantity", 0))
-        avg = float(data.get("avg_price", 0.0))
-        # compute current value using instrument LTP if available
-        inst = find_instrument(symbol)
-        ltp = inst["last_traded_price"] if inst else 0.0
-        current_value = qty * ltp
-        holdings.append(
-            Holding(
-                symbol=symbol,
-                quantity=qty,
-                avg_price=avg,
-                current_value=current_value
-            )
-        )
-
-    return PortfolioResponse(
-        user_id=user_id,
-        holdings=holdings
-    )
+    portfolio = await dispatch("get_portfolio", user_id=user_id, since_version=since_version)
+    set_version_headers(response, portfolio.pop("version"), portfolio.pop("delta"))
+    return portfolio
@@ -1,16 +1,58 @@
 # app/api/trades.py
 
-from fastapi import APIRouter, Depends
-from typing import List
+from fastapi import APIRouter, Depends, Header, Query
+from typing import List, Optional
+from datetime import datetime
 from app.models.trade import Trade
-from app.store.memory import TRADES
+from app.services.engine_ops import dispatch
 from app.core.auth import get_current_user
+from app.core.http_cache import is_not_modified, not_modified, set_version_headers
+from app.core.serialization import RawJSONResponse, dumps, project
+from app.store.records import to_iso, to_ns
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+# Trade records also hold user_id, which the response does not expose
+TRADE_FIELDS = tuple(Trade.model_fields)
+
 @router.get("/trades", response_model=List[Trade], tags=["Trades"])
-def list_trades(user_id: str = Depends(get_current_user)):
+async def list_trades(
+    user_id: str = Depends(get_current_user),
+    symbol: Optional[str] = Query(None, description="Only trades in this symbol"),
+    after: Optional[str] = Query(None, description="Cursor: return trades after this trade_id"),
+    since: Optional[datetime] = Query(None, description="Only trades at or after this time (UTC)"),
+    until: Optional[datetime] = Query(None, description="Only trades at or before this time (UTC)"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    since_version: Optional[str] = Query(None, description="Only trades newer than this version (an ETag value)"),
+    if_none_match: Optional[str] = Header(None),
+):
     """
-    Return executed trades for the authenticated user (in-memory).
+    Return executed trades for the authenticated user, oldest first.
+    Pass the last trade_id of a page as `after` to fetch the next one.
+    The ETag is the user's trades version; a matching If-None-Match gets a 304.
     """
-    return [t for t in TRADES if t.get("user_id") == user_id]
+    if if_none_match:
+        token = await dispatch("trades_version", user_id=user_id)
+        if is_not_modified(if_none_match, token):
+            return not_modified(token)
+
+    result = await dispatch(
+        "list_trades",
+        user_id=user_id,
+        symbol=symbol.upper() if symbol else None,
+        after=after,
+        since=to_ns(since),
+        until=to_ns(until),
+        limit=limit,
+        since_version=since_version,
+    )
+    # Pre-serialized: response_model only documents the schema
+    trades = project(result["trades"], TRADE_FIELDS)
+    for trade in trades:
+        trade["timestamp"] = to_iso(trade["timestamp"])
+    response = RawJSONResponse(dumps(trades))
+    set_version_headers(response, result["version"], result["delta"])
+    return response
@@ -1,17 +1,142 @@
 # app/api/ws.py
-from fastapi import APIRouter, WebSocket
-from app.services.broadcaster import broadcaster
+import json
+from fastapi import APIRouter, Depends, WebSocket
+from app.core.auth import get_current_user, resolve_api_key
+from app.services.broadcaster import broadcaster, candles_topic, ticks_topic, trades_topic, user_topic
+from app.services.candles import INTERVALS
 
 router = APIRouter()
 
+# Public per-symbol topic prefixes clients may subscribe to
+PUBLIC_TOPIC_PREFIXES = {"trades": trades_topic, "ticks": ticks_topic}
+
+
+def resolve_topic(name: str, user_id):
+    """
+    Map a client-requested topic name to a broadcaster topic.
+
+    "trades:<SYMBOL>" / "ticks:<SYMBOL>" / "candles:<SYMBOL>:<interval>" are
+    public; "orders" (alias "user") is the caller's own order/trade stream
+    and needs an authenticated socket.
+    Raises ValueError for unknown or unauthorized topics.
+    """
+    if name in ("orders", "user"):
+        if user_id is None:
+            raise ValueError("Authentication required for private topics")
+        return user_topic(user_id)
+    prefix, _, symbol = name.partition(":")
+    if prefix == "candles":
+        symbol, _, interval = symbol.partition(":")
+        if symbol and interval in INTERVALS:
+            return candles_topic(symbol, interval)
+        raise ValueError(f"Unknown topic: {name}")
+    if prefix in PUBLIC_TOPIC_PREFIXES and symbol:
+        return PUBLIC_TOPIC_PREFIXES[prefix](symbol)
+    raise ValueError(f"Unknown topic: {name}")
+
+
+def resume_points(msg: dict, names: list, resolved: list, user_id) -> dict:
+    """
+    The {topic: seq} a subscribe message asks to resume from, if any.
+    """
+    resume_from = msg.get("resume_from")
+    if resume_from is None:
+        return {}
+    if isinstance(resume_from, dict):
+        # Keyed by requested names or by the topics events carry (e.g. "user:bob")
+        return {
+            name if name in resolved else resolve_topic(str(name), user_id): int(seq)
+            for name, seq in resume_from.items()
+        }
+    if isinstance(resume_from, bool):
+        raise TypeError("expected a seq or a topic -> seq map")
+    return dict.fromkeys(resolved, int(resume_from))
+
+
+def handle_message(ws: WebSocket, client, text: str):
+    """
+    Apply one client protocol message. Non-JSON text (e.g. "ping") is ignored.
+
+        {"action": "auth", "api_key": "..."}
+        {"action": "subscribe", "topics": ["trades:TCS", "orders"]}
+        {"action": "subscribe", "topics": ["orders"], "epoch": "...", "resume_from": {"orders": 41}}
+        {"action": "unsubscribe", "topics": ["trades:TCS"]}
+
+    `resume_from` (a seq for every listed topic, or a topic -> seq map)
+    replays what the client missed after a reconnect; a topic that cannot
+    be replayed gets a "snapshot_required" message instead.
+    """
+    try:
+        msg = json.loads(text)
+    except ValueError:
+        return
+    if not isinstance(msg, dict):
+        return
+
+    action = msg.get("action")
+    if action == "auth":
+        user_id = resolve_api_key(msg.get("api_key"))
+        if user_id is None:
+            broadcaster.send(ws, {"type": "error", "detail": "Invalid API key"})
+            return
+        if client.user_id is not None and client.user_id != user_id:
+            # Re-authenticating as someone else drops the old private stream
+            broadcaster.unsubscribe(ws, [user_topic(client.user_id)])
+        client.user_id = user_id
+        broadcaster.send(ws, {"type": "auth", "user_id": user_id})
+    elif action in ("subscribe", "unsubscribe"):
+        topics = msg.get("topics") or []
+        try:
+            resolved = [resolve_topic(str(t), client.user_id) for t in topics]
+        except ValueError as e:
+            broadcaster.send(ws, {"type": "error", "detail": str(e)})
+            return
+        if action == "unsubscribe":
+            broadcaster.unsubscribe(ws, resolved)
+            broadcaster.send(ws, {"type": "unsubscribed", "topics": sorted(client.topics)})
+            return
+        try:
+            resume = resume_points(msg, topics, resolved, client.user_id)
+        except (TypeError, ValueError) as e:
+            broadcaster.send(ws, {"type": "error", "detail": f"Invalid resume_from: {e}"})
+            return
+        broadcaster.subscribe(ws, resolved)
+        broadcaster.send(ws, {
+            "type": "subscribed",
+            "topics": sorted(client.topics),
+            "epoch": broadcaster.epoch,
+            "seqs": {topic: broadcaster.seqs.get(topic, 0) for topic in resolved},
+        })
+        # Same epoch: replay what was missed; otherwise the client's seqs are meaningless here
+        same_epoch = msg.get("epoch") in (None, broadcaster.epoch)
+        for topic, after_seq in resume.items():
+            if not (same_epoch and broadcaster.resume(ws, topic, after_seq)):
+                broadcaster.send(ws, {"type": "snapshot_required", "topic": topic, "seq": broadcaster.seqs.get(topic, 0)})
+    else:
+        broadcaster.send(ws, {"type": "error", "detail": f"Unknown action: {action}"})
+
+
 @router.websocket("/ws")
 async def websocket_endpoint(ws: WebSocket):
-    await broadcaster.connect(ws)
+    client = await broadcaster.connect(ws)
+    # Browsers cannot set headers on a WebSocket, so also accept ?api_key=
+    client.user_id = resolve_api_key(ws.headers.get("x-api-key") or ws.query_params.get("api_key"))
     try:
         while True:
-            # we expect clients to ping occasionally, but ignore receives
-            await ws.receive_text()
+            handle_message(ws, client, await ws.receive_text())
     except Exception:
         pass
     finally:
         broadcaster.disconnect(ws)
+
+@router.get("/ws/stats", tags=["WebSocket"])
+async def websocket_stats(user_id: str = Depends(get_current_user)):
+    """
+    Per-client send queue depth and sent/dropped message counters. Needs an
+    API key; clients are listed without their users or topics.
+    """
+    return {
+        "policy": broadcaster.policy,
+        "queue_size": broadcaster.queue_size,
+        "clients": broadcaster.stats(),
+    }
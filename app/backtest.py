@@ -0,0 +1,375 @@
+# app/backtest.py
+"""
+Headless backtesting: replay a historical tick file through the execution
+engine on simulated time, with no HTTP, matcher task or WebSocket clients.
+
+    python -m app.backtest ticks.csv --param fast=5 --param slow=20
+    python -m app.backtest ticks.csv --sweep fast=5,10,20 --sweep slow=50,100 --workers 4
+
+Every tick goes through the same code as a live feed: the market data
+pipeline sets the LTP (valuation, candles), one matcher pass
+(`limit_matcher.match_dirty`) fills the resting LIMIT orders it crosses,
+then the strategy sees the tick and places or cancels orders through
+`engine_ops`, so orders, fills, risk checks and the portfolio follow the
+engine's rules exactly. Engine timestamps come from the tick time
+(`records.set_clock`) rather than the wall clock, and nothing waits:
+a run goes as fast as the engine can apply events.
+
+A tick file is a .csv with `symbol` and `price` columns and an optional
+`timestamp` column (ISO or epoch seconds), or binary TICK_RECORDs (see
+market_data.py). Ticks without a time are spaced `--tick-interval-ms`
+apart. Symbols must be in the instrument registry (`--instruments` loads a
+master file); ticks for other symbols are skipped and counted.
+
+A strategy is `module:factory`; the factory is called with the run's
+parameters and returns an object with an async `on_tick(ctx, symbol,
+price)` and optionally `on_fill(ctx, trade)` (see `MovingAverageCross`).
+`ctx` is a `BacktestContext`.
+
+A run owns the process's engine state (memory store, books, valuation)
+and empties it when done, so it refuses to start while the engine is
+running or holds any orders, trades or holdings: run it in its own
+process. `--sweep` runs one parameter combination per process of a pool.
+Nothing is published during a run (`Broadcaster.muted_publish`).
+"""
+import argparse
+import ast
+import asyncio
+import csv
+import importlib
+import itertools
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from app import engine
+from app.services import engine_ops, limit_matcher, order_book, versions
+from app.services.broadcaster import broadcaster
+from app.services.candles import candles
+from app.services.engine_ops import EngineError
+from app.services.idempotency import idempotency
+from app.services.market_data import MARKET_DATA_BATCH_SIZE, TICK_RECORD, MarketDataPipeline, decode_ticks
+from app.services.portfolio_valuation import valuation
+from app.services.risk import risk
+from app.store import journal, memory
+from app.store.records import set_clock, to_iso, to_ns
+from app.store.repository import create_store, get_store, set_store
+
+# (epoch ns, symbol, price)
+TimedTick = Tuple[int, str, float]
+
+# Simulated start time for files without timestamps: 2024-01-01T00:00:00
+DEFAULT_START_NS = 1_704_067_200 * 1_000_000_000
+DEFAULT_STRATEGY = "app.backtest:MovingAverageCross"
+
+
+def read_ticks(path: str, tick_interval_ns: int = 1_000_000, start_ns: int = DEFAULT_START_NS) -> Iterator[TimedTick]:
+    """
+    Stream (timestamp, symbol, price) from a .csv or binary tick file.
+    """
+    file_path = Path(path)
+    step = itertools.count(start_ns, tick_interval_ns)
+    if file_path.suffix.lower() == ".csv":
+        with file_path.open(newline="") as f:
+            reader = csv.reader(f)
+            header = [name.strip().lower() for name in next(reader)]
+            sym_col, price_col = header.index("symbol"), header.index("price")
+            ts_col = header.index("timestamp") if "timestamp" in header else None
+            for row in reader:
+                if ts_col is None:
+                    ts = next(step)
+                else:
+                    raw = row[ts_col].strip()
+                    try:
+                        ts = int(float(raw) * 1_000_000_000)
+                    except ValueError:
+                        ts = to_ns(raw)
+                yield ts, row[sym_col], float(row[price_col])
+        return
+
+    with file_path.open("rb") as f:
+        while True:
+            chunk = f.read(MARKET_DATA_BATCH_SIZE * TICK_RECORD.size)
+            if not chunk:
+                return
+            for symbol, price in decode_ticks(chunk):
+                yield next(step), symbol, price
+
+
+class BacktestContext:
+    """
+    What a strategy sees: simulated time, prices, its own portfolio, and
+    order entry. Rejected orders (risk limits, validation) return None and
+    are counted instead of raising.
+    """
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        # Simulated time of the current tick (epoch ns)
+        self.now = 0
+        self.orders = 0
+        self.rejected = 0
+
+    def price(self, symbol: str) -> float:
+        return get_store().instruments.get(symbol)["last_traded_price"]
+
+    def position(self, symbol: str) -> int:
+        holding = get_store().portfolio.get(self.user_id, symbol.upper())
+        return holding["quantity"] if holding else 0
+
+    def portfolio(self) -> dict:
+        return valuation.portfolio(self.user_id)
+
+    async def buy(self, symbol: str, quantity: int, price: Optional[float] = None) -> Optional[dict]:
+        return await self._place(symbol, "BUY", quantity, price)
+
+    async def sell(self, symbol: str, quantity: int, price: Optional[float] = None) -> Optional[dict]:
+        return await self._place(symbol, "SELL", quantity, price)
+
+    async def cancel(self, order_id: str) -> Optional[dict]:
+        try:
+            return await engine_ops.cancel_order(self.user_id, order_id)
+        except EngineError:
+            return None
+
+    async def _place(self, symbol: str, side: str, quantity: int, price: Optional[float]) -> Optional[dict]:
+        payload = {"symbol": symbol, "order_type": side, "order_style": "MARKET" if price is None else "LIMIT", "quantity": quantity}
+        if price is not None:
+            payload["price"] = price
+        self.orders += 1
+        try:
+            return await engine_ops.place_order(self.user_id, payload)
+        except EngineError:
+            self.rejected += 1
+            return None
+
+
+def reset_engine():
+    """
+    Empty the engine's in-memory state (orders, trades, holdings, books and
+    the caches derived from them).
+    """
+    memory.ORDERS.clear()
+    memory.ARCHIVED_ORDERS.clear()
+    memory.TRADES.clear()
+    memory.PORTFOLIO.clear()
+    order_book.BOOKS.clear()
+    limit_matcher._dirty_symbols.clear()
+    versions.TRADE_VERSIONS.clear()
+    valuation.clear()
+    risk.clear()
+    candles.clear()
+    idempotency.clear()
+
+
+async def run_backtest(strategy, ticks: Iterable[TimedTick], user_id: str = "backtest", params: Optional[dict] = None) -> dict:
+    """
+    Drive `strategy` over `ticks` and return the run's report.
+    """
+    if journal.JOURNAL is not None:
+        raise RuntimeError("Backtests need an engine without persistence (JOURNAL_DIR unset)")
+    if engine.RUNNING or memory.ORDERS or len(memory.ARCHIVED_ORDERS) or len(memory.TRADES) or memory.PORTFOLIO:
+        raise RuntimeError("Backtests reset the engine; run them in a process without live engine state")
+    previous_store = set_store(create_store("memory"))
+    instruments = get_store().instruments
+    prices = {inst["symbol"]: inst["last_traded_price"] for inst in instruments.list()}
+    reset_engine()
+
+    ctx = BacktestContext(user_id)
+    pipeline = MarketDataPipeline()
+    on_tick = strategy.on_tick
+    on_fill = getattr(strategy, "on_fill", None)
+    trades = memory.TRADES
+    delivered = 0
+    n = 0
+    first = last = None
+    valuation.portfolio(user_id)  # track the user's valuation from the start
+    set_clock(lambda: ctx.now)
+    started = time.perf_counter()
+    with broadcaster.muted_publish():
+        try:
+            for ts, symbol, price in ticks:
+                ctx.now = ts
+                n += 1
+                if not pipeline.apply([(symbol, price)]):
+                    if instruments.get(symbol) is None:
+                        continue
+                else:
+                    await limit_matcher.match_dirty()
+                if on_fill is not None:
+                    while delivered < len(trades):
+                        await on_fill(ctx, trades[delivered])
+                        delivered += 1
+                await on_tick(ctx, symbol.upper(), price)
+                if first is None:
+                    first = ts
+                last = ts
+            if on_fill is not None:
+                while delivered < len(trades):
+                    await on_fill(ctx, trades[delivered])
+                    delivered += 1
+            elapsed = time.perf_counter() - started
+            totals = valuation.portfolio(user_id)["totals"]
+            positions = {h["symbol"]: h["quantity"] for h in valuation.portfolio(user_id)["holdings"] if h["quantity"]}
+            fills = len(trades)
+        finally:
+            set_clock()
+            instruments.set_last_traded_prices(prices)
+            reset_engine()
+            set_store(previous_store)
+
+    events = n + ctx.orders + fills
+    return {
+        "params": params or {},
+        "ticks": n,
+        "unknown_ticks": pipeline.unknown,
+        "orders": ctx.orders,
+        "rejected": ctx.rejected,
+        "fills": fills,
+        "realized_pnl": totals["realized_pnl"],
+        "unrealized_pnl": totals["unrealized_pnl"],
+        "pnl": totals["realized_pnl"] + totals["unrealized_pnl"],
+        "positions": positions,
+        "start": to_iso(first),
+        "end": to_iso(last),
+        "seconds": elapsed,
+        "events_per_second": events / elapsed if elapsed else 0.0,
+    }
+
+
+def load_strategy(spec: str):
+    module, _, name = spec.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+async def run_file(path: str, strategy: str = DEFAULT_STRATEGY, params: Optional[dict] = None, tick_interval_ms: float = 1.0) -> dict:
+    params = params or {}
+    ticks = read_ticks(path, int(tick_interval_ms * 1_000_000))
+    return await run_backtest(load_strategy(strategy)(**params), ticks, params=params)
+
+
+def _setup(instruments_path: Optional[str] = None, risk_limits_path: Optional[str] = None):
+    if instruments_path:
+        get_store().instruments.load_file(instruments_path)
+    if risk_limits_path:
+        risk.load_file(risk_limits_path)
+
+
+def _run_job(job: tuple) -> dict:
+    path, strategy, params, tick_interval_ms, instruments_path, risk_limits_path = job
+    _setup(instruments_path, risk_limits_path)
+    return asyncio.run(run_file(path, strategy, params, tick_interval_ms))
+
+
+def sweep(
+    path: str,
+    grid: Dict[str, list],
+    strategy: str = DEFAULT_STRATEGY,
+    params: Optional[dict] = None,
+    workers: Optional[int] = None,
+    tick_interval_ms: float = 1.0,
+    instruments_path: Optional[str] = None,
+    risk_limits_path: Optional[str] = None,
+) -> List[dict]:
+    """
+    Run every combination of `grid` (on top of `params`), one per pool
+    process. Returns the reports, best P&L first.
+    """
+    names = list(grid)
+    jobs = [
+        (path, strategy, {**(params or {}), **dict(zip(names, values))}, tick_interval_ms, instruments_path, risk_limits_path)
+        for values in itertools.product(*(grid[name] for name in names))
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        reports = list(pool.map(_run_job, jobs))
+    return sorted(reports, key=lambda r: r["pnl"], reverse=True)
+
+
+class MovingAverageCross:
+    """
+    Example strategy: go long `quantity` when the fast moving average of a
+    symbol crosses above the slow one, and flatten when it crosses below.
+    """
+
+    def __init__(self, fast: int = 10, slow: int = 30, quantity: int = 10):
+        if not 0 < fast < slow:
+            raise ValueError("Need 0 < fast < slow")
+        self.fast = fast
+        self.slow = slow
+        self.quantity = quantity
+        # symbol -> [window of the last `slow` prices, fast sum, slow sum, fast above slow]
+        self._state: Dict[str, list] = {}
+
+    async def on_tick(self, ctx: BacktestContext, symbol: str, price: float):
+        state = self._state.get(symbol)
+        if state is None:
+            state = self._state[symbol] = [deque(), 0.0, 0.0, None]
+        window = state[0]
+        window.append(price)
+        state[1] += price
+        state[2] += price
+        if len(window) > self.fast:
+            state[1] -= window[-self.fast - 1]
+        if len(window) > self.slow:
+            state[2] -= window.popleft()
+        if len(window) < self.slow:
+            return
+        above = state[1] / self.fast > state[2] / self.slow
+        if above == state[3]:
+            return
+        crossed = state[3] is not None
+        state[3] = above
+        if not crossed:
+            return
+        held = ctx.position(symbol)
+        if above and held < self.quantity:
+            await ctx.buy(symbol, self.quantity - held)
+        elif not above and held > 0:
+            await ctx.sell(symbol, held)
+
+
+def _parse_value(text: str):
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("ticks", help="Tick file (.csv or binary TICK_RECORDs)")
+    parser.add_argument("--strategy", default=DEFAULT_STRATEGY, help="module:factory")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUE")
+    parser.add_argument("--sweep", action="append", default=[], metavar="NAME=V1,V2,...")
+    parser.add_argument("--workers", type=int, default=None, help="Sweep processes (default: CPU count)")
+    parser.add_argument("--tick-interval-ms", type=float, default=1.0, help="Spacing of ticks without timestamps")
+    parser.add_argument("--instruments", help="Instrument master file to load first")
+    parser.add_argument("--risk-limits", help="Risk limits JSON to apply (see app/services/risk.py)")
+    args = parser.parse_args()
+
+    params = {name: _parse_value(value) for name, _, value in (p.partition("=") for p in args.param)}
+    if args.sweep:
+        grid = {name: [_parse_value(v) for v in values.split(",")] for name, _, values in (s.partition("=") for s in args.sweep)}
+        reports = sweep(
+            args.ticks, grid, args.strategy, params, args.workers, args.tick_interval_ms, args.instruments, args.risk_limits
+        )
+        print(f"{len(reports)} runs")
+        for r in reports:
+            print(
+                f"  {r['params']}: pnl {r['pnl']:.2f} (realized {r['realized_pnl']:.2f}), "
+                f"{r['fills']} fills, {r['events_per_second']:,.0f} events/s"
+            )
+        return
+
+    _setup(args.instruments, args.risk_limits)
+    r = asyncio.run(run_file(args.ticks, args.strategy, params, args.tick_interval_ms))
+    print(f"{r['ticks']} ticks ({r['unknown_ticks']} unknown) from {r['start']} to {r['end']}")
+    print(f"  orders    {r['orders']} ({r['rejected']} rejected), {r['fills']} fills")
+    print(f"  pnl       {r['pnl']:.2f} (realized {r['realized_pnl']:.2f}, unrealized {r['unrealized_pnl']:.2f})")
+    print(f"  positions {r['positions']}")
+    print(f"  {r['seconds']:.2f} s, {r['events_per_second']:,.0f} events/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# app/core/admission.py
+"""
+Per-API-key rate limiting.
+
+Each key gets two token buckets: one for order writes (any non-GET
+request) and one for reads. A bucket holds up to `burst` tokens and
+refills at `rate` per second; a request takes one token or is answered
+`429` with a `Retry-After` of the time until the next token.
+
+Defaults come from RATE_LIMIT_{WRITE,READ}_{RATE,BURST}; per-key overrides
+sit next to the keys themselves, in auth.API_KEY_LIMITS. A rate of 0
+disables that bucket.
+
+Buckets are plain objects refilled lazily from the monotonic clock when a
+request arrives, so a check is O(1) and needs no lock: it only ever runs
+on the event loop (get_current_user is an async dependency). In a
+multi-worker deployment every worker keeps its own buckets.
+"""
+import math
+import os
+import time
+from typing import Dict, Optional, Tuple
+from app.core import metrics
+
+RATE_LIMIT_WRITE_RATE = float(os.getenv("RATE_LIMIT_WRITE_RATE", "500"))
+RATE_LIMIT_WRITE_BURST = float(os.getenv("RATE_LIMIT_WRITE_BURST", "1000"))
+RATE_LIMIT_READ_RATE = float(os.getenv("RATE_LIMIT_READ_RATE", "1000"))
+RATE_LIMIT_READ_BURST = float(os.getenv("RATE_LIMIT_READ_BURST", "2000"))
+
+READ_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+RATE_LIMITED = metrics.counter("rate_limited_total", "Requests answered 429 by the per-key rate limiter", ("bucket",))
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """
+        Take one token. Returns 0.0 on success, else seconds until one is available.
+        """
+        tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if tokens >= 1.0:
+            self.tokens = tokens - 1.0
+            return 0.0
+        self.tokens = tokens
+        return (1.0 - tokens) / self.rate
+
+
+class RateLimiter:
+    def __init__(self, key_limits: Dict[str, dict], clock=time.monotonic):
+        # api_key -> {"write_rate", "write_burst", "read_rate", "read_burst"} overrides
+        self.key_limits = key_limits
+        self.defaults = {
+            "write_rate": RATE_LIMIT_WRITE_RATE,
+            "write_burst": RATE_LIMIT_WRITE_BURST,
+            "read_rate": RATE_LIMIT_READ_RATE,
+            "read_burst": RATE_LIMIT_READ_BURST,
+        }
+        self.clock = clock
+        self._buckets: Dict[Tuple[str, str], Optional[TokenBucket]] = {}
+
+    def admit(self, api_key: str, method: str) -> int:
+        """
+        Take a token for one request. Returns 0 if admitted, else the
+        Retry-After in whole seconds.
+        """
+        kind = "read" if method in READ_METHODS else "write"
+        key = (api_key, kind)
+        now = self.clock()
+        try:
+            bucket = self._buckets[key]
+        except KeyError:
+            bucket = self._buckets[key] = self._new_bucket(api_key, kind, now)
+        if bucket is None:
+            return 0
+        wait = bucket.take(now)
+        if not wait:
+            return 0
+        RATE_LIMITED.labels(kind).inc()
+        return max(1, math.ceil(wait))
+
+    def reset(self):
+        """
+        Drop all buckets (e.g. after the limits changed); they refill from full.
+        """
+        self._buckets.clear()
+
+    def _new_bucket(self, api_key: str, kind: str, now: float) -> Optional[TokenBucket]:
+        limits = {**self.defaults, **self.key_limits.get(api_key, {})}
+        rate, burst = limits[f"{kind}_rate"], limits[f"{kind}_burst"]
+        if rate <= 0:
+            return None
+        return TokenBucket(rate, max(burst, 1.0), now)
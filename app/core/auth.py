@@ -1,9 +1,30 @@
 # app/core/auth.py
-from fastapi import Header, HTTPException, Depends
+from fastapi import Header, HTTPException, Depends, Request
+from typing import Dict, Optional
+from app.core.admission import RateLimiter
 
 API_KEYS = {"demo-key": "demo-user", "alice-key": "alice", "bob-key": "bob"}
 
-def get_current_user(x_api_key: str = Header(None)):
-    if x_api_key is None or x_api_key not in API_KEYS:
+# Per-key rate limit overrides (write_rate, write_burst, read_rate, read_burst);
+# keys not listed use the RATE_LIMIT_* defaults, see app/core/admission.py
+API_KEY_LIMITS: Dict[str, dict] = {}
+
+rate_limiter = RateLimiter(API_KEY_LIMITS)
+
+def resolve_api_key(api_key: Optional[str]) -> Optional[str]:
+    """
+    Map an API key to its user_id, or None if the key is unknown.
+    """
+    if api_key is None:
+        return None
+    return API_KEYS.get(api_key)
+
+async def get_current_user(request: Request, x_api_key: str = Header(None)):
+    # async so the rate limiter only ever runs on the event loop
+    user_id = resolve_api_key(x_api_key)
+    if user_id is None:
         raise HTTPException(status_code=401, detail="Invalid API key")
-    return API_KEYS[x_api_key]
+    retry_after = rate_limiter.admit(x_api_key, request.method)
+    if retry_after:
+        raise HTTPException(status_code=429, detail="Rate limit exceeded", headers={"Retry-After": str(retry_after)})
+    return user_id
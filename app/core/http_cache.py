@@ -0,0 +1,41 @@
+# app/core/http_cache.py
+from typing import Optional
+from fastapi import Response
+
+# Browsers revalidate on every poll and keep one cached copy per API key
+CACHE_CONTROL = "private, no-cache"
+VARY = "x-api-key"
+
+
+def etag_for(token: str) -> str:
+    return f'"{token}"'
+
+
+def is_not_modified(if_none_match: Optional[str], token: str) -> bool:
+    """
+    True if an If-None-Match header value already names this version.
+    """
+    if not if_none_match:
+        return False
+    etag = etag_for(token)
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag or candidate == "*":
+            return True
+    return False
+
+
+def set_version_headers(response: Response, token: str, delta: bool = False):
+    response.headers["ETag"] = etag_for(token)
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    response.headers["Vary"] = VARY
+    if delta:
+        response.headers["X-Delta"] = "true"
+
+
+def not_modified(token: str) -> Response:
+    response = Response(status_code=304)
+    set_version_headers(response, token)
+    return response
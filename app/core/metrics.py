@@ -0,0 +1,266 @@
+# app/core/metrics.py
+"""
+Low-overhead in-process metrics, rendered in Prometheus text format at GET /metrics.
+
+Histograms are HDR-style: integer values (nanoseconds for timings) go into
+log-linear buckets, each power of two split into SUB_BUCKETS linear
+sub-buckets, so quantiles are accurate to within 1/SUB_BUCKETS of the value
+at any magnitude. Recording is a few integer operations and a list
+increment; there are no locks since everything runs on the event loop.
+Quantiles are only computed when /metrics is scraped, and are exported as
+Prometheus summaries (`quantile` labels plus `_sum` and `_count`).
+
+    LOCK_WAIT = histogram("engine_lock_wait_seconds", "...").labels()
+    start = time.perf_counter_ns()
+    ...
+    LOCK_WAIT.record(time.perf_counter_ns() - start)
+"""
+import time
+from typing import Dict, List, Tuple
+
+SUB_BITS = 4
+SUB_BUCKETS = 1 << SUB_BITS
+# Covers values up to 2**64
+BUCKETS = (64 - SUB_BITS + 1) * SUB_BUCKETS
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+# Seconds per recorded unit for timing histograms
+NS = 1e-9
+
+
+def _bucket(value: int) -> int:
+    shift = value.bit_length() - SUB_BITS - 1
+    if shift <= 0:
+        return value
+    return (shift << SUB_BITS) + (value >> shift)
+
+
+def _bucket_value(index: int) -> float:
+    """
+    Midpoint of a bucket's value range.
+    """
+    if index < 2 * SUB_BUCKETS:
+        return float(index)
+    shift = (index >> SUB_BITS) - 1
+    low = (index - (shift << SUB_BITS)) << shift
+    return low + ((1 << shift) - 1) / 2
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+    def reset(self):
+        self.value = 0
+
+
+class Gauge:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def reset(self):
+        self.value = 0
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value: int):
+        if value < 0:
+            value = 0
+        self.counts[_bucket(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """
+        Approximate value at quantile `q` (0..1), in recorded units.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(_bucket_value(index), float(self.max))
+        return float(self.max)
+
+    def reset(self):
+        self.counts = [0] * BUCKETS
+        self.count = self.total = self.max = 0
+
+
+class Family:
+    """
+    A named metric with optional labels; `labels(...)` returns the child for
+    one set of label values (cache it for hot paths).
+    """
+
+    def __init__(self, kind: str, name: str, help: str, labelnames: Tuple[str, ...], scale: float):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        # Exported value per recorded unit (histograms only)
+        self.scale = scale
+        self.children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        child = self.children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self.children[values] = _KINDS[self.kind]()
+        return child
+
+    def render(self) -> str:
+        prom_type = "summary" if self.kind == "histogram" else self.kind
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {prom_type}"]
+        for values, child in sorted(self.children.items()):
+            pairs = [f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, values)]
+            if self.kind != "histogram":
+                lines.append(f"{self.name}{_labels(pairs)} {_number(child.value)}")
+                continue
+            for q in QUANTILES:
+                quantile = f'quantile="{q}"'
+                lines.append(f"{self.name}{_labels(pairs + [quantile])} {_number(child.quantile(q) * self.scale)}")
+            lines.append(f"{self.name}_sum{_labels(pairs)} {_number(child.total * self.scale)}")
+            lines.append(f"{self.name}_count{_labels(pairs)} {child.count}")
+        return "\n".join(lines) + "\n"
+
+
+_KINDS = {"counter": Counter, "gauge": Gauge, "histogram": Histogram}
+
+REGISTRY: Dict[str, Family] = {}
+
+
+def _register(kind: str, name: str, help: str, labelnames, scale: float = 1.0) -> Family:
+    family = REGISTRY.get(name)
+    if family is None:
+        family = REGISTRY[name] = Family(kind, name, help, tuple(labelnames), scale)
+    elif family.kind != kind:
+        raise ValueError(f"Metric {name} already registered as a {family.kind}")
+    return family
+
+
+def counter(name: str, help: str, labelnames=()) -> Family:
+    return _register("counter", name, help, labelnames)
+
+
+def gauge(name: str, help: str, labelnames=()) -> Family:
+    return _register("gauge", name, help, labelnames)
+
+
+def histogram(name: str, help: str, labelnames=(), scale: float = NS) -> Family:
+    """
+    Timing histogram fed nanoseconds and exported in seconds; pass scale=1 for counts.
+    """
+    return _register("histogram", name, help, labelnames, scale)
+
+
+def exposition() -> Dict[str, str]:
+    """
+    Rendered text per metric name, so exports from several processes can be merged.
+    """
+    return {name: family.render() for name, family in REGISTRY.items() if family.children}
+
+
+def render(blocks: Dict[str, str]) -> str:
+    return "".join(blocks[name] for name in sorted(blocks))
+
+
+def reset():
+    """
+    Zero every metric in place (children cached by callers stay valid).
+    """
+    for family in REGISTRY.values():
+        for child in family.children.values():
+            child.reset()
+
+
+def _labels(pairs: List[str]) -> str:
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# -------- HTTP --------
+HTTP_LATENCY = histogram("http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+HTTP_REQUESTS = counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+
+
+def route_template(scope) -> str:
+    """
+    The matched route's path template, or "unmatched".
+    """
+    template = getattr(scope.get("route"), "path", None)
+    if template is None:
+        return "unmatched"
+    # Routes of an included router may only know their own path: restore
+    # the router prefix from the request path
+    path = scope["path"]
+    extra = path.count("/") - template.count("/")
+    if extra > 0:
+        template = "/".join(path.split("/")[: extra + 1]) + template
+    return template
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing each HTTP request by its route template
+    (e.g. /api/v1/orders/{order_id}), so ids do not explode the label set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter_ns()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            route = route_template(scope)
+            method = scope["method"]
+            HTTP_LATENCY.labels(method, route).record(time.perf_counter_ns() - start)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
@@ -0,0 +1,71 @@
+# app/core/serialization.py
+"""
+Pre-serialized JSON responses for hot read endpoints.
+
+Routes that return large lists of plain dicts encode them straight to bytes
+with `dumps` (orjson when installed, else the stdlib encoder) and return a
+`RawJSONResponse`, skipping FastAPI's per-row response_model validation.
+Their `response_model` is kept for the OpenAPI schema only, so the dicts
+must already have the model's shape (see `project`).
+"""
+import json
+from collections import OrderedDict
+from typing import Hashable, Iterable, List, Optional, Tuple
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+_stdlib_encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return _stdlib_encode(obj).encode()
+
+
+def project(rows: Iterable[dict], fields: Tuple[str, ...]) -> List[dict]:
+    """
+    Keep only `fields` of each row (what response_model filtering used to do).
+    """
+    return [{f: row[f] for f in fields} for row in rows]
+
+
+class RawJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+class VersionedCache:
+    """
+    Encoded bodies for one version of a dataset, keyed by query. Any other
+    version empties the cache, so entries are rebuilt only after a change.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self.version: Optional[str] = None
+        self._bodies: "OrderedDict[Hashable, bytes]" = OrderedDict()
+
+    def get(self, version: str, key: Hashable) -> Optional[bytes]:
+        if version != self.version:
+            return None
+        body = self._bodies.get(key)
+        if body is not None:
+            self._bodies.move_to_end(key)
+        return body
+
+    def put(self, version: str, key: Hashable, body: bytes):
+        if version != self.version:
+            self.version = version
+            self._bodies.clear()
+        self._bodies[key] = body
+        if len(self._bodies) > self.max_entries:
+            self._bodies.popitem(last=False)
@@ -0,0 +1,97 @@
+# app/engine.py
+"""
+Engine runtime: instrument master, persistence, order books, the limit
+matcher and the market data feed. The FastAPI lifespan runs it in-process by default.
+
+For multi-worker deployments run it as its own process, which owns all
+matching and state and serves API workers over a Unix socket:
+
+    python -m app.engine
+    ENGINE_MODE=client uvicorn app.main:app --workers 4
+"""
+import asyncio
+import logging
+import os
+import signal
+from app.services import persistence
+from app.services.candles import candles
+from app.services.engine_ipc import EngineServer
+from app.services.limit_matcher import matcher_loop, restore_books
+from app.services.market_data import MARKET_DATA_SOURCE, pipeline, source_from_spec
+from app.services.portfolio_valuation import valuation
+from app.services.risk import RISK_LIMITS_PATH, risk
+from app.store.repository import get_store
+
+logger = logging.getLogger(__name__)
+
+# "embedded" (default): engine runs inside the API process
+# "client": API worker forwarding ops to a separate `python -m app.engine`
+ENGINE_MODE = os.getenv("ENGINE_MODE", "embedded")
+
+# True between start_engine and stop_engine
+RUNNING = False
+
+
+async def start_engine() -> asyncio.Task:
+    global RUNNING
+    RUNNING = True
+    # Bulk load the exchange instrument master, if configured
+    master_path = os.getenv("INSTRUMENT_MASTER_PATH")
+    if master_path:
+        count = get_store().instruments.load_file(master_path)
+        logger.info(f"Loaded {count} instruments from {master_path}")
+
+    # Per-user pre-trade risk limits, if configured
+    if RISK_LIMITS_PATH:
+        count = risk.load_file(RISK_LIMITS_PATH)
+        logger.info(f"Loaded risk limits for {count} users from {RISK_LIMITS_PATH}")
+
+    # Rebuild the store from snapshot + journal tail (if JOURNAL_DIR is set)
+    await persistence.start()
+    restore_books()
+
+    # Start the Limit Order Matcher in background
+    logger.info("Starting Limit Matcher Background Task...")
+    matcher_task = asyncio.create_task(matcher_loop())
+    await valuation.start()
+    await candles.start()
+
+    if MARKET_DATA_SOURCE:
+        logger.info(f"Starting market data feed: {MARKET_DATA_SOURCE}")
+        await pipeline.start(source_from_spec(MARKET_DATA_SOURCE))
+    return matcher_task
+
+
+async def stop_engine(matcher_task: asyncio.Task):
+    global RUNNING
+    RUNNING = False
+    await pipeline.stop()
+    await valuation.stop()
+    await candles.stop()
+    logger.info("Shutting down Limit Matcher...")
+    matcher_task.cancel()
+    try:
+        await matcher_task
+    except asyncio.CancelledError:
+        pass
+    await persistence.stop()
+
+
+async def serve():
+    matcher_task = await start_engine()
+    server = EngineServer()
+    await server.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    await server.stop()
+    await stop_engine(matcher_task)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve())
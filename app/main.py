@@ -2,13 +2,17 @@
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-import asyncio
 import importlib
 import sys, traceback
 import logging
-from app.services.limit_matcher import matcher_loop
+from app.core.metrics import MetricsMiddleware
+from app.engine import ENGINE_MODE, start_engine, stop_engine
+from app.services import engine_ops
+from app.services.engine_ipc import EngineClient
+from app.services.engine_ops import EngineError
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO)
@@ -17,19 +21,24 @@ logger = logging.getLogger(__name__)
 # --- Lifespan Manager (Modern Replacement for on_event) ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Start the Limit Order Matcher in background
-    logger.info("Starting Limit Matcher Background Task...")
-    matcher_task = asyncio.create_task(matcher_loop())
-    
+    if ENGINE_MODE == "client":
+        # Startup: Forward engine ops to the engine process (python -m app.engine)
+        client = EngineClient()
+        await client.connect()
+        engine_ops.REMOTE = client
+        logger.info("Connected to engine process")
+        yield
+        engine_ops.REMOTE = None
+        await client.close()
+        return
+
+    # Startup: Run the engine (matcher, persistence) in this process
+    matcher_task = await start_engine()
+
     yield  # Application runs here
-    
-    # Shutdown: Clean up the background task
-    logger.info("Shutting down Limit Matcher...")
-    matcher_task.cancel()
-    try:
-        await matcher_task
-    except asyncio.CancelledError:
-        pass
+
+    # Shutdown: Clean up the background tasks
+    await stop_engine(matcher_task)
 
 # Initialize App with Lifespan
 app = FastAPI(
@@ -46,8 +55,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Delta"],
 )
 
+# Per-route request latency for /metrics
+app.add_middleware(MetricsMiddleware)
+
 def safe_include(module_path: str, router_name: str = "router", prefix: str = "/api/v1"):
     try:
         mod = importlib.import_module(module_path)
@@ -64,11 +77,17 @@ safe_include("app.api.orders")
 safe_include("app.api.trades")
 safe_include("app.api.portfolio")
 safe_include("app.api.ws")
+safe_include("app.api.metrics", prefix="")
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     logger.error(f"Validation error: {exc}")
-    return JSONResponse(status_code=422, content={"detail": exc.errors()})
+    return JSONResponse(status_code=422, content={"detail": jsonable_encoder(exc.errors())})
+
+@app.exception_handler(EngineError)
+async def engine_error_handler(request: Request, exc: EngineError):
+    headers = {"Retry-After": str(exc.retry_after)} if exc.retry_after is not None else None
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail}, headers=headers)
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
@@ -0,0 +1,21 @@
+# app/models/candle.py
+
+from pydantic import BaseModel
+from typing import List, Optional
+
+class Candle(BaseModel):
+    start: str
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: int
+    vwap: Optional[float] = None
+    trades: int
+
+class CandleSeries(BaseModel):
+    symbol: str
+    interval: str
+    volume: int
+    vwap: Optional[float] = None
+    candles: List[Candle]
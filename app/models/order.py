@@ -1,9 +1,12 @@
 # app/models/order.py
 
 from pydantic import BaseModel, Field, validator
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 
+# Largest basket accepted by the batch endpoints
+MAX_BATCH_SIZE = 1000
+
 class OrderType(str, Enum):
     BUY = "BUY"
     SELL = "SELL"
@@ -19,7 +22,7 @@ class OrderRequest(BaseModel):
     quantity: int = Field(..., gt=0, description="Quantity must be positive")
     price: Optional[float] = None
 
-    @validator("price")
+    @validator("price", always=True)
     def price_required_for_limit(cls, v, values):
         if values.get("order_style") == OrderStyle.LIMIT and v is None:
             raise ValueError("price is required for LIMIT orders")
@@ -37,6 +40,26 @@ class OrderResponse(BaseModel):
     executed_at: Optional[str] = None
 
 
+class BatchOrderRequest(BaseModel):
+    orders: List[OrderRequest] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class BatchCancelRequest(BaseModel):
+    order_ids: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class BatchOrderResult(BaseModel):
+    index: int
+    ok: bool
+    order: Optional[OrderResponse] = None
+    status_code: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class BatchOrderResponse(BaseModel):
+    results: List[BatchOrderResult]
+
+
 class OrderState(str, Enum):
     NEW = "NEW"
     PLACED = "PLACED"
@@ -8,8 +8,20 @@ class Holding(BaseModel):
     quantity: int
     avg_price: float
     current_value: float
+    last_traded_price: float = 0.0
+    cost: float = 0.0
+    unrealized_pnl: float = 0.0
+    realized_pnl: float = 0.0
+
+
+class PortfolioTotals(BaseModel):
+    cost: float = 0.0
+    current_value: float = 0.0
+    unrealized_pnl: float = 0.0
+    realized_pnl: float = 0.0
 
 
 class PortfolioResponse(BaseModel):
     user_id: str
     holdings: List[Holding]
+    totals: PortfolioTotals = PortfolioTotals()
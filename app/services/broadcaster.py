@@ -1,27 +1,310 @@
 # app/services/broadcaster.py
 import asyncio
-from typing import Set
+import itertools
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set
+from uuid import uuid4
 from fastapi import WebSocket
+from app.core import metrics
+
+# Max messages buffered per client before the slow-consumer policy kicks in
+CLIENT_QUEUE_SIZE = int(os.getenv("WS_CLIENT_QUEUE_SIZE", "1000"))
+# "drop_oldest": discard the oldest queued message; "disconnect": close the socket
+SLOW_CONSUMER_POLICY = os.getenv("WS_SLOW_CONSUMER_POLICY", "drop_oldest")
+
+# Recent events kept per subscribed topic for clients resuming after a reconnect
+REPLAY_BUFFER_SIZE = int(os.getenv("WS_REPLAY_BUFFER_SIZE", "1000"))
+# Seconds a topic's replay buffer outlives its last subscriber
+REPLAY_TTL_SECONDS = float(os.getenv("WS_REPLAY_TTL_SECONDS", "60"))
+# Idle replay buffers are looked for at most this often (on subscription changes)
+REPLAY_SWEEP_INTERVAL_SECONDS = 1.0
+
+# Close code sent to clients disconnected for falling behind ("try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+WS_CLIENTS = metrics.gauge("ws_clients", "Connected WebSocket clients").labels()
+BROADCAST_DURATION = metrics.histogram("broadcast_duration_seconds", "Time to serialize and enqueue one published message").labels()
+BROADCAST_FANOUT = metrics.histogram("broadcast_clients", "Clients a published message was queued for", scale=1).labels()
+WS_DROPPED = metrics.counter("ws_messages_dropped_total", "Messages dropped for slow WebSocket clients").labels()
+WS_RESUMES = metrics.counter("ws_resumes_total", "Topic resumes after a reconnect", ("result",))
+
+
+def trades_topic(symbol: str) -> str:
+    return f"trades:{symbol.upper()}"
+
+
+def ticks_topic(symbol: str) -> str:
+    return f"ticks:{symbol.upper()}"
+
+
+def candles_topic(symbol: str, interval: str) -> str:
+    return f"candles:{symbol.upper()}:{interval}"
+
+
+def user_topic(user_id: str) -> str:
+    # Private order/trade updates; only the authenticated owner may subscribe
+    return f"user:{user_id}"
+
+
+class ClientConnection:
+    """
+    One WebSocket client: its bounded send queue, writer task, subscriptions
+    and counters.
+    """
+
+    def __init__(self, ws: WebSocket, queue_size: int):
+        self.ws = ws
+        self.user_id: Optional[str] = None
+        self.topics: Set[str] = set()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.writer: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.dropped = 0
+
+    def stats(self) -> dict:
+        return {
+            "client": id(self.ws),
+            "queue_depth": self.queue.qsize(),
+            "sent": self.sent,
+            "dropped": self.dropped,
+        }
+
 
 class Broadcaster:
-    def __init__(self):
-        self.clients: Set[WebSocket] = set()
+    """
+    Topic-based fan-out of engine events to WebSocket clients.
+
+    Clients subscribe to topics (see the `*_topic` helpers) and the
+    broadcaster keeps a topic -> subscribers index, so `publish` only
+    touches interested sockets. A message is serialized once and enqueued
+    on each subscriber's bounded queue without awaiting; a per-client
+    writer task does the network I/O, so a slow consumer only delays itself.
+
+    Every published event carries `seq`, a per-topic counter, so a client
+    can spot gaps. The last `replay_size` events of each topic that has had
+    a subscriber are kept, and a reconnecting client can `resume` a topic
+    from the last seq it saw: it gets the missed events, or False when they
+    are no longer buffered and it must reload a snapshot. Sequences belong
+    to this broadcaster (`epoch`): after a restart, or on another API
+    worker, they start over. A topic's buffer is dropped once it has had
+    no subscriber for `replay_ttl` seconds, so memory follows the topics
+    in use rather than every topic ever subscribed.
+    """
 
-    async def connect(self, ws: WebSocket):
+    def __init__(
+        self,
+        queue_size: int = CLIENT_QUEUE_SIZE,
+        policy: str = SLOW_CONSUMER_POLICY,
+        replay_size: int = REPLAY_BUFFER_SIZE,
+        replay_ttl: float = REPLAY_TTL_SECONDS,
+    ):
+        if policy not in ("drop_oldest", "disconnect"):
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.queue_size = queue_size
+        self.policy = policy
+        self.replay_size = replay_size
+        self.replay_ttl = replay_ttl
+        self.epoch = uuid4().hex
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        self.topics: Dict[str, Set[ClientConnection]] = {}
+        # topic -> seq of its last published event
+        self.seqs: Dict[str, int] = {}
+        # topic -> its most recent events, oldest first
+        self._history: Dict[str, Deque[dict]] = {}
+        # topic -> time.monotonic() its last subscriber left, for buffered topics
+        self._idle: Dict[str, float] = {}
+        self._next_sweep = 0.0
+        # Called with (topic, message) for every publish, e.g. to forward
+        # engine events to API worker processes
+        self.sinks: List[Callable[[str, dict], None]] = []
+        # While True, publish is a no-op (see `muted`)
+        self.muted = False
+
+    async def connect(self, ws: WebSocket) -> ClientConnection:
         await ws.accept()
-        self.clients.add(ws)
+        client = ClientConnection(ws, self.queue_size)
+        client.writer = asyncio.create_task(self._write_loop(client))
+        self.clients[ws] = client
+        WS_CLIENTS.set(len(self.clients))
+        return client
 
     def disconnect(self, ws: WebSocket):
-        self.clients.discard(ws)
-
-    async def broadcast(self, message: dict):
-        dead = []
-        for ws in list(self.clients):
-            try:
-                await ws.send_json(message)
-            except Exception:
-                dead.append(ws)
-        for d in dead:
-            self.disconnect(d)
+        client = self.clients.pop(ws, None)
+        if client is None:
+            return
+        WS_CLIENTS.set(len(self.clients))
+        for topic in client.topics:
+            self._remove_subscriber(topic, client)
+        client.topics.clear()
+        if client.writer is not None and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+        self._sweep()
+
+    def subscribe(self, ws: WebSocket, topics: Iterable[str]):
+        client = self.clients[ws]
+        for topic in topics:
+            client.topics.add(topic)
+            self.topics.setdefault(topic, set()).add(client)
+            self._idle.pop(topic, None)
+            if topic not in self._history and self.replay_size > 0:
+                self._history[topic] = deque(maxlen=self.replay_size)
+        self._sweep()
+
+    def resume(self, ws: WebSocket, topic: str, after_seq: int) -> bool:
+        """
+        Queue the events of `topic` published after `after_seq` for one
+        client. Returns False if some of them are no longer buffered (or
+        `after_seq` is from another epoch), in which case nothing is sent.
+        """
+        client = self.clients.get(ws)
+        last = self.seqs.get(topic, 0)
+        if client is None or after_seq > last:
+            WS_RESUMES.labels("snapshot").inc()
+            return False
+        missed = last - after_seq
+        history = self._history.get(topic)
+        if missed and (not history or missed > len(history)):
+            WS_RESUMES.labels("snapshot").inc()
+            return False
+        if missed:
+            events = list(itertools.islice(reversed(history), missed))
+            for event in reversed(events):
+                self._enqueue(client, json.dumps(event, separators=(",", ":")))
+        WS_RESUMES.labels("replayed").inc()
+        return True
+
+    def unsubscribe(self, ws: WebSocket, topics: Iterable[str]):
+        client = self.clients[ws]
+        for topic in topics:
+            client.topics.discard(topic)
+            self._remove_subscriber(topic, client)
+        self._sweep()
+
+    def add_sink(self, sink: Callable[[str, dict], None]):
+        self.sinks.append(sink)
+
+    def remove_sink(self, sink: Callable[[str, dict], None]):
+        if sink in self.sinks:
+            self.sinks.remove(sink)
+
+    @contextmanager
+    def muted_publish(self):
+        """
+        Discard every publish inside the block: no sinks, seqs or history.
+        For headless runs of the engine such as backtests.
+        """
+        self.muted = True
+        try:
+            yield
+        finally:
+            self.muted = False
+
+    def publish(self, topic: str, message: dict) -> int:
+        """
+        Queue `message` for every subscriber of `topic`. Never awaits network I/O.
+        Returns the number of clients the message was queued for.
+        """
+        if self.muted:
+            return 0
+        for sink in self.sinks:
+            sink(topic, message)
+        seq = self.seqs[topic] = self.seqs.get(topic, 0) + 1
+        subscribers = self.topics.get(topic)
+        history = self._history.get(topic)
+        if history is None and not subscribers:
+            return 0
+        event = {"topic": topic, "seq": seq, **message}
+        if history is not None:
+            history.append(event)
+        if not subscribers:
+            return 0
+        start = time.perf_counter_ns()
+        payload = json.dumps(event, separators=(",", ":"))
+        queued = 0
+        for client in list(subscribers):
+            if self._enqueue(client, payload):
+                queued += 1
+        BROADCAST_DURATION.record(time.perf_counter_ns() - start)
+        BROADCAST_FANOUT.record(queued)
+        return queued
+
+    def send(self, ws: WebSocket, message: dict):
+        """
+        Queue a message for one client only (protocol replies), behind its pending events.
+        """
+        client = self.clients.get(ws)
+        if client is not None:
+            self._enqueue(client, json.dumps(message, separators=(",", ":")))
+
+    def stats(self) -> List[dict]:
+        return [client.stats() for client in self.clients.values()]
+
+    def evict_idle_history(self, now: Optional[float] = None) -> int:
+        """
+        Drop the replay buffers of topics without a subscriber for more
+        than `replay_ttl` seconds. Returns the number dropped.
+        """
+        now = time.monotonic() if now is None else now
+        expired = [topic for topic, since in self._idle.items() if now - since > self.replay_ttl]
+        for topic in expired:
+            del self._idle[topic]
+            self._history.pop(topic, None)
+        return len(expired)
+
+    def _sweep(self):
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._next_sweep = now + REPLAY_SWEEP_INTERVAL_SECONDS
+            self.evict_idle_history(now)
+
+    def _remove_subscriber(self, topic: str, client: ClientConnection):
+        subscribers = self.topics.get(topic)
+        if subscribers is None:
+            return
+        subscribers.discard(client)
+        if not subscribers:
+            del self.topics[topic]
+            if topic in self._history:
+                self._idle[topic] = time.monotonic()
+
+    def _enqueue(self, client: ClientConnection, payload: str) -> bool:
+        try:
+            client.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            client.dropped += 1
+            WS_DROPPED.inc()
+
+        if self.policy == "disconnect":
+            self.disconnect(client.ws)
+            asyncio.create_task(self._close(client.ws))
+            return False
+
+        # drop_oldest: make room for the newest message
+        client.queue.get_nowait()
+        client.queue.put_nowait(payload)
+        return True
+
+    async def _write_loop(self, client: ClientConnection):
+        try:
+            while True:
+                payload = await client.queue.get()
+                await client.ws.send_text(payload)
+                client.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.disconnect(client.ws)
+
+    async def _close(self, ws: WebSocket):
+        try:
+            await ws.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        except Exception:
+            pass
+
 
 broadcaster = Broadcaster()
@@ -0,0 +1,261 @@
+# app/services/candles.py
+"""
+Streaming OHLCV candles and VWAP per symbol.
+
+Every fill (`execution_engine.fill`) and every LTP change from the market
+data feed updates the symbol's 1s, 1m and 5m series. A tick moves the
+price (open/high/low/close) but adds no volume. Bars carry open, high,
+low, close, volume, VWAP and trade count. Each symbol also keeps its
+running volume and VWAP since the engine started.
+
+A series keeps the forming bar in plain attributes, so an update is a few
+comparisons, and writes each closed bar into a fixed-size ring buffer: one
+preallocated column per field, NumPy arrays when NumPy is installed, else
+stdlib `array`s. The ring holds the last CANDLE_HISTORY[interval] bars, so
+memory per symbol is bounded. Reading the last `limit` bars slices the
+columns, which is O(limit).
+Intervals with no trade and no tick have no bar.
+
+A bar closes when an event lands in a later bucket, or when its end time
+passes: a sweeper runs every CANDLE_CLOSE_INTERVAL_MS. Each closed bar
+is published once on `candles:<SYMBOL>:<interval>` as a "candle" event.
+Candles live in memory only and start empty after a restart.
+"""
+import asyncio
+import os
+from array import array
+from typing import Dict, List, Optional, Set
+from app.services.broadcaster import broadcaster, candles_topic
+from app.store.records import now_ns as engine_now_ns, to_iso
+
+try:
+    import numpy
+except ImportError:  # optional: columns fall back to stdlib arrays
+    numpy = None
+
+# Interval name -> bar length in seconds
+INTERVALS = {"1s": 1, "1m": 60, "5m": 300}
+# Bars kept per symbol and interval
+CANDLE_HISTORY = {
+    "1s": int(os.getenv("CANDLE_HISTORY_1S", "120")),
+    "1m": int(os.getenv("CANDLE_HISTORY_1M", "240")),
+    "5m": int(os.getenv("CANDLE_HISTORY_5M", "288")),
+}
+CANDLE_CLOSE_INTERVAL_MS = float(os.getenv("CANDLE_CLOSE_INTERVAL_MS", "250"))
+
+# column -> (numpy dtype, array typecode)
+COLUMNS = {
+    "start": ("int64", "q"),
+    "open": ("float64", "d"),
+    "high": ("float64", "d"),
+    "low": ("float64", "d"),
+    "close": ("float64", "d"),
+    "volume": ("int64", "q"),
+    "notional": ("float64", "d"),
+    "trades": ("int64", "q"),
+}
+
+_NS = 1_000_000_000
+
+
+def _column(dtype: str, typecode: str, size: int):
+    if numpy is not None:
+        return numpy.zeros(size, dtype=dtype)
+    return array(typecode, bytes(array(typecode).itemsize * size))
+
+
+class BarSeries:
+    """
+    One symbol's bars for one interval: the forming bar in plain
+    attributes, closed bars in the ring columns.
+    """
+
+    __slots__ = (
+        "symbol", "interval", "seconds", "capacity", "closed", "columns", "emitted",
+        "start", "open", "high", "low", "close", "volume", "notional", "trades",
+    )
+
+    def __init__(self, symbol: str, interval: str, capacity: int):
+        self.symbol = symbol
+        self.interval = interval
+        self.seconds = INTERVALS[interval]
+        self.capacity = capacity
+        # Bars ever closed; the newest is at (closed - 1) % capacity
+        self.closed = 0
+        self.columns = {name: _column(dtype, code, capacity) for name, (dtype, code) in COLUMNS.items()}
+        # Start of the last bar published as closed
+        self.emitted = -1
+        # Forming bar; start is -1 until the first event
+        self.start = -1
+        self.open = self.high = self.low = self.close = self.notional = 0.0
+        self.volume = self.trades = 0
+
+    def update(self, second: int, price: float, quantity: int) -> bool:
+        """
+        Add a trade (or a tick, with quantity 0) at epoch `second`.
+        Returns True if it opened a new bar, i.e. the previous one closed.
+        """
+        start = second - second % self.seconds
+        if start <= self.start:
+            # Same bar (a late event is folded into the forming bar)
+            if price > self.high:
+                self.high = price
+            elif price < self.low:
+                self.low = price
+            self.close = price
+            if quantity:
+                self.volume += quantity
+                self.notional += quantity * price
+                self.trades += 1
+            return False
+        rolled = self.start >= 0
+        if rolled:
+            self._store()
+        self.start = start
+        self.open = self.high = self.low = self.close = price
+        self.volume = quantity
+        self.notional = quantity * price
+        self.trades = 1 if quantity else 0
+        return rolled
+
+    def current(self) -> dict:
+        return _bar(self.start, self.open, self.high, self.low, self.close, self.volume, self.notional, self.trades)
+
+    def bars(self, limit: int) -> List[dict]:
+        """
+        The last `limit` bars, oldest first, ending with the forming one; O(limit).
+        """
+        forming = self.start >= 0 and limit > 0
+        bars = self.closed_bars(limit - forming)
+        if forming:
+            bars.append(self.current())
+        return bars
+
+    def closed_bars(self, limit: int) -> List[dict]:
+        n = max(0, min(limit, self.closed, self.capacity))
+        if n == 0:
+            return []
+        lo, hi = (self.closed - n) % self.capacity, self.closed % self.capacity
+        if lo < hi:
+            cols = [col[lo:hi].tolist() for col in self.columns.values()]
+        else:
+            cols = [col[lo:].tolist() + col[:hi].tolist() for col in self.columns.values()]
+        return [_bar(*row) for row in zip(*cols)]
+
+    def _store(self):
+        i = self.closed % self.capacity
+        c = self.columns
+        c["start"][i] = self.start
+        c["open"][i] = self.open
+        c["high"][i] = self.high
+        c["low"][i] = self.low
+        c["close"][i] = self.close
+        c["volume"][i] = self.volume
+        c["notional"][i] = self.notional
+        c["trades"][i] = self.trades
+        self.closed += 1
+
+
+def _bar(start, open, high, low, close, volume, notional, trades) -> dict:
+    return {
+        "start": start, "open": open, "high": high, "low": low, "close": close,
+        "volume": volume, "vwap": notional / volume if volume else None, "trades": trades,
+    }
+
+
+class CandleAggregator:
+    def __init__(self, history: Dict[str, int] = CANDLE_HISTORY, close_interval: float = CANDLE_CLOSE_INTERVAL_MS / 1000):
+        self.history = history
+        self.close_interval = close_interval
+        # symbol -> {interval: BarSeries}
+        self._series: Dict[str, Dict[str, BarSeries]] = {}
+        # symbol -> [volume, notional] since start
+        self._totals: Dict[str, List[float]] = {}
+        # Series whose current bar has not been published as closed yet
+        self._open: Set[BarSeries] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def on_trade(self, symbol: str, price: float, quantity: int, timestamp_ns: int):
+        totals = self._totals.get(symbol)
+        if totals is None:
+            totals = self._totals[symbol] = [0, 0.0]
+        totals[0] += quantity
+        totals[1] += quantity * price
+        self._update(symbol, timestamp_ns // _NS, price, quantity)
+
+    def on_tick(self, symbol: str, price: float, timestamp_ns: int):
+        self._update(symbol, timestamp_ns // _NS, price, 0)
+
+    def candles(self, symbol: str, interval: str, limit: int) -> dict:
+        """
+        The last `limit` bars (the last one may still be forming) plus the
+        symbol's running volume and VWAP. Bar starts are epoch seconds.
+        """
+        series = self._series.get(symbol, {}).get(interval)
+        volume, notional = self._totals.get(symbol, (0, 0.0))
+        return {
+            "symbol": symbol,
+            "interval": interval,
+            "volume": volume,
+            "vwap": notional / volume if volume else None,
+            "candles": series.bars(limit) if series is not None else [],
+        }
+
+    def close_due(self, now_ns: Optional[int] = None) -> int:
+        """
+        Publish bars whose interval has ended. Returns the number published.
+        """
+        now = (now_ns if now_ns is not None else engine_now_ns()) // _NS
+        due = [s for s in self._open if s.start + s.seconds <= now]
+        for series in due:
+            self._open.discard(series)
+            self._publish(series, series.current())
+        return len(due)
+
+    def clear(self):
+        self._series.clear()
+        self._totals.clear()
+        self._open.clear()
+
+    async def start(self):
+        self._task = asyncio.create_task(self._close_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _update(self, symbol: str, second: int, price: float, quantity: int):
+        by_interval = self._series.get(symbol)
+        if by_interval is None:
+            by_interval = self._series[symbol] = {
+                interval: BarSeries(symbol, interval, self.history[interval]) for interval in INTERVALS
+            }
+        for series in by_interval.values():
+            if series.update(second, price, quantity) and series in self._open:
+                # The previous bar closed before the sweeper saw it
+                self._publish(series, series.closed_bars(1)[0])
+            self._open.add(series)
+
+    def _publish(self, series: BarSeries, bar: dict):
+        if bar["start"] <= series.emitted:
+            return
+        series.emitted = bar["start"]
+        broadcaster.publish(candles_topic(series.symbol, series.interval), {
+            "type": "candle",
+            "symbol": series.symbol,
+            "interval": series.interval,
+            "candle": {**bar, "start": to_iso(bar["start"] * _NS)},
+        })
+
+    async def _close_loop(self):
+        while True:
+            await asyncio.sleep(self.close_interval)
+            self.close_due()
+
+
+candles = CandleAggregator()
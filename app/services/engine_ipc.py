@@ -0,0 +1,204 @@
+# app/services/engine_ipc.py
+"""
+Local IPC between API worker processes and a single engine process.
+
+Frames are a 4-byte big-endian length followed by compact JSON:
+
+    worker -> engine  {"t": "req", "id": 7, "op": "place_order", "args": {...}}
+    engine -> worker  {"t": "res", "id": 7, "ok": true, "result": ...}
+                      {"t": "res", "id": 7, "ok": false, "status": 404, "detail": "...", "retry_after": null}
+                      {"t": "evt", "topic": "trades:TCS", "msg": {...}}
+
+The engine process owns the order book, matcher and store. Every message
+its Broadcaster publishes is forwarded as an "evt" frame to all connected
+workers, which republish it to their own WebSocket subscribers.
+
+A worker that loses the engine connection answers 503 until it has
+reconnected; it retries with backoff from ENGINE_RECONNECT_DELAY up to
+ENGINE_RECONNECT_MAX_DELAY seconds.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import os
+import struct
+from typing import Callable, Dict, Optional, Set
+from app.services.broadcaster import broadcaster
+from app.services.engine_ops import EngineError, run_op
+
+logger = logging.getLogger(__name__)
+
+ENGINE_SOCKET = os.getenv("ENGINE_SOCKET", "/tmp/trading-engine.sock")
+# Event frames buffered for a worker before it is considered stuck and dropped
+MAX_WORKER_BUFFER_BYTES = 64 * 1024 * 1024
+ENGINE_RECONNECT_DELAY = float(os.getenv("ENGINE_RECONNECT_DELAY", "0.1"))
+ENGINE_RECONNECT_MAX_DELAY = float(os.getenv("ENGINE_RECONNECT_MAX_DELAY", "5"))
+
+_LENGTH = struct.Struct(">I")
+
+
+def encode_frame(message: dict) -> bytes:
+    payload = json.dumps(message, separators=(",", ":")).encode()
+    return _LENGTH.pack(len(payload)) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> dict:
+    header = await reader.readexactly(_LENGTH.size)
+    (length,) = _LENGTH.unpack(header)
+    return json.loads(await reader.readexactly(length))
+
+
+class EngineServer:
+    """
+    Serves engine ops to API workers over a Unix socket.
+    """
+
+    def __init__(self, path: str = ENGINE_SOCKET):
+        self.path = path
+        self.workers: Set[asyncio.StreamWriter] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        # Strong references to in-flight op tasks
+        self._ops: Set[asyncio.Task] = set()
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._handle_worker, path=self.path)
+        broadcaster.add_sink(self._forward_event)
+        logger.info(f"Engine listening on {self.path}")
+
+    async def stop(self):
+        broadcaster.remove_sink(self._forward_event)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for writer in list(self.workers):
+            writer.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def _forward_event(self, topic: str, message: dict):
+        if not self.workers:
+            return
+        frame = encode_frame({"t": "evt", "topic": topic, "msg": message})
+        for writer in list(self.workers):
+            if writer.transport.get_write_buffer_size() > MAX_WORKER_BUFFER_BYTES:
+                logger.error("Dropping worker that stopped reading engine events")
+                self.workers.discard(writer)
+                writer.close()
+                continue
+            writer.write(frame)
+
+    async def _handle_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.workers.add(writer)
+        try:
+            while True:
+                request = await read_frame(reader)
+                # Run each op as its own task so a slow op (e.g. waiting on the
+                # journal group commit) does not hold up the worker's next request
+                task = asyncio.create_task(self._run_op(writer, request))
+                self._ops.add(task)
+                task.add_done_callback(self._ops.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.workers.discard(writer)
+            writer.close()
+
+    async def _run_op(self, writer: asyncio.StreamWriter, request: dict):
+        try:
+            result = await run_op(request["op"], request["args"])
+            response = {"t": "res", "id": request["id"], "ok": True, "result": result}
+        except EngineError as e:
+            response = {
+                "t": "res", "id": request["id"], "ok": False,
+                "status": e.status_code, "detail": e.detail, "retry_after": e.retry_after,
+            }
+        except Exception as e:
+            logger.exception(f"Engine op {request.get('op')} failed")
+            response = {"t": "res", "id": request["id"], "ok": False, "status": 500, "detail": str(e)}
+        if not writer.is_closing():
+            writer.write(encode_frame(response))
+
+
+class EngineClient:
+    """
+    A worker's connection to the engine process. Requests are multiplexed
+    over one socket by id; "evt" frames are republished on the local
+    Broadcaster. A dropped connection fails the calls in flight and is
+    re-established in the background.
+    """
+
+    def __init__(self, path: str = ENGINE_SOCKET, publish: Optional[Callable[[str, dict], int]] = None):
+        self.path = path
+        self.publish = publish or broadcaster.publish
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+
+    async def connect(self, retries: int = 50, delay: float = 0.1):
+        for attempt in range(retries):
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self.path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if attempt == retries - 1:
+                    raise
+                await asyncio.sleep(delay)
+        self._reader_task = asyncio.create_task(self._run(reader))
+
+    async def close(self):
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+
+    async def call(self, op: str, args: dict):
+        if self._writer is None or self._writer.is_closing():
+            raise EngineError(503, "Engine unavailable")
+        request_id = next(self._ids)
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = fut
+        self._writer.write(encode_frame({"t": "req", "id": request_id, "op": op, "args": args}))
+        response = await fut
+        if not response["ok"]:
+            raise EngineError(response["status"], response["detail"], response.get("retry_after"))
+        return response["result"]
+
+    async def _run(self, reader: asyncio.StreamReader):
+        while True:
+            await self._read_loop(reader)
+            reader = await self._reconnect()
+
+    async def _reconnect(self) -> asyncio.StreamReader:
+        delay = ENGINE_RECONNECT_DELAY
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self.path)
+            except OSError:
+                delay = min(delay * 2, ENGINE_RECONNECT_MAX_DELAY)
+                continue
+            logger.info("Reconnected to engine process")
+            return reader
+
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                frame = await read_frame(reader)
+                if frame["t"] == "evt":
+                    self.publish(frame["topic"], frame["msg"])
+                else:
+                    fut = self._pending.pop(frame["id"], None)
+                    if fut is not None and not fut.done():
+                        fut.set_result(frame)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            logger.error("Lost connection to engine process")
+        finally:
+            self._writer.close()
+            for fut in self._pending.values():
+                if not fut.done():
+                    fut.set_result({"ok": False, "status": 503, "detail": "Engine unavailable"})
+            self._pending.clear()
@@ -0,0 +1,362 @@
+# app/services/engine_ops.py
+"""
+Engine operations behind the REST API.
+
+Each op takes and returns plain JSON-able values so it can run either in
+this process or in a dedicated engine process over IPC (see engine_ipc.py).
+Order and trade timestamps are returned as epoch-ns ints; the API formats
+them (see app/store/records.py).
+API modules call `dispatch(op, **kwargs)` and never touch the store or the
+engine directly; in ENGINE_MODE=client `dispatch` forwards to the engine
+process instead of running the op locally.
+"""
+import os
+from typing import Dict, List, Optional
+from uuid import uuid4
+from app.core import metrics
+from app.services.execution_engine import (
+    apply_cancel,
+    execute_if_possible,
+    fill,
+    fill_price,
+    find_instrument,
+    publish_batch,
+    publish_order_update,
+)
+from app.services.candles import candles
+from app.services.idempotency import IdempotencyConflict, idempotency
+from app.services.locks import order_locks
+from app.services import versions
+from app.services.limit_matcher import remove_resting, rest_order
+from app.services.portfolio_valuation import valuation
+from app.services.risk import risk
+from app.store import journal
+from app.store.records import now_ns
+from app.store.repository import get_store
+
+# Order writes allowed in the engine at once; beyond it they are shed with a 503
+ENGINE_MAX_IN_FLIGHT = int(os.getenv("ENGINE_MAX_IN_FLIGHT", "1000"))
+ENGINE_RETRY_AFTER_SECONDS = int(os.getenv("ENGINE_RETRY_AFTER_SECONDS", "1"))
+
+ENGINE_IN_FLIGHT = metrics.gauge("engine_in_flight", "Order writes currently in the engine").labels()
+ENGINE_SHED = metrics.counter("engine_shed_total", "Order writes rejected because the engine was at its in-flight cap").labels()
+
+
+class EngineError(Exception):
+    """
+    An op failed for a client-visible reason; mapped to an HTTP status by the API.
+    """
+
+    def __init__(self, status_code: int, detail: str, retry_after: Optional[int] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+def _new_order(user_id: str, payload: dict) -> dict:
+    """
+    Risk-check and create a PLACED order, save it and journal it ahead of any fill.
+    """
+    # basic instrument existence check
+    inst = find_instrument(payload["symbol"])
+    if not inst:
+        raise EngineError(404, "Instrument not found")
+
+    price = payload.get("price")
+    symbol = payload["symbol"].upper()
+    # MARKET orders fill at the LTP, so they are checked (and reserved) at
+    # it even when the request carries a price
+    if payload["order_style"] == "MARKET" or price is None:
+        risk_price = inst["last_traded_price"]
+    else:
+        risk_price = float(price)
+    breached = risk.check(user_id, symbol, payload["order_type"], payload["quantity"], risk_price)
+    if breached is not None:
+        raise EngineError(400, f"Risk limit exceeded: {breached}")
+
+    order: Dict = {
+        "order_id": str(uuid4()),
+        "symbol": symbol,
+        "order_type": payload["order_type"],
+        "order_style": payload["order_style"],
+        "quantity": payload["quantity"],
+        "price": float(price) if price is not None else None,
+        "state": "PLACED",
+        "created_at": now_ns(),
+        "executed_at": None,
+        "user_id": user_id
+    }
+    get_store().orders.add(order)
+    risk.on_place(order, risk_price)
+    journal.record(journal.ORDER, order)
+    return order
+
+
+async def place_order(user_id: str, payload: dict, idempotency_key: Optional[str] = None) -> dict:
+    """
+    Place one order. With an idempotency key, a repeat of the same request
+    returns the first placement's order instead of placing again.
+    """
+    if idempotency_key is None:
+        return await _place_order(user_id, payload)
+    fingerprint = tuple(sorted(payload.items()))
+    try:
+        return await idempotency.run(user_id, idempotency_key, fingerprint, lambda: _place_order(user_id, payload))
+    except IdempotencyConflict:
+        raise EngineError(422, "Idempotency-Key was already used for a different order")
+
+
+async def _place_order(user_id: str, payload: dict) -> dict:
+    order = _new_order(user_id, payload)
+
+    # Try executing immediately (MARKET or hitting LIMIT)
+    try:
+        await execute_if_possible(order)
+    except ValueError as e:
+        raise EngineError(400, str(e))
+
+    # LIMIT orders that did not cross rest in the book until the LTP reaches them
+    if order["state"] == "PLACED" and order["order_style"] == "LIMIT":
+        rest_order(order)
+        publish_order_update(order)
+
+    # Group commit: wait for the journal fsync shared with concurrent orders
+    await journal.commit()
+    return order
+
+
+async def _owned_order(user_id: str, order_id: str) -> dict:
+    store = get_store()
+    order = await store.orders.lookup(order_id)
+    if not order:
+        raise EngineError(404, "Order not found")
+    if order.get("user_id") != user_id:
+        raise EngineError(403, "Forbidden")
+    return order
+
+
+async def _cancel(user_id: str, order_id: str) -> dict:
+    order = await _owned_order(user_id, order_id)
+    if order.get("state") in ("EXECUTED", "CANCELLED"):
+        raise EngineError(400, "Cannot cancel executed or already cancelled order")
+
+    apply_cancel(order)
+    remove_resting(order)
+    journal.record(journal.CANCEL, {"order_id": order_id})
+    return order
+
+
+async def cancel_order(user_id: str, order_id: str) -> dict:
+    order = await _cancel(user_id, order_id)
+    publish_order_update(order)
+    await journal.commit()
+    return order
+
+
+def _failure(index: int, error: EngineError) -> dict:
+    return {"index": index, "ok": False, "status_code": error.status_code, "detail": error.detail}
+
+
+async def place_orders(user_id: str, payloads: List[dict]) -> List[dict]:
+    """
+    Place a basket in one engine pass. Orders are grouped by symbol and
+    matched while holding every involved symbol lock and the user's lock
+    once; updates go out as one coalesced message. Returns one result per
+    payload, in order; a rejected order does not affect the others.
+    """
+    results: List[dict] = []
+    by_symbol: Dict[str, List[dict]] = {}
+    for index, payload in enumerate(payloads):
+        try:
+            order = _new_order(user_id, payload)
+        except EngineError as e:
+            results.append(_failure(index, e))
+            continue
+        by_symbol.setdefault(order["symbol"], []).append(order)
+        results.append({"index": index, "ok": True, "order": order})
+
+    trades = []
+    async with order_locks(by_symbol, [user_id]):
+        for symbol, orders in by_symbol.items():
+            ltp = find_instrument(symbol)["last_traded_price"]
+            for order in orders:
+                executed_price = fill_price(order, ltp)
+                if executed_price is not None:
+                    trades.append(fill(order, executed_price))
+                elif order["order_style"] == "LIMIT":
+                    rest_order(order)
+
+    placed = [r["order"] for r in results if r["ok"]]
+    publish_batch(user_id, placed, trades)
+    valuation.flush(user_id)
+    await journal.commit()
+    return results
+
+
+async def cancel_orders(user_id: str, order_ids: List[str]) -> List[dict]:
+    """
+    Cancel several orders; returns one result per id, in order.
+    """
+    results: List[dict] = []
+    for index, order_id in enumerate(order_ids):
+        try:
+            results.append({"index": index, "ok": True, "order": await _cancel(user_id, order_id)})
+        except EngineError as e:
+            results.append(_failure(index, e))
+
+    publish_batch(user_id, [r["order"] for r in results if r["ok"]], [])
+    await journal.commit()
+    return results
+
+
+async def get_order(user_id: str, order_id: str) -> dict:
+    return await _owned_order(user_id, order_id)
+
+
+async def list_trades(
+    user_id: str,
+    symbol: Optional[str] = None,
+    after: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = 100,
+    since_version: Optional[str] = None,
+) -> dict:
+    """
+    A page of trades plus the version it reflects. With a current
+    `since_version`, only trades executed after that version are returned.
+    """
+    after_seq = versions.parse_token(since_version)
+    # Taken before the read, which may yield: the page then holds at least
+    # every trade up to this version
+    token = versions.make_token(versions.trades_version(user_id))
+    store = get_store()
+    try:
+        trades = await store.read(
+            store.trades.page,
+            user_id=user_id, symbol=symbol, after=after, since=since, until=until, limit=limit, after_seq=after_seq,
+        )
+    except KeyError:
+        raise EngineError(400, "Unknown trade cursor")
+    return {"version": token, "delta": after_seq is not None, "trades": trades}
+
+
+async def trades_version(user_id: str) -> str:
+    return versions.make_token(versions.trades_version(user_id))
+
+
+async def get_portfolio(user_id: str, since_version: Optional[str] = None) -> dict:
+    # Valued incrementally on fills and LTP changes; see portfolio_valuation.py
+    since = versions.parse_token(since_version)
+    portfolio = valuation.portfolio(user_id, since=since)
+    portfolio["version"] = versions.make_token(valuation.version(user_id))
+    portfolio["delta"] = since is not None
+    return portfolio
+
+
+async def portfolio_version(user_id: str) -> str:
+    return versions.make_token(valuation.version(user_id))
+
+
+async def list_instruments(
+    exchange: Optional[str] = None,
+    instrument_type: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> List[dict]:
+    return get_store().instruments.list(
+        exchange=exchange, instrument_type=instrument_type, offset=offset, limit=limit
+    )
+
+
+async def instruments_version() -> Dict[str, str]:
+    """
+    Tokens for the whole master ("version": any change, LTPs included)
+    and for its static fields only ("master").
+    """
+    instruments = get_store().instruments
+    return {
+        "version": versions.make_token(instruments.version),
+        "master": versions.make_token(instruments.master_version),
+    }
+
+
+async def last_traded_prices(symbols: List[str]) -> List[Optional[float]]:
+    """
+    Current LTPs of `symbols`, in order; None for an unknown symbol.
+    """
+    instruments = get_store().instruments
+    return [inst["last_traded_price"] if (inst := instruments.get(s)) else None for s in symbols]
+
+
+async def get_instrument(symbol: str) -> dict:
+    inst = find_instrument(symbol)
+    if not inst:
+        raise EngineError(404, "Instrument not found")
+    return inst
+
+
+async def get_candles(symbol: str, interval: str = "1m", limit: int = 100) -> dict:
+    inst = find_instrument(symbol)
+    if not inst:
+        raise EngineError(404, "Instrument not found")
+    return candles.candles(inst["symbol"], interval, limit)
+
+
+async def metrics_exposition() -> Dict[str, str]:
+    return metrics.exposition()
+
+
+OPS = {
+    "place_order": place_order,
+    "cancel_order": cancel_order,
+    "place_orders": place_orders,
+    "cancel_orders": cancel_orders,
+    "get_order": get_order,
+    "list_trades": list_trades,
+    "trades_version": trades_version,
+    "get_portfolio": get_portfolio,
+    "portfolio_version": portfolio_version,
+    "list_instruments": list_instruments,
+    "instruments_version": instruments_version,
+    "last_traded_prices": last_traded_prices,
+    "get_instrument": get_instrument,
+    "get_candles": get_candles,
+    "metrics": metrics_exposition,
+}
+
+# Ops that queue for order locks and the journal; these count against ENGINE_MAX_IN_FLIGHT
+WRITE_OPS = frozenset(("place_order", "cancel_order", "place_orders", "cancel_orders"))
+
+_in_flight = 0
+
+
+async def run_op(op: str, kwargs: dict):
+    """
+    Run an op in this process. Once ENGINE_MAX_IN_FLIGHT writes are already
+    in the engine, further writes fail fast with a 503 instead of queueing.
+    """
+    global _in_flight
+    if op not in WRITE_OPS:
+        return await OPS[op](**kwargs)
+    if _in_flight >= ENGINE_MAX_IN_FLIGHT:
+        ENGINE_SHED.inc()
+        raise EngineError(503, "Engine overloaded", retry_after=ENGINE_RETRY_AFTER_SECONDS)
+    _in_flight += 1
+    ENGINE_IN_FLIGHT.set(_in_flight)
+    try:
+        return await OPS[op](**kwargs)
+    finally:
+        _in_flight -= 1
+        ENGINE_IN_FLIGHT.set(_in_flight)
+
+
+# Set by the lifespan in ENGINE_MODE=client; ops are then forwarded over IPC
+REMOTE = None
+
+
+async def dispatch(op: str, **kwargs):
+    if REMOTE is not None:
+        return await REMOTE.call(op, kwargs)
+    return await run_op(op, kwargs)
@@ -1,99 +1,173 @@
 # app/services/execution_engine.py
 
-import asyncio
-from app.services.broadcaster import broadcaster
-from app.store.memory import INSTRUMENTS, TRADES, PORTFOLIO
-from datetime import datetime
+from app.services.broadcaster import broadcaster, trades_topic, user_topic
+from app.services.candles import candles
+from app.services.locks import order_locks
+from app.services import versions
+from app.services.portfolio_valuation import valuation
+from app.services.risk import risk
+from app.store import journal
+from app.store.records import format_order, format_trade, now_ns
+from app.store.repository import get_store
 from uuid import uuid4
-from typing import Optional
-
-# Global lock to prevent race conditions during order execution
-ENGINE_LOCK = asyncio.Lock()
+from typing import List, Optional
 
 def find_instrument(symbol: str) -> Optional[dict]:
-    symbol_upper = symbol.upper()
-    for inst in INSTRUMENTS:
-        if inst["symbol"].upper() == symbol_upper:
-            return inst
-    return None
+    return get_store().instruments.get(symbol)
 
-async def execute_if_possible(order: dict) -> Optional[dict]:
+def publish_order_update(order: dict):
     """
-    Async execution engine.
-    Uses a Lock to ensure thread-safety when updating Portfolio and Trades.
+    Push an order's current state to its owner's private topic.
     """
-    inst = find_instrument(order["symbol"])
-    if not inst:
-        raise ValueError("Instrument not found")
+    if broadcaster.muted:
+        return
+    broadcaster.publish(user_topic(order["user_id"]), {"type": "order", "order": format_order(order)})
+
+def public_trade(trade: dict) -> dict:
+    # The public tape omits who traded
+    return {k: v for k, v in trade.items() if k not in ("user_id", "order_id")}
+
+def publish_trade(trade: dict):
+    if broadcaster.muted:
+        return
+    trade = format_trade(trade)
+    # Owner gets the full record
+    broadcaster.publish(user_topic(trade["user_id"]), {"type": "trade", "trade": trade})
+    broadcaster.publish(trades_topic(trade["symbol"]), {"type": "trade", "trade": public_trade(trade)})
+
+def publish_batch(user_id: str, orders: List[dict], trades: List[dict]):
+    """
+    Coalesced updates for a basket: one message with every order state and
+    trade for the owner, and one message per symbol on the public tape.
+    """
+    if broadcaster.muted or (not orders and not trades):
+        return
+    orders = [format_order(order) for order in orders]
+    trades = [format_trade(trade) for trade in trades]
+    broadcaster.publish(user_topic(user_id), {"type": "batch", "orders": orders, "trades": trades})
+    tape = {}
+    for trade in trades:
+        tape.setdefault(trade["symbol"], []).append(public_trade(trade))
+    for symbol, public in tape.items():
+        broadcaster.publish(trades_topic(symbol), {"type": "trades", "trades": public})
+
+def apply_fill(order: dict, trade: dict):
+    """
+    Apply a fill to the store: mark the order executed, record the trade and
+    update the user's holding, persisted as one unit. Callers must hold
+    the order's symbol/user locks; journal replay uses it to rebuild state.
+    """
+    store = get_store()
+    with store.transaction():
+        # Mark order executed
+        order["state"] = "EXECUTED"
+        order["executed_at"] = trade["timestamp"]
+        store.orders.update(order)
 
-    ltp = inst["last_traded_price"]
-    executed_price = None
+        # Update trade history and the user's trades version
+        user_id = trade["user_id"]
+        versions.bump_trades(user_id, store.trades.append(trade))
 
+        # Update portfolio
+        executed_price = trade["price"]
+        holding = store.portfolio.get(user_id, order["symbol"]) or {"quantity": 0, "avg_price": 0.0, "realized_pnl": 0.0}
+
+        # Positions are signed (negative = short). A fill that opens or grows a
+        # position moves avg_price; one that reduces it realizes P&L against
+        # avg_price, and any excess opens the other side at the fill price.
+        quantity = order["quantity"]
+        signed = quantity if order["order_type"] == "BUY" else -quantity
+        prev_qty = holding.get("quantity", 0)
+        prev_avg = holding.get("avg_price", 0.0)
+        new_qty = prev_qty + signed
+        realized = 0.0
+        if prev_qty == 0 or (prev_qty > 0) == (signed > 0):
+            new_avg = (abs(prev_qty) * prev_avg + quantity * executed_price) / abs(new_qty)
+        else:
+            closed = min(quantity, abs(prev_qty))
+            realized = closed * (executed_price - prev_avg) * (1 if prev_qty > 0 else -1)
+            if new_qty == 0:
+                new_avg = 0.0
+            elif (new_qty > 0) == (prev_qty > 0):
+                new_avg = prev_avg
+            else:
+                new_avg = executed_price
+        holding["quantity"] = new_qty
+        holding["avg_price"] = new_avg
+        holding["realized_pnl"] = holding.get("realized_pnl", 0.0) + realized
+
+        store.portfolio.put(user_id, order["symbol"], holding)
+    valuation.on_fill(user_id, order["symbol"], holding)
+    risk.on_fill(order, trade, realized)
+
+def apply_cancel(order: dict):
+    order["state"] = "CANCELLED"
+    order["executed_at"] = None
+    get_store().orders.update(order)
+    risk.on_cancel(order)
+
+def fill_price(order: dict, ltp: float) -> Optional[float]:
+    """
+    The price an order executes at given the LTP, or None if it does not cross.
+    """
     # MARKET -> execute immediately at LTP
     if order["order_style"] == "MARKET":
-        executed_price = ltp
+        return ltp
 
     # LIMIT -> execute only if price condition met
-    elif order["order_style"] == "LIMIT":
-        if order["order_type"] == "BUY" and order["price"] >= ltp:
-            executed_price = order["price"]
-        if order["order_type"] == "SELL" and order["price"] <= ltp:
-            executed_price = order["price"]
+    if order["order_type"] == "BUY" and order["price"] >= ltp:
+        return order["price"]
+    if order["order_type"] == "SELL" and order["price"] <= ltp:
+        return order["price"]
+    return None
 
+def fill(order: dict, executed_price: float) -> dict:
+    """
+    Create, apply and journal the trade for a PLACED order.
+    Callers must hold the order's symbol and user locks.
+    """
+    trade = {
+        "trade_id": str(uuid4()),
+        "order_id": order["order_id"],
+        "symbol": order["symbol"],
+        "quantity": order["quantity"],
+        "price": float(executed_price),
+        "side": order["order_type"],
+        "timestamp": now_ns(),
+        "user_id": order.get("user_id", "demo-user")
+    }
+    apply_fill(order, trade)
+    journal.record(journal.TRADE, trade)
+    candles.on_trade(trade["symbol"], trade["price"], trade["quantity"], trade["timestamp"])
+    return trade
+
+async def execute_if_possible(order: dict) -> Optional[dict]:
+    """
+    Async execution engine.
+    Holds the order's symbol lock (order/trade state) and user lock
+    (PORTFOLIO), so fills for unrelated symbols and users do not queue
+    behind each other. See app/services/locks.py for the lock ordering.
+    """
+    inst = find_instrument(order["symbol"])
+    if not inst:
+        raise ValueError("Instrument not found")
+
+    executed_price = fill_price(order, inst["last_traded_price"])
     if executed_price is None:
         return None
 
-    # CRITICAL SECTION: Lock the state before modifying global dictionaries
-    async with ENGINE_LOCK:
+    user_id = order.get("user_id", "demo-user")
+
+    # CRITICAL SECTION: symbol lock, then user lock
+    async with order_locks([order["symbol"]], [user_id]):
         # Double-check state in case it changed while waiting for lock
-        if order["state"] == "EXECUTED":
+        if order["state"] != "PLACED":
             return None
+        trade = fill(order, executed_price)
 
-        # Mark order executed
-        order["state"] = "EXECUTED"
-        order["executed_at"] = datetime.utcnow().isoformat()
-        
-        user_id = order.get("user_id", "demo-user")
-
-        # Create trade record
-        trade = {
-            "trade_id": str(uuid4()),
-            "order_id": order["order_id"],
-            "symbol": order["symbol"],
-            "quantity": order["quantity"],
-            "price": float(executed_price),
-            "side": order["order_type"],
-            "timestamp": datetime.utcnow().isoformat(),
-            "user_id": user_id
-        }
-        TRADES.append(trade)
-
-        # Update portfolio
-        user_portfolio = PORTFOLIO.setdefault(user_id, {})
-        holding = user_portfolio.get(order["symbol"], {"quantity": 0, "avg_price": 0.0})
-
-        if order["order_type"] == "BUY":
-            prev_qty = holding["quantity"]
-            prev_avg = holding["avg_price"]
-            new_qty = prev_qty + order["quantity"]
-            
-            if new_qty == 0:
-                new_avg = 0.0
-            else:
-                total_cost = (prev_qty * prev_avg) + (order["quantity"] * executed_price)
-                new_avg = total_cost / new_qty
-            
-            holding["quantity"] = new_qty
-            holding["avg_price"] = new_avg
-        
-        else:  # SELL
-            holding["quantity"] = holding.get("quantity", 0) - order["quantity"]
-            # avg_price remains unchanged on sell
-
-        user_portfolio[order["symbol"]] = holding
-        PORTFOLIO[user_id] = user_portfolio
-
-    # Broadcast trade update (Safe to do outside lock, but needs await)
-    await broadcaster.broadcast({"type": "trade", "trade": trade})
+    # Queue updates for WebSocket subscribers (no network I/O on this path)
+    publish_order_update(order)
+    publish_trade(trade)
+    valuation.flush(user_id)
 
     return trade
\ No newline at end of file
@@ -0,0 +1,112 @@
+# app/services/idempotency.py
+"""
+Idempotency keys for order placement.
+
+A client that retries `POST /orders` with the same `Idempotency-Key` gets
+the first placement's response back instead of a second order. Results
+are cached per (user_id, key) in a bounded LRU with a TTL:
+
+- at most IDEMPOTENCY_MAX_KEYS entries (default 100,000); the least
+  recently used one is dropped to make room, so memory stays fixed
+- entries expire IDEMPOTENCY_TTL_SECONDS (default 86400) after the
+  placement; a retry after that is placed again
+
+A duplicate that arrives while the first request is still in the engine
+waits for it and gets the same result (or the same error) instead of
+placing again. Failed placements are not cached, so they can be retried.
+Reusing a key with a different payload is a conflict.
+
+The cache lives in the engine process (ops run there), so duplicates
+coalesce across API workers. It is not journaled: after a restart a
+retried key is placed again.
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, Tuple
+from app.core import metrics
+from app.store.records import OrderRecord
+
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "100000"))
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+
+IDEMPOTENT_REPLAYS = metrics.counter(
+    "idempotent_replays_total", "Placements answered from the idempotency cache", ("source",)
+)
+
+
+class IdempotencyConflict(Exception):
+    """
+    The key was already used for a different request.
+    """
+
+
+class IdempotencyCache:
+    def __init__(self, max_entries: int = IDEMPOTENCY_MAX_KEYS, ttl: float = IDEMPOTENCY_TTL_SECONDS, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        # (user_id, key) -> (expires_at, fingerprint, compact order), least recently used first
+        self._entries: "OrderedDict[Tuple[str, str], tuple]" = OrderedDict()
+        # (user_id, key) -> (fingerprint, future) of a placement still running
+        self._in_flight: Dict[Tuple[str, str], Tuple[Hashable, asyncio.Future]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def run(self, user_id: str, key: str, fingerprint: Hashable, place: Callable[[], Awaitable[dict]]) -> dict:
+        """
+        Return the cached order for (user_id, key), join a placement in
+        flight, or call `place()` and cache its order.
+        """
+        cache_key = (user_id, key)
+        entry = self._entries.get(cache_key)
+        if entry is not None:
+            expires_at, seen, record = entry
+            if expires_at > self.clock():
+                if seen != fingerprint:
+                    raise IdempotencyConflict(key)
+                self._entries.move_to_end(cache_key)
+                IDEMPOTENT_REPLAYS.labels("cache").inc()
+                return record.to_dict()
+            del self._entries[cache_key]
+
+        pending = self._in_flight.get(cache_key)
+        if pending is not None:
+            seen, future = pending
+            if seen != fingerprint:
+                raise IdempotencyConflict(key)
+            IDEMPOTENT_REPLAYS.labels("in_flight").inc()
+            order = await asyncio.shield(future)
+            return dict(order)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[cache_key] = (fingerprint, future)
+        try:
+            order = await place()
+        except BaseException as e:
+            if isinstance(e, Exception):
+                future.set_exception(e)
+                future.exception()  # Retrieved here, so no waiters is not an error
+            else:
+                future.cancel()
+            raise
+        else:
+            future.set_result(dict(order))
+            self._put(cache_key, fingerprint, order)
+        finally:
+            del self._in_flight[cache_key]
+        return order
+
+    def clear(self):
+        self._entries.clear()
+
+    def _put(self, cache_key: Tuple[str, str], fingerprint: Hashable, order: dict):
+        self._entries[cache_key] = (self.clock() + self.ttl, fingerprint, OrderRecord.from_dict(order))
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+idempotency = IdempotencyCache()
@@ -1,25 +1,100 @@
 # app/services/limit_matcher.py
 import asyncio
-from app.store.memory import ORDERS
-from app.services.execution_engine import execute_if_possible
+import logging
+import time
+from typing import Optional, Set
+from app.core import metrics
+from app.services.execution_engine import execute_if_possible, find_instrument
+from app.services.order_book import BOOKS, get_book
+from app.store.repository import get_store
+
+logger = logging.getLogger(__name__)
+
+# Symbols whose LTP moved since the matcher last ran
+_dirty_symbols: Set[str] = set()
+# Created inside matcher_loop so it binds to the running event loop
+_wakeup: Optional[asyncio.Event] = None
+
+SWEEP_DURATION = metrics.histogram("matcher_sweep_duration_seconds", "Duration of one matcher pass over dirty symbols").labels()
+SWEEP_SCANNED = metrics.histogram("matcher_orders_scanned", "Resting orders popped per matcher pass", scale=1).labels()
+
+
+def rest_order(order: dict):
+    """
+    Park a PLACED LIMIT order in its symbol's book until the price crosses it.
+    """
+    get_book(order["symbol"]).add(order)
+
+
+def remove_resting(order: dict):
+    book = BOOKS.get(order["symbol"].upper())
+    if book is not None:
+        book.remove(order["order_id"])
+
+
+def restore_books() -> int:
+    """
+    Rest every open LIMIT order from the store (e.g. after a restart).
+    """
+    orders = get_store().orders.open_limit_orders()
+    for order in orders:
+        rest_order(order)
+    return len(orders)
+
+
+def notify_price_change(symbol: str):
+    _dirty_symbols.add(symbol.upper())
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+async def match_symbol(symbol: str) -> int:
+    """
+    Execute the resting orders crossed by the symbol's current LTP.
+    Returns the number of orders popped from the book.
+    """
+    book = BOOKS.get(symbol.upper())
+    inst = find_instrument(symbol)
+    if not book or not inst:
+        return 0
+
+    crossed = book.pop_crossing(inst["last_traded_price"])
+    for order in crossed:
+        if order["state"] != "PLACED":
+            continue
+        trade = await execute_if_possible(order)
+        # LTP moved back while we were executing: keep the order resting
+        if trade is None and order["state"] == "PLACED":
+            book.add(order)
+    return len(crossed)
+
+
+async def match_dirty() -> int:
+    """
+    One matcher pass over the symbols whose LTP moved since the last one.
+    Returns the number of orders popped from their books.
+    """
+    symbols = list(_dirty_symbols)
+    _dirty_symbols.clear()
+    start = time.perf_counter_ns()
+    scanned = 0
+    for symbol in symbols:
+        try:
+            scanned += await match_symbol(symbol)
+        except Exception:
+            logger.exception("Matcher failed for %s", symbol)
+    SWEEP_DURATION.record(time.perf_counter_ns() - start)
+    SWEEP_SCANNED.record(scanned)
+    return scanned
 
-RUN_INTERVAL_SECONDS = 2.0  # check every 2s
 
 async def matcher_loop():
-    print("[Background] Limit Order Matcher started...")
+    global _wakeup
+    logger.info("Limit order matcher started")
+    _wakeup = asyncio.Event()
+    if _dirty_symbols:
+        _wakeup.set()
     while True:
-        try:
-            # Create a copy of items to avoid "dictionary changed size during iteration" error
-            # This is a common bug in Python loops modifying dicts
-            current_orders = list(ORDERS.items())
-            
-            for order_id, order in current_orders:
-                if order["state"] == "PLACED" and order["order_style"] == "LIMIT":
-                    # attempt execution (may return a trade)
-                    # We now AWAIT the result
-                    await execute_if_possible(order)
-            
-            await asyncio.sleep(RUN_INTERVAL_SECONDS)
-        except Exception as e:
-            print(f"Matcher error: {e}")
-            await asyncio.sleep(RUN_INTERVAL_SECONDS)
\ No newline at end of file
+        await _wakeup.wait()
+        _wakeup.clear()
+        await match_dirty()
@@ -0,0 +1,310 @@
+# app/services/market_data.py
+"""
+Market data ingestion: ticks in, LTP updates and `ticks:<SYMBOL>` events out.
+
+A source is an async iterator of tick batches, each a list of
+(symbol, price) tuples:
+
+    random_walk(...)          synthetic random walk over the registry
+    replay_file(path)         .csv (symbol,price columns) or binary ticks
+    udp_feed(host, port)      datagrams of binary ticks
+    tcp_feed(host, port)      a stream of binary ticks from a feed server
+
+Binary ticks are fixed-size TICK_RECORD structs (16-byte NUL-padded symbol,
+float64 price), see `encode_ticks` / `decode_ticks`.
+
+The pipeline applies each batch at once: only the last price per symbol is
+written to the store, and each symbol whose LTP changed is marked dirty for
+the limit matcher. WebSocket ticks are conflated the same way and flushed
+every MARKET_DATA_CONFLATION_MS, so subscribers get at most one tick per
+symbol per interval. LTP changes also update the symbol's candles (see
+app/services/candles.py).
+"""
+import asyncio
+import csv
+import functools
+import logging
+import os
+import random
+import struct
+import time
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from app.services.broadcaster import broadcaster, ticks_topic
+from app.services.candles import candles
+from app.services.limit_matcher import notify_price_change
+from app.services.portfolio_valuation import valuation
+from app.store.records import now_ns, to_iso
+from app.store.repository import get_store
+
+logger = logging.getLogger(__name__)
+
+Tick = Tuple[str, float]
+
+# Feed to start with the engine; ingestion is off when unset. One of
+# "random", "random:<ticks per second>", "replay:<path>", "udp://host:port", "tcp://host:port"
+MARKET_DATA_SOURCE = os.getenv("MARKET_DATA_SOURCE")
+MARKET_DATA_CONFLATION_MS = float(os.getenv("MARKET_DATA_CONFLATION_MS", "100"))
+MARKET_DATA_BATCH_SIZE = int(os.getenv("MARKET_DATA_BATCH_SIZE", "1000"))
+
+TICK_RECORD = struct.Struct("<16sd")
+
+
+def encode_ticks(ticks: Iterable[Tick]) -> bytes:
+    return b"".join(TICK_RECORD.pack(symbol.encode(), price) for symbol, price in ticks)
+
+
+@functools.lru_cache(maxsize=65536)
+def _decode_symbol(raw: bytes) -> str:
+    return raw.rstrip(b"\0").decode()
+
+
+def decode_ticks(data: bytes) -> List[Tick]:
+    """
+    Decode whole TICK_RECORDs from `data`; a trailing partial record is ignored.
+    """
+    usable = len(data) - len(data) % TICK_RECORD.size
+    return [(_decode_symbol(raw), price) for raw, price in TICK_RECORD.iter_unpack(data[:usable])]
+
+
+async def random_walk(
+    symbols: Optional[List[str]] = None,
+    ticks_per_second: Optional[float] = None,
+    batch_size: int = MARKET_DATA_BATCH_SIZE,
+    volatility: float = 0.0005,
+    total: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> AsyncIterator[List[Tick]]:
+    """
+    Gaussian random walk starting from each instrument's current LTP.
+    Unpaced (as fast as the consumer takes batches) unless `ticks_per_second` is set.
+    """
+    instruments = get_store().instruments
+    if symbols is None:
+        symbols = [inst["symbol"] for inst in instruments.list()]
+    prices = {s: instruments.get(s)["last_traded_price"] for s in symbols}
+    names = list(prices)
+    rng = random.Random(seed)
+    produced = 0
+    started = time.monotonic()
+    while total is None or produced < total:
+        n = batch_size if total is None else min(batch_size, total - produced)
+        batch = []
+        for symbol in rng.choices(names, k=n):
+            price = max(round(prices[symbol] * (1.0 + rng.gauss(0.0, volatility)), 2), 0.01)
+            prices[symbol] = price
+            batch.append((symbol, price))
+        produced += n
+        yield batch
+        if ticks_per_second:
+            delay = started + produced / ticks_per_second - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+
+async def replay_file(path: str, batch_size: int = MARKET_DATA_BATCH_SIZE) -> AsyncIterator[List[Tick]]:
+    """
+    Replay a recorded tick file as fast as it is consumed. A .csv needs a
+    header with `symbol` and `price` columns (others are ignored); any other
+    extension is read as binary TICK_RECORDs.
+    """
+    file_path = Path(path)
+    if file_path.suffix.lower() == ".csv":
+        with file_path.open(newline="") as f:
+            reader = csv.reader(f)
+            header = [name.strip().lower() for name in next(reader)]
+            sym_col, price_col = header.index("symbol"), header.index("price")
+            batch = []
+            for row in reader:
+                batch.append((row[sym_col], float(row[price_col])))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        return
+
+    with file_path.open("rb") as f:
+        while True:
+            chunk = f.read(batch_size * TICK_RECORD.size)
+            if not chunk:
+                return
+            yield decode_ticks(chunk)
+
+
+class _DatagramQueue(asyncio.DatagramProtocol):
+    def __init__(self, queue: asyncio.Queue):
+        self.queue = queue
+        self.dropped = 0
+
+    def datagram_received(self, data: bytes, addr):
+        try:
+            self.queue.put_nowait(decode_ticks(data))
+        except asyncio.QueueFull:
+            # UDP feed semantics: a consumer that falls behind loses datagrams
+            self.dropped += 1
+
+
+async def udp_feed(host: str, port: int, max_pending: int = 1024) -> AsyncIterator[List[Tick]]:
+    """
+    Listen on host:port for datagrams of binary ticks.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(lambda: _DatagramQueue(queue), local_addr=(host, port))
+    try:
+        while True:
+            batch = await queue.get()
+            # Fold everything that arrived meanwhile into one batch
+            while not queue.empty():
+                batch.extend(queue.get_nowait())
+            yield batch
+    finally:
+        transport.close()
+
+
+async def tcp_feed(host: str, port: int, read_size: int = 64 * 1024) -> AsyncIterator[List[Tick]]:
+    """
+    Connect to a feed server at host:port streaming binary ticks; ends when it disconnects.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    buffer = b""
+    try:
+        while True:
+            chunk = await reader.read(read_size)
+            if not chunk:
+                return
+            buffer += chunk
+            usable = len(buffer) - len(buffer) % TICK_RECORD.size
+            if usable:
+                yield decode_ticks(buffer[:usable])
+                buffer = buffer[usable:]
+    finally:
+        writer.close()
+
+
+def source_from_spec(spec: str) -> AsyncIterator[List[Tick]]:
+    """
+    Build a source from a MARKET_DATA_SOURCE value.
+    """
+    if spec == "random":
+        return random_walk()
+    if spec.startswith("random:"):
+        return random_walk(ticks_per_second=float(spec.split(":", 1)[1]))
+    if spec.startswith("replay:"):
+        return replay_file(spec.split(":", 1)[1])
+    for scheme, feed in (("udp://", udp_feed), ("tcp://", tcp_feed)):
+        if spec.startswith(scheme):
+            host, port = spec[len(scheme):].rsplit(":", 1)
+            return feed(host, int(port))
+    raise ValueError(f"Unknown MARKET_DATA_SOURCE: {spec}")
+
+
+class MarketDataPipeline:
+    """
+    Applies tick batches to the instrument store and conflates `ticks:` events.
+    """
+
+    def __init__(self, conflation_interval: float = MARKET_DATA_CONFLATION_MS / 1000):
+        self.conflation_interval = conflation_interval
+        # symbol -> latest price not yet sent to WebSocket subscribers
+        self._pending: Dict[str, float] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.ticks = 0
+        self.batches = 0
+        self.updates = 0
+        self.unknown = 0
+        self.published = 0
+
+    def apply(self, batch: List[Tick]) -> int:
+        """
+        Apply one batch of ticks. Returns the number of symbols whose LTP changed.
+        """
+        latest: Dict[str, float] = {}
+        for symbol, price in batch:
+            latest[symbol] = price
+        self.ticks += len(batch)
+        self.batches += 1
+
+        instruments = get_store().instruments
+        changed: Dict[str, float] = {}
+        for symbol, price in latest.items():
+            inst = instruments.get(symbol)
+            if inst is None:
+                self.unknown += 1
+            elif inst["last_traded_price"] != price:
+                changed[inst["symbol"]] = price
+        if not changed:
+            return 0
+
+        now = now_ns()
+        for inst in instruments.set_last_traded_prices(changed):
+            symbol, ltp = inst["symbol"], inst["last_traded_price"]
+            valuation.on_price(symbol, ltp)
+            candles.on_tick(symbol, ltp, now)
+            notify_price_change(symbol)
+            self._pending[symbol] = ltp
+        self.updates += len(changed)
+        return len(changed)
+
+    def flush(self) -> int:
+        """
+        Publish the latest pending tick per symbol. Returns the number sent.
+        """
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        timestamp = to_iso(now_ns())
+        for symbol, price in pending.items():
+            broadcaster.publish(ticks_topic(symbol), {
+                "type": "tick",
+                "symbol": symbol,
+                "price": price,
+                "timestamp": timestamp,
+            })
+        self.published += len(pending)
+        return len(pending)
+
+    async def run(self, source: AsyncIterator[List[Tick]]):
+        try:
+            async for batch in source:
+                self.apply(batch)
+                # Let the matcher and API requests in between batches
+                await asyncio.sleep(0)
+        except Exception:
+            logger.exception("Market data source failed")
+        self.flush()
+
+    async def start(self, source: AsyncIterator[List[Tick]]):
+        self._tasks = [
+            asyncio.create_task(self.run(source)),
+            asyncio.create_task(self._flush_loop()),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "ticks": self.ticks,
+            "batches": self.batches,
+            "updates": self.updates,
+            "unknown": self.unknown,
+            "published": self.published,
+        }
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.conflation_interval)
+            self.flush()
+
+
+pipeline = MarketDataPipeline()
@@ -0,0 +1,85 @@
+# app/services/order_book.py
+import heapq
+import itertools
+from typing import Dict, List, Optional, Tuple
+
+# Tie-breaker so orders resting at the same price keep time priority
+_ARRIVAL = itertools.count()
+
+# Rebuild the heaps once stale (cancelled) entries outnumber live ones
+_COMPACT_MIN_STALE = 64
+
+
+class OrderBook:
+    """
+    Resting LIMIT orders for a single symbol, indexed by price.
+
+    Bids sit in a max-heap and asks in a min-heap, so a new last traded
+    price only touches the levels it actually crosses. Cancelled orders
+    are dropped from `live` immediately; their heap entries are skipped
+    when they surface and purged in bulk by `_compact`.
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids: List[Tuple[float, int, str]] = []  # (-price, arrival, order_id)
+        self.asks: List[Tuple[float, int, str]] = []  # (price, arrival, order_id)
+        self.live: Dict[str, dict] = {}
+
+    def __len__(self) -> int:
+        return len(self.live)
+
+    def add(self, order: dict):
+        order_id = order["order_id"]
+        if order_id in self.live:
+            return
+        if order["order_type"] == "BUY":
+            heapq.heappush(self.bids, (-order["price"], next(_ARRIVAL), order_id))
+        else:
+            heapq.heappush(self.asks, (order["price"], next(_ARRIVAL), order_id))
+        self.live[order_id] = order
+
+    def remove(self, order_id: str) -> Optional[dict]:
+        order = self.live.pop(order_id, None)
+        if order is not None:
+            self._compact()
+        return order
+
+    def pop_crossing(self, ltp: float) -> List[dict]:
+        """
+        Remove and return every order crossed by `ltp`, best price first.
+        BUY LIMIT crosses when price >= LTP, SELL LIMIT when price <= LTP.
+        """
+        crossed = []
+        while self.bids and -self.bids[0][0] >= ltp:
+            _, _, order_id = heapq.heappop(self.bids)
+            order = self.live.pop(order_id, None)
+            if order is not None:
+                crossed.append(order)
+        while self.asks and self.asks[0][0] <= ltp:
+            _, _, order_id = heapq.heappop(self.asks)
+            order = self.live.pop(order_id, None)
+            if order is not None:
+                crossed.append(order)
+        return crossed
+
+    def _compact(self):
+        stale = len(self.bids) + len(self.asks) - len(self.live)
+        if stale < _COMPACT_MIN_STALE or stale < len(self.live):
+            return
+        self.bids = [e for e in self.bids if e[2] in self.live]
+        self.asks = [e for e in self.asks if e[2] in self.live]
+        heapq.heapify(self.bids)
+        heapq.heapify(self.asks)
+
+
+# One book per (upper-cased) symbol, created on first use
+BOOKS: Dict[str, OrderBook] = {}
+
+
+def get_book(symbol: str) -> OrderBook:
+    symbol_upper = symbol.upper()
+    book = BOOKS.get(symbol_upper)
+    if book is None:
+        book = BOOKS[symbol_upper] = OrderBook(symbol_upper)
+    return book
@@ -0,0 +1,165 @@
+# app/services/persistence.py
+import asyncio
+import logging
+import os
+from itertools import islice
+from pathlib import Path
+from typing import Optional, Tuple
+from app.services.execution_engine import apply_cancel, apply_fill
+from app.services.limit_matcher import remove_resting, rest_order
+from app.services.portfolio_valuation import valuation
+from app.services.risk import risk
+from app.store import journal, memory
+from app.store.repository import get_store
+
+logger = logging.getLogger(__name__)
+
+# Directory for journal segments and snapshots; persistence is off when unset
+JOURNAL_DIR = os.getenv("JOURNAL_DIR")
+SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("SNAPSHOT_INTERVAL_SECONDS", "300"))
+JOURNAL_FLUSH_INTERVAL_MS = float(os.getenv("JOURNAL_FLUSH_INTERVAL_MS", "2"))
+
+_tasks = []
+
+
+def capture_state() -> Tuple[dict, dict]:
+    """
+    (header, tables) for journal.write_snapshot. Runs on the loop and only
+    copies what the engine mutates in place: the open orders and the
+    holdings. The trade log is append-only, so its records are read up to
+    the current length later, from the snapshot thread.
+    """
+    header = {
+        "orders": [dict(order) for order in memory.ORDERS.values()],
+        "portfolio": {user: {s: dict(h) for s, h in holdings.items()} for user, holdings in memory.PORTFOLIO.items()},
+    }
+    tables = {
+        "archive": memory.ARCHIVED_ORDERS.records(),
+        "trades": islice(memory.TRADES.records(), len(memory.TRADES)),
+    }
+    return header, tables
+
+
+def restore_state(state: dict):
+    memory.ORDERS.clear()
+    memory.ARCHIVED_ORDERS.clear()
+    memory.TRADES.clear()
+    memory.PORTFOLIO.clear()
+    valuation.clear()
+    risk.clear()
+    orders = get_store().orders
+    for order in state["orders"]:
+        orders.add(order)
+        if order["state"] == "PLACED" and order["order_style"] == "LIMIT":
+            rest_order(order)
+    memory.ARCHIVED_ORDERS.restore(state.get("archive", ()))
+    for record in state.get("trades", ()):
+        memory.TRADES.append_record(record)
+    memory.PORTFOLIO.update(state["portfolio"])
+
+
+def apply_event(kind: int, body: dict):
+    """
+    Re-apply one journal event to the in-memory store.
+    """
+    if kind == journal.ORDER:
+        get_store().orders.add(body)
+        if body["state"] == "PLACED" and body["order_style"] == "LIMIT":
+            rest_order(body)
+    elif kind == journal.TRADE:
+        order = memory.ORDERS[body["order_id"]]
+        remove_resting(order)
+        apply_fill(order, body)
+    elif kind == journal.CANCEL:
+        order = memory.ORDERS[body["order_id"]]
+        remove_resting(order)
+        apply_cancel(order)
+
+
+def replay(directory: str) -> int:
+    """
+    Rebuild the store from the latest snapshot plus the journal tail.
+    Returns the seq of the last event applied.
+    """
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    seq, state = journal.load_snapshot(path)
+    if state is not None:
+        restore_state(state)
+    for seq, kind, body in journal.read_records(path, after_seq=seq):
+        apply_event(kind, body)
+    return seq
+
+
+def cancel_unfilled_market_orders() -> int:
+    """
+    A MARKET order fills as it is placed, so one still PLACED after replay
+    lost its TRADE record to a crash right after its ORDER record; it would
+    never rest or fill. Cancel (and journal) each. Returns the count.
+    """
+    orphans = [o for o in memory.ORDERS.values() if o["order_style"] == "MARKET"]
+    for order in orphans:
+        apply_cancel(order)
+        journal.record(journal.CANCEL, {"order_id": order["order_id"]})
+    return len(orphans)
+
+
+async def snapshot() -> int:
+    """
+    Write a snapshot of the current store and drop journal segments it covers.
+    """
+    writer = journal.JOURNAL
+    # Capture state and its seq together, with no await in between, so the
+    # snapshot is exactly the state after event `seq`; encoding and the
+    # write happen in a thread
+    seq = writer.last_seq
+    header, tables = capture_state()
+    await writer.rotate()
+    await asyncio.to_thread(journal.write_snapshot, writer.directory, seq, header, tables)
+    writer.drop_segments_through(seq)
+    return seq
+
+
+async def _snapshot_loop(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            seq = await snapshot()
+            logger.info(f"Snapshot written at journal seq {seq}")
+        except Exception:
+            logger.exception("Snapshot failed")
+
+
+async def start(directory: Optional[str] = JOURNAL_DIR):
+    """
+    Make the store durable. A database backend commits its own writes; the
+    memory backend replays persisted state and starts journaling when
+    JOURNAL_DIR is set.
+    """
+    if get_store().backend != "memory":
+        return
+    if not directory:
+        return
+    seq = replay(directory)
+    logger.info(f"Replayed store from {directory} up to journal seq {seq}")
+    journal.JOURNAL = journal.JournalWriter(directory, JOURNAL_FLUSH_INTERVAL_MS / 1000.0, after_seq=seq)
+    orphans = cancel_unfilled_market_orders()
+    if orphans:
+        logger.warning(f"Cancelled {orphans} MARKET orders whose fill was not journaled")
+    _tasks.append(asyncio.create_task(journal.JOURNAL.run()))
+    _tasks.append(asyncio.create_task(_snapshot_loop(SNAPSHOT_INTERVAL_SECONDS)))
+
+
+async def stop():
+    for task in _tasks:
+        task.cancel()
+    for task in _tasks:
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    _tasks.clear()
+    if journal.JOURNAL is not None:
+        journal.JOURNAL.close()
+        journal.JOURNAL = None
+    get_store().flush()
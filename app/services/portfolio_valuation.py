@@ -0,0 +1,187 @@
+# app/services/portfolio_valuation.py
+"""
+Precomputed portfolio valuation with running cost and P&L.
+
+Each loaded user's positions carry quantity, cost, LTP, current value and
+realized/unrealized P&L, plus per-user totals. Fills refresh one position
+(`on_fill`); LTP changes touch only the users holding that symbol, found
+through a symbol -> holders reverse index (`on_price`). Reads return the
+precomputed records.
+
+Every change stamps the position from one process-wide counter; a user's
+version (see versions.py) is their latest stamp, so `portfolio(since=...)`
+can return only the positions that changed after a given version.
+
+Users are loaded lazily from the store on their first read, so the cache
+only ever holds users who asked for their portfolio. Changed positions are
+pushed to the owner's `user:` topic as "portfolio" deltas: right away for
+fills, and every PORTFOLIO_PUSH_INTERVAL_MS for price moves.
+"""
+import asyncio
+import itertools
+import os
+from typing import Dict, Optional, Set
+from app.services.broadcaster import broadcaster, user_topic
+from app.store.repository import get_store
+
+PORTFOLIO_PUSH_INTERVAL_MS = float(os.getenv("PORTFOLIO_PUSH_INTERVAL_MS", "250"))
+
+TOTAL_FIELDS = ("cost", "current_value", "unrealized_pnl", "realized_pnl")
+
+_stamps = itertools.count(1)
+
+
+class PortfolioValuation:
+    def __init__(self, push_interval: float = PORTFOLIO_PUSH_INTERVAL_MS / 1000):
+        self.push_interval = push_interval
+        # user_id -> {"positions": {symbol: position}, "stamps": {symbol: stamp},
+        #             "totals": {...}, "version": latest stamp}
+        self._users: Dict[str, dict] = {}
+        # symbol -> loaded users with a non-zero quantity in it
+        self._holders: Dict[str, Set[str]] = {}
+        # user_id -> symbols changed since the last push
+        self._dirty: Dict[str, Set[str]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def portfolio(self, user_id: str, since: Optional[int] = None) -> dict:
+        """
+        The user's valued holdings and totals; with `since`, only the
+        holdings changed after that version.
+        """
+        entry = self._entry(user_id)
+        if since is None:
+            holdings = list(entry["positions"].values())
+        else:
+            stamps = entry["stamps"]
+            holdings = [pos for symbol, pos in entry["positions"].items() if stamps[symbol] > since]
+        return {"user_id": user_id, "holdings": holdings, "totals": dict(entry["totals"])}
+
+    def version(self, user_id: str) -> int:
+        return self._entry(user_id)["version"]
+
+    def on_fill(self, user_id: str, symbol: str, holding: dict):
+        """
+        Refresh one position after the store's holding changed.
+        """
+        entry = self._users.get(user_id)
+        if entry is None:
+            return  # Not loaded yet; the first read picks the holding up
+        self._set_position(user_id, entry, symbol, holding)
+        self._dirty.setdefault(user_id, set()).add(symbol)
+
+    def on_price(self, symbol: str, ltp: float):
+        """
+        Revalue `symbol` for the users holding it.
+        """
+        holders = self._holders.get(symbol)
+        if not holders:
+            return
+        for user_id in holders:
+            entry = self._users[user_id]
+            pos = entry["positions"][symbol]
+            value = pos["quantity"] * ltp
+            unrealized = value - pos["cost"]
+            totals = entry["totals"]
+            totals["current_value"] += value - pos["current_value"]
+            totals["unrealized_pnl"] += unrealized - pos["unrealized_pnl"]
+            pos["last_traded_price"] = ltp
+            pos["current_value"] = value
+            pos["unrealized_pnl"] = unrealized
+            entry["stamps"][symbol] = entry["version"] = next(_stamps)
+            self._dirty.setdefault(user_id, set()).add(symbol)
+
+    def flush(self, user_id: Optional[str] = None) -> int:
+        """
+        Push pending deltas (for one user, or everyone). Returns the number of users pushed.
+        """
+        if user_id is not None:
+            symbols = self._dirty.pop(user_id, None)
+            if not symbols:
+                return 0
+            self._push(user_id, symbols)
+            return 1
+        dirty, self._dirty = self._dirty, {}
+        for uid, symbols in dirty.items():
+            self._push(uid, symbols)
+        return len(dirty)
+
+    def clear(self):
+        self._users.clear()
+        self._holders.clear()
+        self._dirty.clear()
+
+    async def start(self):
+        self._task = asyncio.create_task(self._push_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.flush()
+
+    def _entry(self, user_id: str) -> dict:
+        entry = self._users.get(user_id)
+        if entry is None:
+            entry = self._load(user_id)
+        return entry
+
+    def _load(self, user_id: str) -> dict:
+        entry = {"positions": {}, "stamps": {}, "totals": dict.fromkeys(TOTAL_FIELDS, 0.0), "version": 0}
+        self._users[user_id] = entry
+        for symbol, holding in get_store().portfolio.holdings(user_id).items():
+            self._set_position(user_id, entry, symbol, holding)
+        return entry
+
+    def _set_position(self, user_id: str, entry: dict, symbol: str, holding: dict):
+        inst = get_store().instruments.get(symbol)
+        ltp = inst["last_traded_price"] if inst else 0.0
+        qty = int(holding.get("quantity", 0))
+        avg_price = float(holding.get("avg_price", 0.0))
+        cost = qty * avg_price
+        value = qty * ltp
+        pos = {
+            "symbol": symbol,
+            "quantity": qty,
+            "avg_price": avg_price,
+            "last_traded_price": ltp,
+            "cost": cost,
+            "current_value": value,
+            "unrealized_pnl": value - cost,
+            "realized_pnl": float(holding.get("realized_pnl", 0.0)),
+        }
+        old = entry["positions"].get(symbol)
+        totals = entry["totals"]
+        for field in TOTAL_FIELDS:
+            totals[field] += pos[field] - (old[field] if old else 0.0)
+        entry["positions"][symbol] = pos
+        entry["stamps"][symbol] = entry["version"] = next(_stamps)
+
+        if qty:
+            self._holders.setdefault(symbol, set()).add(user_id)
+        else:
+            holders = self._holders.get(symbol)
+            if holders is not None:
+                holders.discard(user_id)
+
+    def _push(self, user_id: str, symbols: Set[str]):
+        entry = self._users.get(user_id)
+        if entry is None:
+            return
+        positions = entry["positions"]
+        broadcaster.publish(user_topic(user_id), {
+            "type": "portfolio",
+            "holdings": [positions[s] for s in symbols if s in positions],
+            "totals": entry["totals"],
+        })
+
+    async def _push_loop(self):
+        while True:
+            await asyncio.sleep(self.push_interval)
+            self.flush()
+
+
+valuation = PortfolioValuation()
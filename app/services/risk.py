@@ -0,0 +1,231 @@
+# app/services/risk.py
+"""
+Pre-trade risk checks backed by incrementally maintained exposure.
+
+Every placement runs `risk.check` before the order is created. The check
+reads one user's exposure record and compares it with their limits, so
+its cost does not depend on how many orders, trades or holdings exist:
+
+    max_order_quantity   quantity of a single order
+    max_order_notional   quantity * price of a single order (LTP for MARKET)
+    max_position         |net position| per symbol, counting open orders
+    max_short            how far a symbol may go below zero (0 = no shorting)
+    max_open_notional    open buy + sell notional across symbols
+    cash                 starting cash; buys must fit in the available cash
+
+A limit left as None is not enforced. Defaults come from RISK_<LIMIT>
+environment variables (e.g. RISK_MAX_SHORT=0); RISK_LIMITS_PATH points to
+a JSON file `{"default": {...}, "users": {"alice": {...}}}` loaded at
+engine start, and `set_limits` overrides one user at runtime. Users
+without any limit are never checked nor tracked.
+
+Exposure per user (open buy/sell notional and quantity per symbol, net
+position per symbol, available cash) is loaded lazily from the store on
+the user's first checked order, then kept up to date by the engine's
+place / fill / cancel hooks. Open orders are reserved at their limit
+price, MARKET orders at the LTP they were checked against. Available
+cash is the starting cash minus the cost of long holdings plus realized
+P&L; proceeds of short sales are not credited.
+"""
+import json
+import os
+from typing import Dict, Optional
+from app.core import metrics
+from app.store.repository import get_store
+
+LIMIT_NAMES = (
+    "max_order_quantity", "max_order_notional", "max_position",
+    "max_short", "max_open_notional", "cash",
+)
+
+RISK_LIMITS_PATH = os.getenv("RISK_LIMITS_PATH")
+
+RISK_REJECTIONS = metrics.counter("risk_rejections_total", "Orders rejected by a pre-trade risk limit", ("limit",))
+
+
+def _env_limits() -> Dict[str, float]:
+    limits = {}
+    for name in LIMIT_NAMES:
+        value = os.getenv(f"RISK_{name.upper()}")
+        if value:
+            limits[name] = float(value)
+    return limits
+
+
+class RiskEngine:
+    def __init__(self, default_limits: Optional[Dict[str, float]] = None):
+        self.default_limits: Dict[str, float] = dict(default_limits or {})
+        self._user_limits: Dict[str, Dict[str, float]] = {}
+        # user_id -> {"open_notional": {"BUY", "SELL"}, "open_qty": {(side, symbol): qty},
+        #             "positions": {symbol: qty}, "cash": available cash or None}
+        self._users: Dict[str, dict] = {}
+        # order_id -> (user_id, side, symbol, quantity, notional) reserved for an open order
+        self._reserved: Dict[str, tuple] = {}
+
+    def limits(self, user_id: str) -> Dict[str, float]:
+        return self._user_limits.get(user_id, self.default_limits)
+
+    def set_limits(self, user_id: str, **limits: Optional[float]):
+        """
+        Set one user's limits (on top of the defaults); None removes a limit.
+        """
+        merged = {**self.limits(user_id), **limits}
+        self._user_limits[user_id] = {k: v for k, v in merged.items() if v is not None}
+        # Rebuilt from the store with the new starting cash on the next check
+        self._drop(user_id)
+
+    def load_file(self, path: str) -> int:
+        """
+        Load `{"default": {...}, "users": {user_id: {...}}}`. Returns the number of users configured.
+        """
+        with open(path) as fh:
+            config = json.load(fh)
+        self.default_limits.update(config.get("default", {}))
+        for user_id, limits in config.get("users", {}).items():
+            self.set_limits(user_id, **limits)
+        return len(config.get("users", {}))
+
+    def check(self, user_id: str, symbol: str, side: str, quantity: int, price: float) -> Optional[str]:
+        """
+        The name of the first limit the order would breach, or None.
+        """
+        limits = self.limits(user_id)
+        if not limits:
+            return None
+        entry = self._entry(user_id)
+        breached = self._breach(limits, entry, symbol, side, quantity, quantity * price)
+        if breached is not None:
+            RISK_REJECTIONS.labels(breached).inc()
+        return breached
+
+    def on_place(self, order: dict, price: float):
+        """
+        Reserve a newly placed order's quantity and notional.
+        """
+        entry = self._users.get(order["user_id"])
+        if entry is None:
+            return  # Not tracked; loaded from the store when first checked
+        self._reserve(entry, order, order["quantity"] * price)
+
+    def on_fill(self, order: dict, trade: dict, realized: float = 0.0):
+        """
+        `realized` is the P&L the fill realized on the holding (see apply_fill).
+        """
+        entry = self._users.get(trade["user_id"])
+        if entry is None:
+            return
+        self._release(entry, order["order_id"])
+        quantity, side, symbol = trade["quantity"], trade["side"], trade["symbol"]
+        positions = entry["positions"]
+        prev = positions.get(symbol, 0)
+        if side == "BUY":
+            positions[symbol] = prev + quantity
+            if entry["cash"] is not None:
+                # Covering a short only settles its P&L; the rest buys a long
+                covered = min(quantity, max(-prev, 0))
+                entry["cash"] += realized - (quantity - covered) * trade["price"]
+        else:
+            positions[symbol] = prev - quantity
+            if entry["cash"] is not None:
+                # Only the part of the sell that closes a long position frees cash
+                entry["cash"] += min(quantity, max(prev, 0)) * trade["price"]
+
+    def on_cancel(self, order: dict):
+        entry = self._users.get(order["user_id"])
+        if entry is not None:
+            self._release(entry, order["order_id"])
+
+    def exposure(self, user_id: str) -> dict:
+        entry = self._entry(user_id)
+        return {
+            "open_buy_notional": entry["open_notional"]["BUY"],
+            "open_sell_notional": entry["open_notional"]["SELL"],
+            "positions": dict(entry["positions"]),
+            "available_cash": self._available_cash(entry),
+        }
+
+    def clear(self):
+        self._users.clear()
+        self._reserved.clear()
+
+    def _breach(self, limits: dict, entry: dict, symbol: str, side: str, quantity: int, notional: float) -> Optional[str]:
+        limit = limits.get("max_order_quantity")
+        if limit is not None and quantity > limit:
+            return "max_order_quantity"
+        limit = limits.get("max_order_notional")
+        if limit is not None and notional > limit:
+            return "max_order_notional"
+
+        position = entry["positions"].get(symbol, 0)
+        open_qty = entry["open_qty"]
+        if side == "BUY":
+            worst = position + open_qty.get(("BUY", symbol), 0) + quantity
+        else:
+            worst = position - open_qty.get(("SELL", symbol), 0) - quantity
+        limit = limits.get("max_position")
+        if limit is not None and abs(worst) > limit:
+            return "max_position"
+        limit = limits.get("max_short")
+        if limit is not None and side == "SELL" and -worst > limit:
+            return "max_short"
+
+        open_notional = entry["open_notional"]
+        limit = limits.get("max_open_notional")
+        if limit is not None and open_notional["BUY"] + open_notional["SELL"] + notional > limit:
+            return "max_open_notional"
+        if side == "BUY" and entry["cash"] is not None and notional > self._available_cash(entry):
+            return "cash"
+        return None
+
+    def _available_cash(self, entry: dict) -> Optional[float]:
+        if entry["cash"] is None:
+            return None
+        return entry["cash"] - entry["open_notional"]["BUY"]
+
+    def _reserve(self, entry: dict, order: dict, notional: float):
+        side, symbol, quantity = order["order_type"], order["symbol"], order["quantity"]
+        self._reserved[order["order_id"]] = (order["user_id"], side, symbol, quantity, notional)
+        entry["open_notional"][side] += notional
+        key = (side, symbol)
+        entry["open_qty"][key] = entry["open_qty"].get(key, 0) + quantity
+
+    def _release(self, entry: dict, order_id: str):
+        reserved = self._reserved.pop(order_id, None)
+        if reserved is None:
+            return
+        _, side, symbol, quantity, notional = reserved
+        entry["open_notional"][side] -= notional
+        key = (side, symbol)
+        entry["open_qty"][key] -= quantity
+
+    def _drop(self, user_id: str):
+        if self._users.pop(user_id, None) is not None:
+            self._reserved = {k: v for k, v in self._reserved.items() if v[0] != user_id}
+
+    def _entry(self, user_id: str) -> dict:
+        entry = self._users.get(user_id)
+        if entry is None:
+            entry = self._load(user_id)
+        return entry
+
+    def _load(self, user_id: str) -> dict:
+        """
+        Build a user's exposure from the store; one pass over their holdings
+        and the open orders, paid once per user.
+        """
+        store = get_store()
+        cash = self.limits(user_id).get("cash")
+        entry = {"open_notional": {"BUY": 0.0, "SELL": 0.0}, "open_qty": {}, "positions": {}, "cash": cash}
+        for symbol, holding in store.portfolio.holdings(user_id).items():
+            quantity = int(holding.get("quantity", 0))
+            entry["positions"][symbol] = quantity
+            if cash is not None:
+                entry["cash"] += float(holding.get("realized_pnl", 0.0)) - max(quantity, 0) * float(holding.get("avg_price", 0.0))
+        for order in store.orders.open_limit_orders():
+            if order.get("user_id") == user_id:
+                self._reserve(entry, order, order["quantity"] * order["price"])
+        self._users[user_id] = entry
+        return entry
+
+
+risk = RiskEngine(_env_limits())
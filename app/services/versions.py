@@ -0,0 +1,48 @@
+# app/services/versions.py
+"""
+Per-user version counters for the polled read endpoints.
+
+A version only ever grows while the process runs, and it changes whenever
+the data behind it changes:
+
+    trades     seq of the user's latest trade (bumped by `apply_fill`)
+    portfolio  stamp of the user's latest revalued position (see
+               portfolio_valuation.py)
+
+The instrument master has one global version, `InstrumentRepository.version`.
+
+Clients see versions as opaque tokens "<epoch>-<n>". The epoch is random
+per process, so tokens issued before a restart never match (no false 304s)
+and are treated as "send everything" when passed back as `since_version`.
+"""
+from typing import Dict, Optional
+from uuid import uuid4
+
+EPOCH = uuid4().hex[:8]
+
+# user_id -> seq of the user's latest trade
+TRADE_VERSIONS: Dict[str, int] = {}
+
+
+def bump_trades(user_id: str, seq: int):
+    TRADE_VERSIONS[user_id] = seq
+
+
+def trades_version(user_id: str) -> int:
+    return TRADE_VERSIONS.get(user_id, 0)
+
+
+def make_token(version: int) -> str:
+    return f"{EPOCH}-{version}"
+
+
+def parse_token(token: Optional[str]) -> Optional[int]:
+    """
+    The version in a token from this process, or None (missing, malformed or stale epoch).
+    """
+    if not token:
+        return None
+    epoch, _, version = token.strip().strip('"').partition("-")
+    if epoch != EPOCH or not version.isdigit():
+        return None
+    return int(version)
@@ -0,0 +1,159 @@
+# app/store/instrument_registry.py
+
+import csv
+import json
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from app.store.memory import INSTRUMENTS
+from app.store.repository import InstrumentRepository
+
+
+def normalize_symbol(symbol: str) -> str:
+    return symbol.strip().upper()
+
+
+class InstrumentRegistry(InstrumentRepository):
+    """
+    Instruments keyed by normalized symbol, with exchange and instrument-type
+    secondary indexes so lookups and filtered listings never scan the master.
+
+    Instruments are stored as plain dicts (same shape as the seed data) and
+    the same dict is shared by every index, so an LTP update is visible
+    everywhere at once.
+
+    Pages are slices of lists, so a page costs O(limit) at any offset:
+    unfiltered pages slice `_rows`, and filtered ones slice a list view of
+    the index entry, rebuilt only after that entry changes. The indexes
+    themselves map symbol -> instrument, so re-indexing is O(1).
+    """
+
+    def __init__(self):
+        self._by_symbol: Dict[str, dict] = {}
+        # Every instrument in insertion order
+        self._rows: List[dict] = []
+        self._by_exchange: Dict[str, Dict[str, dict]] = {}
+        self._by_type: Dict[str, Dict[str, dict]] = {}
+        self._by_exchange_type: Dict[Tuple[str, str], Dict[str, dict]] = {}
+        # (index name, key) -> list of the index entry's instruments
+        self._views: Dict[tuple, List[dict]] = {}
+        self.version = 0
+        self.master_version = 0
+
+    def __len__(self) -> int:
+        return len(self._by_symbol)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self._by_symbol.values())
+
+    def get(self, symbol: str) -> Optional[dict]:
+        return self._by_symbol.get(normalize_symbol(symbol))
+
+    def add(self, inst: dict) -> dict:
+        """
+        Insert an instrument, or update the existing one with the same symbol in place.
+        """
+        self.version += 1
+        self.master_version += 1
+        record = {
+            "symbol": normalize_symbol(inst["symbol"]),
+            "exchange": str(inst["exchange"]).strip().upper(),
+            "instrument_type": str(inst["instrument_type"]).strip().upper(),
+            "last_traded_price": float(inst.get("last_traded_price") or 0.0),
+        }
+        existing = self._by_symbol.get(record["symbol"])
+        if existing is not None:
+            if (existing["exchange"], existing["instrument_type"]) != (record["exchange"], record["instrument_type"]):
+                self._unindex(existing)
+                existing.update(record)
+                self._index(existing)
+            else:
+                existing.update(record)
+            return existing
+
+        # Keep the caller's dict when it is already normalized (seed data)
+        if all(inst.get(k) == v for k, v in record.items()):
+            record = inst
+        self._by_symbol[record["symbol"]] = record
+        self._rows.append(record)
+        self._index(record)
+        return record
+
+    def set_last_traded_price(self, symbol: str, price: float) -> Optional[dict]:
+        inst = self.get(symbol)
+        if inst is not None:
+            inst["last_traded_price"] = float(price)
+            self.version += 1
+        return inst
+
+    def load(self, instruments: Iterable[dict]) -> int:
+        count = 0
+        for inst in instruments:
+            self.add(inst)
+            count += 1
+        return count
+
+    def load_file(self, path: str) -> int:
+        """
+        Bulk load an instrument master from a .csv (header row with symbol,
+        exchange, instrument_type, last_traded_price) or a .json array.
+        """
+        file_path = Path(path)
+        if file_path.suffix.lower() == ".json":
+            with file_path.open() as f:
+                return self.load(json.load(f))
+        with file_path.open(newline="") as f:
+            return self.load(csv.DictReader(f))
+
+    def list(
+        self,
+        exchange: Optional[str] = None,
+        instrument_type: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        if exchange and instrument_type:
+            rows = self._view("exchange_type", self._by_exchange_type, (exchange.upper(), instrument_type.upper()))
+        elif exchange:
+            rows = self._view("exchange", self._by_exchange, exchange.upper())
+        elif instrument_type:
+            rows = self._view("type", self._by_type, instrument_type.upper())
+        else:
+            rows = self._rows
+        end = None if limit is None else offset + limit
+        return rows[offset:end]
+
+    def clear(self):
+        self.version += 1
+        self.master_version += 1
+        self._by_symbol.clear()
+        self._rows.clear()
+        self._by_exchange.clear()
+        self._by_type.clear()
+        self._by_exchange_type.clear()
+        self._views.clear()
+
+    def _indexes(self, inst: dict) -> Iterator[Tuple[str, Dict, object]]:
+        yield "exchange", self._by_exchange, inst["exchange"]
+        yield "type", self._by_type, inst["instrument_type"]
+        yield "exchange_type", self._by_exchange_type, (inst["exchange"], inst["instrument_type"])
+
+    def _index(self, inst: dict):
+        for name, index, key in self._indexes(inst):
+            index.setdefault(key, {})[inst["symbol"]] = inst
+            self._views.pop((name, key), None)
+
+    def _unindex(self, inst: dict):
+        for name, index, key in self._indexes(inst):
+            del index[key][inst["symbol"]]
+            self._views.pop((name, key), None)
+
+    def _view(self, name: str, index: Dict, key) -> List[dict]:
+        view = self._views.get((name, key))
+        if view is None:
+            view = self._views[(name, key)] = list(index.get(key, {}).values())
+        return view
+
+
+# Process-wide registry, seeded with the static instruments
+registry = InstrumentRegistry()
+registry.load(INSTRUMENTS)
@@ -0,0 +1,267 @@
+# app/store/journal.py
+"""
+Write-ahead journal and snapshots for the in-memory store.
+
+Journal records are length-prefixed binary frames appended to segment files
+named `journal-<first_seq>.log`:
+
+    u32 payload length | u32 crc32(payload) | u64 seq | u8 kind | payload
+
+where the payload is the compact JSON of the event body. A torn or corrupt
+tail (crash mid-write) ends replay at the last intact record.
+
+Snapshots are written atomically to `snapshot.bin` as a sequence of
+pickle frames: a header with the last journal seq they include, the open
+orders and the portfolio, then the archived orders and the trades as
+their compact records (records.py), SNAPSHOT_CHUNK_RECORDS per frame.
+Encoding frame by frame keeps each pickle call short, so a snapshot
+written from a thread does not hold the GIL (and the event loop) for
+long.
+"""
+import asyncio
+import json
+import os
+import pickle
+import struct
+import zlib
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Event kinds
+ORDER = 1   # order placed (full order dict)
+TRADE = 2   # fill (trade dict; implies the order executed)
+CANCEL = 3  # {"order_id": ...}
+
+HEADER = struct.Struct("<IIQB")
+SNAPSHOT_FILE = "snapshot.bin"
+SNAPSHOT_CHUNK_RECORDS = 10_000
+SEGMENT_PREFIX = "journal-"
+SEGMENT_SUFFIX = ".log"
+
+# Bound decoder: skips json.loads' per-call encoding sniffing on replay
+_decode = json.JSONDecoder().decode
+
+
+def encode_record(seq: int, kind: int, body: dict) -> bytes:
+    payload = json.dumps(body, separators=(",", ":")).encode()
+    return HEADER.pack(len(payload), zlib.crc32(payload), seq, kind) + payload
+
+
+def segment_path(directory: Path, first_seq: int) -> Path:
+    return directory / f"{SEGMENT_PREFIX}{first_seq:020d}{SEGMENT_SUFFIX}"
+
+
+def list_segments(directory: Path) -> List[Tuple[int, Path]]:
+    segments = []
+    for path in directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"):
+        first_seq = int(path.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+        segments.append((first_seq, path))
+    return sorted(segments)
+
+
+def _scan_segment(data: bytes) -> Iterator[Tuple[int, int, bytes, int]]:
+    """
+    Yield (seq, kind, payload, end_offset) for each intact frame in `data`.
+    """
+    pos, end = 0, len(data)
+    while pos + HEADER.size <= end:
+        length, crc, seq, kind = HEADER.unpack_from(data, pos)
+        start = pos + HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return  # torn tail
+        pos = start + length
+        yield seq, kind, payload, pos
+
+
+def read_records(directory: Path, after_seq: int = 0) -> Iterator[Tuple[int, int, dict]]:
+    """
+    Yield (seq, kind, body) for every intact record with seq > after_seq.
+    """
+    segments = list_segments(directory)
+    for i, (first_seq, path) in enumerate(segments):
+        # Skip segments that end at or before after_seq
+        if i + 1 < len(segments) and segments[i + 1][0] <= after_seq + 1:
+            continue
+        for seq, kind, payload, _ in _scan_segment(path.read_bytes()):
+            if seq > after_seq:
+                yield seq, kind, _decode(payload.decode())
+
+
+def write_snapshot(directory: Path, seq: int, header: dict, tables: Dict[str, Iterable]):
+    """
+    Atomically replace the snapshot: `header` in the first frame, then
+    each table's records in chunks. Tables are consumed lazily, so they
+    may be iterators over lists the engine keeps appending to.
+    """
+    tmp = directory / (SNAPSHOT_FILE + ".tmp")
+    with tmp.open("wb") as f:
+        pickle.dump({"seq": seq, **header}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        for name, rows in tables.items():
+            rows = iter(rows)
+            while chunk := list(islice(rows, SNAPSHOT_CHUNK_RECORDS)):
+                pickle.dump((name, chunk), f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, directory / SNAPSHOT_FILE)
+
+
+def load_snapshot(directory: Path) -> Tuple[int, Optional[dict]]:
+    """
+    (seq, state): the header fields plus one list per table.
+    """
+    path = directory / SNAPSHOT_FILE
+    if not path.exists():
+        return 0, None
+    with path.open("rb") as f:
+        state = pickle.load(f)
+        while True:
+            try:
+                name, chunk = pickle.load(f)
+            except EOFError:
+                break
+            state.setdefault(name, []).extend(chunk)
+    return state.pop("seq"), state
+
+
+class JournalWriter:
+    """
+    Appends journal records and makes them durable with group commit.
+
+    `append` only buffers a frame in memory. A background task (`run`)
+    writes everything buffered in one `write` and one `fsync`, then wakes
+    every `commit()` waiter covered by that sync, so concurrent orders
+    share a single disk sync.
+    """
+
+    def __init__(self, directory: str, flush_interval: float = 0.002, after_seq: int = 0):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        # Never reuse seqs already covered by a snapshot
+        self.last_seq = after_seq
+        self._pending: List[bytes] = []
+        self._waiters: List[Tuple[int, asyncio.Future]] = []
+        self._wakeup = asyncio.Event()
+        self._io_lock = asyncio.Lock()
+        self._fh = self._resume()
+        self.durable_seq = self.last_seq
+
+    def append(self, kind: int, body: dict) -> int:
+        self.last_seq += 1
+        self._pending.append(encode_record(self.last_seq, kind, body))
+        self._wakeup.set()
+        return self.last_seq
+
+    async def commit(self):
+        """
+        Wait until every record appended so far is on disk.
+        """
+        if self.durable_seq >= self.last_seq:
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append((self.last_seq, fut))
+        self._wakeup.set()
+        await fut
+
+    async def run(self):
+        while True:
+            await self._wakeup.wait()
+            # Give concurrent writers a moment to join this group
+            await asyncio.sleep(self.flush_interval)
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        async with self._io_lock:
+            if not self._pending:
+                self._release_waiters()
+                return
+            data, self._pending = b"".join(self._pending), []
+            seq = self.last_seq
+            self._fh.write(data)
+            self._fh.flush()
+            await asyncio.to_thread(os.fsync, self._fh.fileno())
+            self.durable_seq = seq
+            self._release_waiters()
+
+    async def rotate(self) -> int:
+        """
+        Flush, then start a new segment. Returns the last seq in the old segments.
+        """
+        await self.flush()
+        async with self._io_lock:
+            seq = self.last_seq
+            if self._pending:
+                # Appended while we waited for the lock: keep them in the old segment
+                self._fh.write(b"".join(self._pending))
+                self._pending = []
+                self._fh.flush()
+                os.fsync(self._fh.fileno())
+                self.durable_seq = seq
+                self._release_waiters()
+            self._fh.close()
+            self._fh = segment_path(self.directory, seq + 1).open("ab")
+            return seq
+
+    def drop_segments_through(self, seq: int):
+        """
+        Delete segments whose records are all covered by a snapshot at `seq`.
+        """
+        segments = list_segments(self.directory)
+        for i, (first_seq, path) in enumerate(segments[:-1]):
+            if segments[i + 1][0] <= seq + 1:
+                path.unlink()
+
+    def close(self):
+        if self._pending:
+            self._fh.write(b"".join(self._pending))
+            self._pending = []
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._fh.close()
+        self.durable_seq = self.last_seq
+        self._release_waiters()
+
+    def _resume(self):
+        """
+        Reopen the newest segment for appending, cutting off any torn tail so
+        new records are not written after unreadable bytes.
+        """
+        segments = list_segments(self.directory)
+        if not segments:
+            return segment_path(self.directory, self.last_seq + 1).open("ab")
+        first_seq, path = segments[-1]
+        self.last_seq = max(self.last_seq, first_seq - 1)
+        valid_end = 0
+        for seq, _, _, end in _scan_segment(path.read_bytes()):
+            self.last_seq, valid_end = max(self.last_seq, seq), end
+        fh = path.open("r+b")
+        fh.truncate(valid_end)
+        fh.seek(valid_end)
+        return fh
+
+    def _release_waiters(self):
+        remaining = []
+        for seq, fut in self._waiters:
+            if seq <= self.durable_seq:
+                if not fut.done():
+                    fut.set_result(None)
+            else:
+                remaining.append((seq, fut))
+        self._waiters = remaining
+
+
+# Active journal; None when persistence is disabled
+JOURNAL: Optional[JournalWriter] = None
+
+
+def record(kind: int, body: dict):
+    if JOURNAL is not None:
+        JOURNAL.append(kind, body)
+
+
+async def commit():
+    if JOURNAL is not None:
+        await JOURNAL.commit()
@@ -1,6 +1,8 @@
 # app/store/memory.py
 
-from typing import Dict, List
+from typing import Dict
+from app.store.order_archive import OrderArchive
+from app.store.trade_log import TradeLog
 
 # Seeded list of instruments (acts like a small "table")
 INSTRUMENTS = [
@@ -24,11 +26,14 @@ INSTRUMENTS = [
     }
 ]
 
-# Orders stored as order_id -> order dict
+# Live (PLACED) orders stored as order_id -> order dict
 ORDERS: Dict[str, dict] = {}
 
-# Trades as a list of trade dicts
-TRADES: List[dict] = []
+# EXECUTED / CANCELLED orders, compacted and indexed by order_id
+ARCHIVED_ORDERS = OrderArchive()
+
+# Trades as an append-only log of trade dicts, indexed by user and symbol
+TRADES = TradeLog()
 
 # Portfolio per user_id: { user_id: { symbol: { quantity, avg_price } } }
 PORTFOLIO: Dict[str, Dict[str, dict]] = {}
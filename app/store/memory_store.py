@@ -0,0 +1,78 @@
+# app/store/memory_store.py
+
+from typing import Dict, List, Optional
+from app.store import memory
+from app.store.instrument_registry import registry
+from app.store.order_archive import OrderArchive
+from app.store.repository import OrderRepository, PortfolioRepository, Store
+
+
+class MemoryOrderRepository(OrderRepository):
+    """
+    Open orders live in `orders`; terminal ones move to `archive`.
+    """
+
+    def __init__(self, orders: Dict[str, dict], archive: OrderArchive):
+        self._orders = orders
+        self._archive = archive
+
+    def add(self, order: dict):
+        if order["state"] == "PLACED":
+            self._orders[order["order_id"]] = order
+        else:
+            self._archive.add(order)
+
+    def get(self, order_id: str) -> Optional[dict]:
+        order = self._orders.get(order_id)
+        if order is None:
+            order = self._archive.get(order_id)
+        return order
+
+    async def lookup(self, order_id: str) -> Optional[dict]:
+        order = self._orders.get(order_id)
+        if order is None:
+            order = await self._archive.lookup(order_id)
+        return order
+
+    def update(self, order: dict):
+        # Orders are mutated in place; a terminal one leaves the live map
+        if order["state"] == "PLACED":
+            self._orders[order["order_id"]] = order
+        else:
+            self._orders.pop(order["order_id"], None)
+            self._archive.add(order)
+
+    def open_limit_orders(self) -> List[dict]:
+        return [
+            o for o in self._orders.values()
+            if o["state"] == "PLACED" and o["order_style"] == "LIMIT"
+        ]
+
+
+class MemoryPortfolioRepository(PortfolioRepository):
+    def __init__(self, portfolio: Dict[str, Dict[str, dict]]):
+        self._portfolio = portfolio
+
+    def holdings(self, user_id: str) -> Dict[str, dict]:
+        return self._portfolio.get(user_id, {})
+
+    def get(self, user_id: str, symbol: str) -> Optional[dict]:
+        return self._portfolio.get(user_id, {}).get(symbol)
+
+    def put(self, user_id: str, symbol: str, holding: dict):
+        self._portfolio.setdefault(user_id, {})[symbol] = holding
+
+
+class MemoryStore(Store):
+    """
+    The process-memory backend: thin wrappers over app/store/memory.py.
+    """
+
+    def __init__(self):
+        super().__init__(
+            instruments=registry,
+            orders=MemoryOrderRepository(memory.ORDERS, memory.ARCHIVED_ORDERS),
+            trades=memory.TRADES,
+            portfolio=MemoryPortfolioRepository(memory.PORTFOLIO),
+            backend="memory",
+        )
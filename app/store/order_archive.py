@@ -0,0 +1,200 @@
+# app/store/order_archive.py
+"""
+History tier for terminal (EXECUTED / CANCELLED) orders of the memory backend.
+
+Only PLACED orders stay as dicts in memory.ORDERS. When an order reaches a
+terminal state it moves here as a compact `ArchivedOrder` (an `OrderRecord`
+from records.py plus its archive time), indexed by order_id, so the live
+map only ever holds open orders.
+
+The archive is bounded once ORDER_ARCHIVE_PATH is set. The oldest orders
+beyond ORDER_ARCHIVE_MAX_ENTRIES, or archived more than
+ORDER_ARCHIVE_MAX_AGE_SECONDS ago, are evicted in batches to that SQLite
+file, and `get` still finds them there. Without a path nothing is evicted.
+
+On the event loop eviction runs as a background task: each round takes at
+most ORDER_ARCHIVE_EVICT_BATCH records, writes them from a thread and drops
+them from memory once committed, so a fill never waits on the cold store.
+The API reads evicted orders through `lookup`, which queries from a thread.
+
+sqlite_store is imported lazily: it imports memory.py, which creates the archive.
+"""
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional
+from app.store.records import Id, OrderRecord, order_from_row, pack_id
+
+ORDER_ARCHIVE_PATH = os.getenv("ORDER_ARCHIVE_PATH")
+ORDER_ARCHIVE_MAX_ENTRIES = int(os.getenv("ORDER_ARCHIVE_MAX_ENTRIES", "1000000"))
+ORDER_ARCHIVE_MAX_AGE_SECONDS = float(os.getenv("ORDER_ARCHIVE_MAX_AGE_SECONDS", "86400"))
+# Eviction runs (and writes one transaction) at most once per this many archived orders
+ORDER_ARCHIVE_EVICT_BATCH = 1000
+
+
+@dataclass(slots=True, eq=False)
+class ArchivedOrder(OrderRecord):
+    archived_at: float = 0.0
+
+
+class OrderArchive:
+    def __init__(
+        self,
+        path: Optional[str] = ORDER_ARCHIVE_PATH,
+        max_entries: int = ORDER_ARCHIVE_MAX_ENTRIES,
+        max_age: float = ORDER_ARCHIVE_MAX_AGE_SECONDS,
+        evict_batch: int = ORDER_ARCHIVE_EVICT_BATCH,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.evict_batch = evict_batch
+        # packed order_id -> record, oldest archived first
+        self._orders: Dict[Id, ArchivedOrder] = {}
+        self._since_evict = 0
+        self._cold = None
+        self._cold_lock = threading.Lock()
+        self._evicting: Optional[asyncio.Task] = None
+        self.evicted = 0
+
+    def add(self, order: dict):
+        record = ArchivedOrder.from_dict(order, archived_at=time.time())
+        self._orders[record.order_id] = record
+        if self.path is None:
+            return
+        self._since_evict += 1
+        if self._since_evict < self.evict_batch:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.evict()
+            return
+        self._since_evict = 0
+        if self._evicting is None:
+            self._evicting = asyncio.create_task(self._evict_in_background())
+
+    def get(self, order_id: str) -> Optional[dict]:
+        """
+        A fresh dict for an archived or evicted order, or None. Evicted
+        orders are read from the cold store on the calling thread.
+        """
+        record = self._orders.get(pack_id(order_id))
+        if record is not None:
+            return record.to_dict()
+        return self._get_cold(order_id)
+
+    async def lookup(self, order_id: str) -> Optional[dict]:
+        """
+        `get` for the event loop: the cold store is queried from a thread.
+        """
+        record = self._orders.get(pack_id(order_id))
+        if record is not None:
+            return record.to_dict()
+        if self.path is None:
+            return None
+        return await asyncio.to_thread(self._get_cold, order_id)
+
+    def evict(self, now: Optional[float] = None) -> int:
+        """
+        Move orders past the size or age limit to the cold store, blocking
+        until they are written. Returns the number evicted.
+        """
+        self._since_evict = 0
+        victims = self._victims(now)
+        if not victims:
+            return 0
+        self._write_cold([r.to_row() for r in victims])
+        return self._drop(victims)
+
+    async def _evict_in_background(self):
+        try:
+            while True:
+                victims = self._victims(limit=self.evict_batch)
+                if not victims:
+                    return
+                # Written (and committed) before the records leave memory
+                await asyncio.to_thread(self._write_cold, [r.to_row() for r in victims])
+                self._drop(victims)
+        finally:
+            self._evicting = None
+
+    def _victims(self, now: Optional[float] = None, limit: Optional[int] = None) -> List[ArchivedOrder]:
+        """
+        The oldest records past the size or age limit, at most `limit` of them.
+        """
+        if self.path is None:
+            return []
+        cutoff = (now if now is not None else time.time()) - self.max_age
+        excess = len(self._orders) - self.max_entries
+        victims = []
+        for record in self._orders.values():
+            if len(victims) == limit:
+                break
+            if len(victims) < excess or record.archived_at < cutoff:
+                victims.append(record)
+            else:
+                break
+        return victims
+
+    def _drop(self, victims: List[ArchivedOrder]) -> int:
+        for record in victims:
+            # clear() or a restore may have replaced it while it was being written
+            if self._orders.get(record.order_id) is record:
+                del self._orders[record.order_id]
+        self.evicted += len(victims)
+        return len(victims)
+
+    def _write_cold(self, rows: List[tuple]):
+        from app.store.sqlite_store import ORDER_COLUMNS
+        upsert = (f"INSERT OR REPLACE INTO orders ({', '.join(ORDER_COLUMNS)}) "
+                  f"VALUES ({', '.join('?' * len(ORDER_COLUMNS))})")
+        cold = self._cold_db()
+        cold.write_many(upsert, rows)
+        cold.sync()
+
+    def _get_cold(self, order_id: str) -> Optional[dict]:
+        if self.path is None:
+            return None
+        from app.store.sqlite_store import SELECT_ORDER
+        row = self._cold_db().query_one(SELECT_ORDER, (order_id,))
+        return order_from_row(row) if row else None
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def __iter__(self) -> Iterator[dict]:
+        """
+        The in-memory archive as order dicts, oldest first (evicted orders excluded).
+        """
+        return (record.to_dict() for record in self._orders.values())
+
+    def records(self) -> List[ArchivedOrder]:
+        """
+        A copy of the in-memory records, oldest first.
+        """
+        return list(self._orders.values())
+
+    def restore(self, records: Iterable[ArchivedOrder]):
+        for record in records:
+            self._orders[record.order_id] = record
+
+    def clear(self):
+        self._orders.clear()
+        self._since_evict = 0
+
+    def close(self):
+        with self._cold_lock:
+            if self._cold is not None:
+                self._cold.close()
+                self._cold = None
+
+    def _cold_db(self):
+        # Opened by whichever thread (loop or eviction/lookup worker) needs it first
+        with self._cold_lock:
+            if self._cold is None:
+                from app.store.sqlite_store import SqliteDatabase
+                self._cold = SqliteDatabase(self.path)
+            return self._cold
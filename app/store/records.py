@@ -0,0 +1,245 @@
+# app/store/records.py
+"""
+Compact order and trade records.
+
+Inside the engine orders and trades are dicts whose timestamps are integer
+epoch nanoseconds (`now_ns`); the journal and snapshots store them that way.
+Only the edges format them: `format_order` / `format_trade` produce the ISO
+strings of the REST and websocket payloads, and the SQLite backend keeps
+its TEXT columns through `order_row` / `trade_row`.
+
+What the memory backend keeps for the long run (the trade log and the order
+archive) is stored as `__slots__` dataclasses rather than dicts: ids packed
+to 16-byte UUIDs, timestamps as ints, side/style/state as `IntEnum` codes
+and symbol/user strings interned. `to_dict()` rebuilds the engine dict.
+
+Timestamps that arrive as ISO strings (journals written before this
+format, test fixtures) are accepted everywhere and converted on the way in.
+"""
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from enum import IntEnum
+from typing import Callable, Optional, Union
+
+Id = Union[bytes, str]
+Timestamp = Union[int, str, datetime, None]
+
+# Same columns, in the same order, as the sqlite backend's tables
+ORDER_FIELDS = (
+    "order_id", "user_id", "symbol", "order_type", "order_style",
+    "quantity", "price", "state", "created_at", "executed_at",
+)
+TRADE_FIELDS = ("trade_id", "order_id", "user_id", "symbol", "quantity", "price", "side", "timestamp")
+
+_EPOCH = datetime(1970, 1, 1)
+_NS_PER_SECOND = 1_000_000_000
+
+# Engine clock (epoch ns); the backtester swaps in simulated time
+_clock: Callable[[], int] = time.time_ns
+
+
+def now_ns() -> int:
+    return _clock()
+
+
+def set_clock(clock: Optional[Callable[[], int]] = None):
+    """
+    Take engine timestamps from `clock` (epoch ns); None restores the wall clock.
+    """
+    global _clock
+    _clock = clock or time.time_ns
+
+
+class Side(IntEnum):
+    BUY = 0
+    SELL = 1
+
+
+class Style(IntEnum):
+    MARKET = 0
+    LIMIT = 1
+
+
+class State(IntEnum):
+    NEW = 0
+    PLACED = 1
+    EXECUTED = 2
+    CANCELLED = 3
+
+
+def to_ns(value: Timestamp) -> Optional[int]:
+    """
+    Epoch nanoseconds for an int, an ISO string or a datetime (naive = UTC).
+    """
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * _NS_PER_SECOND + delta.microseconds * 1000
+
+
+def to_iso(value: Timestamp) -> Optional[str]:
+    """
+    The naive UTC ISO string clients see (microsecond precision).
+    """
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return (_EPOCH + timedelta(microseconds=value // 1000)).isoformat()
+
+
+def _unpack_uuid(packed: bytes) -> str:
+    h = packed.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def pack_id(value: str) -> Id:
+    """
+    16 bytes for a canonical (lowercase, hyphenated) UUID string; any
+    other id is kept as is, so unpack_id(pack_id(x)) == x always.
+    """
+    if len(value) == 36:
+        try:
+            packed = bytes.fromhex(value.replace("-", ""))
+        except ValueError:
+            return value
+        if len(packed) == 16 and _unpack_uuid(packed) == value:
+            return packed
+    return value
+
+
+def unpack_id(value: Id) -> str:
+    return _unpack_uuid(value) if isinstance(value, bytes) else value
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+@dataclass(slots=True, eq=False)
+class OrderRecord:
+    order_id: Id
+    user_id: Optional[str]
+    symbol: str
+    order_type: Side
+    order_style: Style
+    quantity: int
+    price: Optional[float]
+    state: State
+    created_at: Optional[int]
+    executed_at: Optional[int]
+
+    @classmethod
+    def from_dict(cls, order: dict, **extra) -> "OrderRecord":
+        return cls(
+            pack_id(order["order_id"]),
+            _intern(order.get("user_id")),
+            sys.intern(order["symbol"]),
+            Side[order["order_type"]],
+            Style[order["order_style"]],
+            order["quantity"],
+            order.get("price"),
+            State[order["state"]],
+            to_ns(order.get("created_at")),
+            to_ns(order.get("executed_at")),
+            **extra,
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "order_id": unpack_id(self.order_id),
+            "user_id": self.user_id,
+            "symbol": self.symbol,
+            "order_type": self.order_type.name,
+            "order_style": self.order_style.name,
+            "quantity": self.quantity,
+            "price": self.price,
+            "state": self.state.name,
+            "created_at": self.created_at,
+            "executed_at": self.executed_at,
+        }
+
+    def to_row(self) -> tuple:
+        return order_row(self.to_dict())
+
+
+@dataclass(slots=True, eq=False)
+class TradeRecord:
+    trade_id: Id
+    order_id: Id
+    user_id: Optional[str]
+    symbol: str
+    quantity: int
+    price: float
+    side: Side
+    timestamp: int
+
+    @classmethod
+    def from_dict(cls, trade: dict) -> "TradeRecord":
+        return cls(
+            pack_id(trade["trade_id"]),
+            pack_id(trade["order_id"]),
+            _intern(trade.get("user_id")),
+            sys.intern(trade["symbol"]),
+            trade["quantity"],
+            trade["price"],
+            Side[trade["side"]],
+            to_ns(trade["timestamp"]),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "trade_id": unpack_id(self.trade_id),
+            "order_id": unpack_id(self.order_id),
+            "symbol": self.symbol,
+            "quantity": self.quantity,
+            "price": self.price,
+            "side": self.side.name,
+            "timestamp": self.timestamp,
+            "user_id": self.user_id,
+        }
+
+
+def format_order(order: dict) -> dict:
+    """
+    A copy of an engine order with ISO timestamps, for API and websocket payloads.
+    """
+    order = dict(order)
+    for field in ("created_at", "executed_at"):
+        if field in order:
+            order[field] = to_iso(order[field])
+    return order
+
+
+def format_trade(trade: dict) -> dict:
+    return {**trade, "timestamp": to_iso(trade["timestamp"])}
+
+
+def order_row(order: dict) -> tuple:
+    """
+    An order as a row of the sqlite orders table (ISO TEXT timestamps).
+    """
+    return tuple(to_iso(order.get(c)) if c in ("created_at", "executed_at") else order[c] for c in ORDER_FIELDS)
+
+
+def order_from_row(row: tuple) -> dict:
+    order = dict(zip(ORDER_FIELDS, row))
+    order["created_at"] = to_ns(order["created_at"])
+    order["executed_at"] = to_ns(order["executed_at"])
+    return order
+
+
+def trade_row(trade: dict) -> tuple:
+    return tuple(to_iso(trade[c]) if c == "timestamp" else trade[c] for c in TRADE_FIELDS)
+
+
+def trade_from_row(row: tuple) -> dict:
+    trade = dict(zip(TRADE_FIELDS, row))
+    trade["timestamp"] = to_ns(trade["timestamp"])
+    return trade
@@ -0,0 +1,193 @@
+# app/store/repository.py
+"""
+Storage interfaces used by the API modules and the execution engine.
+
+Records are plain dicts with the same shape as before (see memory.py);
+their timestamps are epoch-ns ints (see records.py).
+Two backends implement these interfaces:
+
+    memory  (default) module-level dicts/lists in app/store/memory.py
+    sqlite  app/store/sqlite_store.py, WAL mode, for histories larger than RAM
+
+The backend is picked by STORE_BACKEND (and SQLITE_PATH for sqlite).
+"""
+import os
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from typing import Dict, Iterable, List, Optional
+
+
+class InstrumentRepository(ABC):
+    # Bumped on every change (adds, LTP updates), so callers can cache
+    # data derived from the master, such as encoded responses
+    version: int = 0
+    # Bumped only when the static fields (symbol, exchange, type) change,
+    # i.e. not by LTP updates
+    master_version: int = 0
+
+    @abstractmethod
+    def get(self, symbol: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    def list(
+        self,
+        exchange: Optional[str] = None,
+        instrument_type: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[dict]: ...
+
+    @abstractmethod
+    def load(self, instruments: Iterable[dict]) -> int: ...
+
+    @abstractmethod
+    def load_file(self, path: str) -> int: ...
+
+    @abstractmethod
+    def set_last_traded_price(self, symbol: str, price: float) -> Optional[dict]: ...
+
+    def set_last_traded_prices(self, prices: Dict[str, float]) -> List[dict]:
+        """
+        Apply a batch of symbol -> LTP updates; returns the instruments that
+        exist. Unknown symbols are skipped.
+        """
+        updated = []
+        for symbol, price in prices.items():
+            inst = self.set_last_traded_price(symbol, price)
+            if inst is not None:
+                updated.append(inst)
+        return updated
+
+
+class OrderRepository(ABC):
+    @abstractmethod
+    def add(self, order: dict): ...
+
+    @abstractmethod
+    def get(self, order_id: str) -> Optional[dict]:
+        """
+        While an order is PLACED every call returns the same dict, so the
+        engine, the order book and the API all see one live object.
+        """
+
+    async def lookup(self, order_id: str) -> Optional[dict]:
+        """
+        `get` for the API: anything not held in memory is read off the event loop.
+        """
+        return self.get(order_id)
+
+    @abstractmethod
+    def update(self, order: dict):
+        """
+        Persist a state change made to an order dict.
+        """
+
+    @abstractmethod
+    def open_limit_orders(self) -> List[dict]: ...
+
+
+class TradeRepository(ABC):
+    @abstractmethod
+    def append(self, trade: dict) -> int:
+        """
+        Store a trade; returns its seq (1-based, increasing in execution order).
+        """
+
+    @abstractmethod
+    def page(
+        self,
+        user_id: Optional[str] = None,
+        symbol: Optional[str] = None,
+        after: Optional[str] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        limit: int = 100,
+        after_seq: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        Oldest-first page of trades after the `after` trade_id (and with seq
+        above `after_seq`), within `since`..`until` (epoch ns).
+        Raises KeyError for an unknown cursor.
+        """
+
+
+class PortfolioRepository(ABC):
+    @abstractmethod
+    def holdings(self, user_id: str) -> Dict[str, dict]:
+        """
+        symbol -> {"quantity", "avg_price", "realized_pnl"} for one user.
+        """
+
+    @abstractmethod
+    def get(self, user_id: str, symbol: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    def put(self, user_id: str, symbol: str, holding: dict): ...
+
+
+class Store:
+    def __init__(
+        self,
+        instruments: InstrumentRepository,
+        orders: OrderRepository,
+        trades: TradeRepository,
+        portfolio: PortfolioRepository,
+        backend: str,
+    ):
+        self.instruments = instruments
+        self.orders = orders
+        self.trades = trades
+        self.portfolio = portfolio
+        self.backend = backend
+
+    def transaction(self):
+        """
+        Context manager: the writes made inside are persisted together or
+        not at all (no-op for the memory backend). Used for each fill.
+        """
+        return nullcontext()
+
+    async def read(self, fn, *args, **kwargs):
+        """
+        Run a store read for the API. Database backends run it in a thread
+        so the event loop never waits on disk.
+        """
+        return fn(*args, **kwargs)
+
+    def flush(self):
+        """
+        Wait until queued writes are persisted (no-op for the memory backend).
+        """
+
+    def close(self):
+        self.flush()
+
+
+def create_store(backend: Optional[str] = None) -> Store:
+    backend = backend or os.getenv("STORE_BACKEND", "memory")
+    if backend == "memory":
+        from app.store.memory_store import MemoryStore
+        return MemoryStore()
+    if backend == "sqlite":
+        from app.store.sqlite_store import SqliteStore
+        return SqliteStore(os.getenv("SQLITE_PATH", "trading.db"))
+    raise ValueError(f"Unknown STORE_BACKEND: {backend}")
+
+
+_store: Optional[Store] = None
+
+
+def get_store() -> Store:
+    global _store
+    if _store is None:
+        _store = create_store()
+    return _store
+
+
+def set_store(store: Store) -> Optional[Store]:
+    """
+    Swap the active store (tests, benchmarks); returns the previous one.
+    """
+    global _store
+    previous, _store = _store, store
+    return previous
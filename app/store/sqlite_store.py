@@ -0,0 +1,428 @@
+# app/store/sqlite_store.py
+
+import asyncio
+import logging
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+from app.store.instrument_registry import InstrumentRegistry
+from app.store.memory import INSTRUMENTS
+from app.store.records import ORDER_FIELDS, TRADE_FIELDS, order_from_row, order_row, to_iso, trade_from_row, trade_row
+from app.store.repository import (
+    InstrumentRepository,
+    OrderRepository,
+    PortfolioRepository,
+    Store,
+    TradeRepository,
+)
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS instruments (
+    symbol TEXT PRIMARY KEY,
+    exchange TEXT NOT NULL,
+    instrument_type TEXT NOT NULL,
+    last_traded_price REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS orders (
+    order_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    order_type TEXT NOT NULL,
+    order_style TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    price REAL,
+    state TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    executed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS orders_user_state ON orders (user_id, state);
+CREATE INDEX IF NOT EXISTS orders_symbol_state ON orders (symbol, state);
+CREATE INDEX IF NOT EXISTS orders_state_style ON orders (state, order_style);
+CREATE TABLE IF NOT EXISTS trades (
+    seq INTEGER PRIMARY KEY,
+    trade_id TEXT NOT NULL UNIQUE,
+    order_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    price REAL NOT NULL,
+    side TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trades_user ON trades (user_id, seq);
+CREATE INDEX IF NOT EXISTS trades_user_symbol ON trades (user_id, symbol, seq);
+CREATE INDEX IF NOT EXISTS trades_symbol ON trades (symbol, seq);
+CREATE TABLE IF NOT EXISTS holdings (
+    user_id TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    avg_price REAL NOT NULL,
+    realized_pnl REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, symbol)
+);
+"""
+
+# Statements are module constants so sqlite3's per-connection statement
+# cache always hits and they are prepared once.
+INSERT_INSTRUMENT = (
+    "INSERT INTO instruments (symbol, exchange, instrument_type, last_traded_price) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT (symbol) DO UPDATE SET exchange = excluded.exchange, "
+    "instrument_type = excluded.instrument_type, last_traded_price = excluded.last_traded_price"
+)
+UPDATE_LTP = "UPDATE instruments SET last_traded_price = ? WHERE symbol = ?"
+SELECT_INSTRUMENTS = "SELECT symbol, exchange, instrument_type, last_traded_price FROM instruments"
+
+# Timestamps are stored as ISO TEXT; rows are converted to and from the
+# engine's epoch-ns dicts by records.py
+ORDER_COLUMNS = ORDER_FIELDS
+INSERT_ORDER = f"INSERT INTO orders ({', '.join(ORDER_COLUMNS)}) VALUES ({', '.join('?' * len(ORDER_COLUMNS))})"
+UPDATE_ORDER = "UPDATE orders SET state = ?, executed_at = ? WHERE order_id = ?"
+SELECT_ORDER = f"SELECT {', '.join(ORDER_COLUMNS)} FROM orders WHERE order_id = ?"
+SELECT_OPEN_LIMIT_ORDERS = f"SELECT {', '.join(ORDER_COLUMNS)} FROM orders WHERE state = 'PLACED' AND order_style = 'LIMIT'"
+
+TRADE_COLUMNS = TRADE_FIELDS
+INSERT_TRADE = f"INSERT INTO trades (seq, {', '.join(TRADE_COLUMNS)}) VALUES (?, {', '.join('?' * len(TRADE_COLUMNS))})"
+SELECT_TRADE_SEQ = "SELECT seq FROM trades WHERE trade_id = ?"
+SELECT_MAX_TRADE_SEQ = "SELECT COALESCE(MAX(seq), 0) FROM trades"
+
+SELECT_ALL_HOLDINGS = "SELECT user_id, symbol, quantity, avg_price, realized_pnl FROM holdings"
+UPSERT_HOLDING = (
+    "INSERT INTO holdings (user_id, symbol, quantity, avg_price, realized_pnl) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (user_id, symbol) DO UPDATE SET quantity = excluded.quantity, "
+    "avg_price = excluded.avg_price, realized_pnl = excluded.realized_pnl"
+)
+
+
+class SqliteDatabase:
+    """
+    WAL-mode database with one writer thread, so no commit runs on the
+    event loop.
+
+    Writes are queued as units: a single statement, or every statement
+    issued inside `transaction()` (one fill's order update, trade insert
+    and holding upsert). A unit is committed whole or not at all. The
+    writer commits everything queued since its last commit in one
+    transaction (group commit).
+
+    Reads use a second connection and first wait until the writes queued
+    before them are committed, so callers always see their own writes.
+    Store.read() runs them in a thread for the API.
+    """
+
+    def __init__(self, path: str):
+        self.conn = self._connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.reader = self._connect(path)
+        self.lock = threading.Lock()
+        # Statements of the open transaction() block, if any
+        self._unit: Optional[List[tuple]] = None
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._submitted = 0
+        self._committed = 0
+        self._done = threading.Condition()
+        self._writer = threading.Thread(target=self._write_loop, name="sqlite-writer", daemon=True)
+        self._writer.start()
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, cached_statements=256)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def write(self, sql: str, params=()):
+        self.write_many(sql, (params,))
+
+    def write_many(self, sql: str, rows: Iterable[tuple]):
+        statement = (sql, list(rows))
+        if self._unit is not None:
+            self._unit.append(statement)
+        else:
+            self._submit([statement])
+
+    @contextmanager
+    def transaction(self):
+        """
+        Queue every write made inside the block as one unit. Nested blocks
+        join the outer one; on an exception nothing is written.
+        """
+        if self._unit is not None:
+            yield
+            return
+        self._unit = []
+        try:
+            yield
+            unit = self._unit
+        finally:
+            self._unit = None
+        if unit:
+            self._submit(unit)
+
+    def sync(self):
+        """
+        Block until every write queued so far is committed.
+        """
+        target = self._submitted
+        with self._done:
+            self._done.wait_for(lambda: self._committed >= target)
+
+    def query(self, sql: str, params=()) -> List[tuple]:
+        self.sync()
+        with self.lock:
+            return self.reader.execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params=()) -> Optional[tuple]:
+        self.sync()
+        with self.lock:
+            return self.reader.execute(sql, params).fetchone()
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join()
+        self.conn.close()
+        self.reader.close()
+
+    def _submit(self, unit: List[tuple]):
+        self._submitted += 1
+        self._queue.put(unit)
+
+    def _write_loop(self):
+        while True:
+            units = [self._queue.get()]
+            while True:
+                try:
+                    units.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in units
+            units = [u for u in units if u is not None]
+            try:
+                self._commit(units)
+            except sqlite3.Error:
+                # One bad unit must not take the rest of the group with it
+                for unit in units:
+                    try:
+                        self._commit([unit])
+                    except sqlite3.Error:
+                        logger.exception("SQLite write failed; unit dropped")
+            with self._done:
+                self._committed += len(units)
+                self._done.notify_all()
+            if stop:
+                return
+
+    def _commit(self, units: List[List[tuple]]):
+        if not units:
+            return
+        self.conn.execute("BEGIN")
+        try:
+            for unit in units:
+                for sql, rows in unit:
+                    self.conn.executemany(sql, rows)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+
+class SqliteInstrumentRepository(InstrumentRepository):
+    """
+    Write-through: the master is small and read on every order, so reads
+    are served from an in-memory InstrumentRegistry and writes go to both.
+    """
+
+    def __init__(self, db: SqliteDatabase):
+        self.db = db
+        self.cache = InstrumentRegistry()
+        rows = db.query(SELECT_INSTRUMENTS)
+        if rows:
+            self.cache.load(
+                {"symbol": r[0], "exchange": r[1], "instrument_type": r[2], "last_traded_price": r[3]}
+                for r in rows
+            )
+        else:
+            self.load(INSTRUMENTS)
+
+    @property
+    def version(self) -> int:
+        return self.cache.version
+
+    @property
+    def master_version(self) -> int:
+        return self.cache.master_version
+
+    def get(self, symbol: str) -> Optional[dict]:
+        return self.cache.get(symbol)
+
+    def list(self, exchange=None, instrument_type=None, offset=0, limit=None) -> List[dict]:
+        return self.cache.list(exchange=exchange, instrument_type=instrument_type, offset=offset, limit=limit)
+
+    def load(self, instruments: Iterable[dict]) -> int:
+        added = [self.cache.add(inst) for inst in instruments]
+        self.db.write_many(INSERT_INSTRUMENT, (
+            (i["symbol"], i["exchange"], i["instrument_type"], i["last_traded_price"]) for i in added
+        ))
+        return len(added)
+
+    def load_file(self, path: str) -> int:
+        loader = InstrumentRegistry()
+        loader.load_file(path)
+        return self.load(loader)
+
+    def set_last_traded_price(self, symbol: str, price: float) -> Optional[dict]:
+        inst = self.cache.set_last_traded_price(symbol, price)
+        if inst is not None:
+            self.db.write(UPDATE_LTP, (inst["last_traded_price"], inst["symbol"]))
+        return inst
+
+    def set_last_traded_prices(self, prices: Dict[str, float]) -> List[dict]:
+        updated = self.cache.set_last_traded_prices(prices)
+        if updated:
+            self.db.write_many(UPDATE_LTP, ((i["last_traded_price"], i["symbol"]) for i in updated))
+        return updated
+
+
+class SqliteOrderRepository(OrderRepository):
+    def __init__(self, db: SqliteDatabase):
+        self.db = db
+        # Identity map of PLACED orders: the book and the API share one dict.
+        # Read once when the store opens, so the engine never queries for them.
+        self._live: Dict[str, dict] = {row[0]: order_from_row(row) for row in db.query(SELECT_OPEN_LIMIT_ORDERS)}
+
+    def add(self, order: dict):
+        self.db.write(INSERT_ORDER, order_row(order))
+        if order["state"] == "PLACED":
+            self._live[order["order_id"]] = order
+
+    def get(self, order_id: str) -> Optional[dict]:
+        order = self._live.get(order_id)
+        if order is not None:
+            return order
+        row = self.db.query_one(SELECT_ORDER, (order_id,))
+        return order_from_row(row) if row else None
+
+    async def lookup(self, order_id: str) -> Optional[dict]:
+        order = self._live.get(order_id)
+        if order is not None:
+            return order
+        return await asyncio.to_thread(self.get, order_id)
+
+    def update(self, order: dict):
+        self.db.write(UPDATE_ORDER, (order["state"], to_iso(order["executed_at"]), order["order_id"]))
+        if order["state"] != "PLACED":
+            self._live.pop(order["order_id"], None)
+
+    def open_limit_orders(self) -> List[dict]:
+        return [o for o in self._live.values() if o["order_style"] == "LIMIT"]
+
+
+class SqliteTradeRepository(TradeRepository):
+    """
+    Seqs are assigned here, so a queued trade already has its final seq.
+    """
+
+    def __init__(self, db: SqliteDatabase):
+        self.db = db
+        self._last_seq = db.query_one(SELECT_MAX_TRADE_SEQ)[0]
+
+    def append(self, trade: dict) -> int:
+        self._last_seq += 1
+        self.db.write(INSERT_TRADE, (self._last_seq, *trade_row(trade)))
+        return self._last_seq
+
+    def page(self, user_id=None, symbol=None, after=None, since=None, until=None, limit=100, after_seq=None) -> List[dict]:
+        clauses, params = [], []
+        if user_id is not None:
+            clauses.append("user_id = ?")
+            params.append(user_id)
+        if symbol is not None:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+        if after is not None:
+            row = self.db.query_one(SELECT_TRADE_SEQ, (after,))
+            if row is None:
+                raise KeyError(after)
+            clauses.append("seq > ?")
+            params.append(row[0])
+        if after_seq is not None:
+            clauses.append("seq > ?")
+            params.append(after_seq)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(to_iso(since))
+        if until is not None:
+            clauses.append("timestamp <= ?")
+            params.append(to_iso(until))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT {', '.join(TRADE_COLUMNS)} FROM trades{where} ORDER BY seq LIMIT ?"
+        params.append(limit)
+        return [trade_from_row(row) for row in self.db.query(sql, params)]
+
+
+class SqlitePortfolioRepository(PortfolioRepository):
+    """
+    Write-through like the instruments: every holding is read when the
+    store opens and then served from memory, so the engine (fills, risk
+    and valuation loads) never queries the database.
+    """
+
+    def __init__(self, db: SqliteDatabase):
+        self.db = db
+        # user_id -> symbol -> holding
+        self._users: Dict[str, Dict[str, dict]] = {}
+        for user_id, symbol, quantity, avg_price, realized_pnl in db.query(SELECT_ALL_HOLDINGS):
+            self._users.setdefault(user_id, {})[symbol] = {
+                "quantity": quantity, "avg_price": avg_price, "realized_pnl": realized_pnl,
+            }
+
+    def holdings(self, user_id: str) -> Dict[str, dict]:
+        return {symbol: dict(h) for symbol, h in self._holdings(user_id).items()}
+
+    def get(self, user_id: str, symbol: str) -> Optional[dict]:
+        holding = self._holdings(user_id).get(symbol)
+        return dict(holding) if holding is not None else None
+
+    def put(self, user_id: str, symbol: str, holding: dict):
+        holding = {
+            "quantity": holding["quantity"],
+            "avg_price": holding["avg_price"],
+            "realized_pnl": holding.get("realized_pnl", 0.0),
+        }
+        self._holdings(user_id)[symbol] = holding
+        self.db.write(UPSERT_HOLDING, (
+            user_id, symbol, holding["quantity"], holding["avg_price"], holding["realized_pnl"]
+        ))
+
+    def _holdings(self, user_id: str) -> Dict[str, dict]:
+        holdings = self._users.get(user_id)
+        if holdings is None:
+            holdings = self._users[user_id] = {}
+        return holdings
+
+
+class SqliteStore(Store):
+    def __init__(self, path: str):
+        self.db = SqliteDatabase(path)
+        super().__init__(
+            instruments=SqliteInstrumentRepository(self.db),
+            orders=SqliteOrderRepository(self.db),
+            trades=SqliteTradeRepository(self.db),
+            portfolio=SqlitePortfolioRepository(self.db),
+            backend="sqlite",
+        )
+
+    def transaction(self):
+        return self.db.transaction()
+
+    async def read(self, fn, *args, **kwargs):
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+    def flush(self):
+        self.db.sync()
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,107 @@
+# app/store/trade_log.py
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.store.records import Id, Timestamp, TradeRecord, pack_id, to_ns
+from app.store.repository import TradeRepository
+
+
+class TradeLog(TradeRepository):
+    """
+    Append-only trade history with per-user, per-symbol and per-(user, symbol)
+    indexes.
+
+    Behaves like the plain list it replaces (append / iterate / len / clear),
+    and adds `page()`, whose cost depends on the page size rather than on
+    the total number of trades. Trades are appended in execution order, so
+    every index is sorted by both arrival and timestamp and can be bisected.
+
+    Trades are kept as compact `TradeRecord`s; reads return fresh dicts.
+    """
+
+    def __init__(self):
+        self._trades: List[TradeRecord] = []
+        self._by_user: Dict[str, List[TradeRecord]] = {}
+        self._by_symbol: Dict[str, List[TradeRecord]] = {}
+        self._by_user_symbol: Dict[Tuple[str, str], List[TradeRecord]] = {}
+        # packed trade_id -> position in the global log, used to resolve cursors
+        self._position: Dict[Id, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._trades)
+
+    def __iter__(self) -> Iterator[dict]:
+        return (record.to_dict() for record in self._trades)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [record.to_dict() for record in self._trades[index]]
+        return self._trades[index].to_dict()
+
+    def append(self, trade: dict) -> int:
+        return self.append_record(TradeRecord.from_dict(trade))
+
+    def append_record(self, record: TradeRecord) -> int:
+        self._position[record.trade_id] = len(self._trades)
+        self._trades.append(record)
+        user_id = record.user_id
+        symbol = record.symbol
+        self._by_user.setdefault(user_id, []).append(record)
+        self._by_symbol.setdefault(symbol, []).append(record)
+        self._by_user_symbol.setdefault((user_id, symbol), []).append(record)
+        return len(self._trades)
+
+    def records(self) -> List[TradeRecord]:
+        """
+        The log itself, oldest first; only ever appended to until `clear`.
+        """
+        return self._trades
+
+    def clear(self):
+        self._trades.clear()
+        self._by_user.clear()
+        self._by_symbol.clear()
+        self._by_user_symbol.clear()
+        self._position.clear()
+
+    def get(self, trade_id: str) -> Optional[dict]:
+        position = self._position.get(pack_id(trade_id))
+        return None if position is None else self._trades[position].to_dict()
+
+    def page(
+        self,
+        user_id: Optional[str] = None,
+        symbol: Optional[str] = None,
+        after: Optional[str] = None,
+        since: Timestamp = None,
+        until: Timestamp = None,
+        limit: int = 100,
+        after_seq: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        Return up to `limit` trades, oldest first, strictly after the trade
+        `after` (and with seq above `after_seq`) and with
+        `since <= timestamp <= until` (epoch ns, or ISO strings).
+        Raises KeyError if `after` is not a known trade_id.
+        """
+        if user_id is not None and symbol is not None:
+            rows = self._by_user_symbol.get((user_id, symbol), [])
+        elif user_id is not None:
+            rows = self._by_user.get(user_id, [])
+        elif symbol is not None:
+            rows = self._by_symbol.get(symbol, [])
+        else:
+            rows = self._trades
+
+        start, end = 0, len(rows)
+        if after is not None:
+            position = self._position[pack_id(after)]
+            start = bisect_right(rows, position, key=lambda t: self._position[t.trade_id])
+        if after_seq is not None:
+            # seq is the 1-based position in the global log
+            start = max(start, bisect_left(rows, after_seq, key=lambda t: self._position[t.trade_id]))
+        if since is not None:
+            start = max(start, bisect_left(rows, to_ns(since), key=lambda t: t.timestamp))
+        if until is not None:
+            end = bisect_right(rows, to_ns(until), key=lambda t: t.timestamp)
+        return [record.to_dict() for record in rows[start:min(end, start + limit)]]
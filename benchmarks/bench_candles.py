@@ -0,0 +1,63 @@
+# benchmarks/bench_candles.py
+"""
+Candle aggregation cost.
+
+Feeds `--trades` trades over `--symbols` symbols into a CandleAggregator
+(one trade per symbol per simulated 100 ms, so bars roll and close) and
+reports the per-trade update cost, then the latency of reading the last
+10 / 100 / max bars, to show reads scale with `limit` and not with
+history. Prints the column backend (NumPy or stdlib array) and the memory
+held per symbol.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_candles --trades 1000000 --symbols 100
+"""
+import argparse
+import time
+import tracemalloc
+
+from app.services import candles as candles_module
+from app.services.candles import CANDLE_HISTORY, CandleAggregator
+
+NS = 1_000_000_000
+
+
+def feed(agg: CandleAggregator, n: int, symbols: int) -> float:
+    names = [f"SYM{i}" for i in range(symbols)]
+    t0 = 1_700_000_000 * NS
+    start = time.perf_counter()
+    for i in range(n):
+        step = i // symbols
+        agg.on_trade(names[i % symbols], 100.0 + (step % 50) * 0.05, 1 + i % 7, t0 + step * NS // 10)
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trades", type=int, default=1_000_000)
+    parser.add_argument("--symbols", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"columns: {'numpy' if candles_module.numpy is not None else 'array'}, history {CANDLE_HISTORY}")
+    agg = CandleAggregator()
+    agg.close_due = lambda now_ns=None: 0  # no sweeper; bars close on roll
+    per_trade = feed(agg, args.trades, args.symbols)
+    print(f"{args.trades} trades, {args.symbols} symbols: {per_trade * 1e6:.2f} us/trade (1s/1m/5m updated)")
+
+    for limit in (10, 100, max(CANDLE_HISTORY.values())):
+        n = 20_000
+        start = time.perf_counter()
+        for _ in range(n):
+            agg.candles("SYM0", "1s", limit)
+        print(f"  read limit={limit:<4} {(time.perf_counter() - start) / n * 1e6:8.1f} us")
+
+    tracemalloc.start()
+    one = CandleAggregator()
+    one.on_trade("X", 1.0, 1, 0)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  memory per symbol ~{size / 1024:.1f} KiB (fixed once created)")
+
+
+if __name__ == "__main__":
+    main()
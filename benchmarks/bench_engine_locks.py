@@ -0,0 +1,148 @@
+# benchmarks/bench_engine_locks.py
+"""
+Stress benchmark for the execution engine's per-symbol / per-user locks.
+
+Fires a burst of MARKET orders spread over many users and symbols through
+`execute_if_possible` and compares three runs:
+
+    serial       one order at a time (reference final state)
+    global-lock  concurrent, every fill behind one process-wide lock
+                 (the old ENGINE_LOCK behaviour)
+    partitioned  concurrent, the engine's real symbol/user lock ordering
+
+`--hold-ms` simulates I/O done while the locks are held (e.g. a durable
+write); with it, independent symbols overlap only in the partitioned run.
+The final PORTFOLIO of each concurrent run must match the serial one.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_engine_locks --orders 20000 --symbols 50 --users 200 --hold-ms 1
+"""
+import argparse
+import asyncio
+import copy
+import time
+from contextlib import asynccontextmanager
+
+from app.services import execution_engine, locks
+from app.store import memory
+from app.store.instrument_registry import registry
+
+
+def make_orders(n_orders: int, symbols, users):
+    orders = []
+    for i in range(n_orders):
+        orders.append({
+            "order_id": f"o{i}",
+            "symbol": symbols[i % len(symbols)],
+            "order_type": "BUY" if (i // len(symbols)) % 3 else "SELL",
+            "order_style": "MARKET",
+            "quantity": 1 + i % 7,
+            "price": None,
+            "state": "PLACED",
+            "created_at": 0,
+            "executed_at": None,
+            "user_id": users[(i * 7919) % len(users)],
+        })
+    return orders
+
+
+def reset_state():
+    memory.ORDERS.clear()
+    memory.ARCHIVED_ORDERS.clear()
+    memory.TRADES.clear()
+    memory.PORTFOLIO.clear()
+    locks.SYMBOL_LOCKS.clear()
+    locks.USER_LOCKS.clear()
+
+
+def install_locks(mode: str, hold_s: float):
+    """
+    Swap the engine's lock context manager for the run; returns a stats dict
+    tracking the peak number of fills inside the critical section at once.
+    """
+    stats = {"inside": 0, "peak": 0}
+    global_lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def instrumented(symbols, users):
+        if mode == "global-lock":
+            await global_lock.acquire()
+            held = None
+        else:
+            held = locks.order_locks(symbols, users)
+            await held.__aenter__()
+        stats["inside"] += 1
+        stats["peak"] = max(stats["peak"], stats["inside"])
+        try:
+            if hold_s:
+                await asyncio.sleep(hold_s)
+            yield
+        finally:
+            stats["inside"] -= 1
+            if held is None:
+                global_lock.release()
+            else:
+                await held.__aexit__(None, None, None)
+
+    execution_engine.order_locks = instrumented
+    return stats
+
+
+async def run(mode: str, orders, hold_s: float, concurrency: int):
+    reset_state()
+    stats = install_locks(mode, hold_s)
+    orders = copy.deepcopy(orders)
+    start = time.perf_counter()
+    if mode == "serial":
+        for order in orders:
+            await execution_engine.execute_if_possible(order)
+    else:
+        sem = asyncio.Semaphore(concurrency)
+
+        async def submit(order):
+            async with sem:
+                await execution_engine.execute_if_possible(order)
+
+        await asyncio.gather(*(submit(o) for o in orders))
+    elapsed = time.perf_counter() - start
+    return elapsed, stats["peak"], copy.deepcopy(memory.PORTFOLIO), len(memory.TRADES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--hold-ms", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, default=1000)
+    args = parser.parse_args()
+
+    symbols = [f"BENCH{i}" for i in range(args.symbols)]
+    for i, symbol in enumerate(symbols):
+        registry.add({"symbol": symbol, "exchange": "NSE", "instrument_type": "EQ", "last_traded_price": 100.0 + i})
+    users = [f"user{i}" for i in range(args.users)]
+    orders = make_orders(args.orders, symbols, users)
+    hold_s = args.hold_ms / 1000.0
+    original = execution_engine.order_locks
+
+    async def bench():
+        results = {}
+        for mode in ("serial", "global-lock", "partitioned"):
+            results[mode] = await run(mode, orders, hold_s, args.concurrency)
+        return results
+
+    try:
+        results = asyncio.run(bench())
+    finally:
+        execution_engine.order_locks = original
+
+    reference = results["serial"][2]
+    print(f"{args.orders} orders, {args.symbols} symbols, {args.users} users, hold {args.hold_ms} ms")
+    print(f"{'mode':<12} {'seconds':>9} {'orders/s':>10} {'peak fills':>11} {'trades':>7}  portfolio")
+    for mode, (elapsed, peak, portfolio, trades) in results.items():
+        same = "identical" if portfolio == reference else "MISMATCH"
+        print(f"{mode:<12} {elapsed:>9.3f} {args.orders / elapsed:>10.0f} {peak:>11} {trades:>7}  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# benchmarks/bench_journal_replay.py
+"""
+Replay-time benchmark for the write-ahead journal.
+
+Writes a synthetic journal of `--events` records (order placements, fills
+and cancels spread over users/symbols), optionally snapshots part of it,
+then measures how long `persistence.replay` takes to rebuild the store.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_journal_replay --events 10000000
+    python -m benchmarks.bench_journal_replay --events 1000000 --snapshot-at 0.8
+
+10M events keep ~5M orders and trades in memory; expect several GB of RAM.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from app.services import order_book, persistence
+from app.store import journal, memory
+
+SEGMENT_EVENTS = 1_000_000
+
+
+def generate(directory: Path, n_events: int, users: int, symbols: int):
+    """
+    Write `n_events` journal records straight to segment files.
+    Roughly: 45% MARKET orders + their fills, 10% LIMIT orders, some cancelled.
+    """
+    fh = None
+    seq = 0
+    i = 0
+    while seq < n_events:
+        if seq % SEGMENT_EVENTS == 0 or fh is None:
+            if fh is not None:
+                fh.close()
+            fh = journal.segment_path(directory, seq + 1).open("wb")
+        order_id = f"o{i}"
+        symbol = f"SYM{i % symbols}"
+        user_id = f"user{(i * 7919) % users}"
+        limit = i % 10 == 0
+        order = {
+            "order_id": order_id,
+            "symbol": symbol,
+            "order_type": "BUY" if i % 3 else "SELL",
+            "order_style": "LIMIT" if limit else "MARKET",
+            "quantity": 1 + i % 9,
+            "price": 100.0 if limit else None,
+            "state": "PLACED",
+            "created_at": 1767258900_000000000,
+            "executed_at": None,
+            "user_id": user_id,
+        }
+        seq += 1
+        fh.write(journal.encode_record(seq, journal.ORDER, order))
+        if seq < n_events:
+            seq += 1
+            if limit:
+                fh.write(journal.encode_record(seq, journal.CANCEL, {"order_id": order_id}))
+            else:
+                trade = {
+                    "trade_id": f"t{i}",
+                    "order_id": order_id,
+                    "symbol": symbol,
+                    "quantity": order["quantity"],
+                    "price": 100.0 + i % 50,
+                    "side": order["order_type"],
+                    "timestamp": 1767258900_000001000,
+                    "user_id": user_id,
+                }
+                fh.write(journal.encode_record(seq, journal.TRADE, trade))
+        i += 1
+    fh.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--snapshot-at", type=float, default=0.0,
+                        help="fraction of the journal to fold into a snapshot first (0 = journal only)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        t0 = time.perf_counter()
+        generate(directory, args.events, args.users, args.symbols)
+        size = sum(p.stat().st_size for _, p in journal.list_segments(directory))
+        print(f"wrote {args.events} events ({size / 1e6:.1f} MB) in {time.perf_counter() - t0:.1f}s")
+
+        if args.snapshot_at:
+            cut = int(args.events * args.snapshot_at)
+            for seq, kind, body in journal.read_records(directory):
+                if seq > cut:
+                    break
+                persistence.apply_event(kind, body)
+            journal.write_snapshot(directory, cut, *persistence.capture_state())
+            memory.ORDERS.clear()
+            memory.ARCHIVED_ORDERS.clear()
+            memory.TRADES.clear()
+            memory.PORTFOLIO.clear()
+            order_book.BOOKS.clear()
+            print(f"snapshot at seq {cut}")
+
+        t0 = time.perf_counter()
+        seq = persistence.replay(tmp)
+        elapsed = time.perf_counter() - t0
+        print(f"replayed to seq {seq} in {elapsed:.2f}s ({args.events / elapsed:,.0f} events/s)")
+        print(f"orders={len(memory.ORDERS) + len(memory.ARCHIVED_ORDERS)} trades={len(memory.TRADES)} users={len(memory.PORTFOLIO)}")
+
+
+if __name__ == "__main__":
+    main()
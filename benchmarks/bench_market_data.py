@@ -0,0 +1,85 @@
+# benchmarks/bench_market_data.py
+"""
+In-process throughput benchmark for market data ingestion.
+
+Loads `--symbols` synthetic instruments, rests `--orders` LIMIT orders
+around their prices, then feeds `--ticks` random-walk ticks through the
+pipeline with the matcher loop and the conflation flush running, and
+reports sustained ticks/s plus how many resting orders filled.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_market_data --ticks 2000000 --symbols 500
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from app.services import limit_matcher
+from app.services.market_data import MarketDataPipeline, random_walk
+from app.store import memory
+from app.store.repository import get_store
+
+
+def seed(symbols: int, orders: int):
+    instruments = get_store().instruments
+    names = [f"SYM{i}" for i in range(symbols)]
+    instruments.load(
+        {"symbol": s, "exchange": "NSE", "instrument_type": "EQ", "last_traded_price": 1000.0}
+        for s in names
+    )
+    rng = random.Random(1)
+    for i in range(orders):
+        side = "BUY" if i % 2 else "SELL"
+        # BUYs below and SELLs above the start price, so only a move fills them
+        offset = rng.uniform(0.5, 20.0)
+        order = {
+            "order_id": f"o{i}",
+            "symbol": names[i % symbols],
+            "order_type": side,
+            "order_style": "LIMIT",
+            "quantity": 1,
+            "price": round(1000.0 - offset if side == "BUY" else 1000.0 + offset, 2),
+            "state": "PLACED",
+            "created_at": "2026-01-01T09:15:00",
+            "executed_at": None,
+            "user_id": f"user{i % 100}",
+        }
+        memory.ORDERS[order["order_id"]] = order
+        limit_matcher.rest_order(order)
+    return names
+
+
+async def run(args):
+    names = seed(args.symbols, args.orders)
+    pipeline = MarketDataPipeline(conflation_interval=0.1)
+    matcher = asyncio.create_task(limit_matcher.matcher_loop())
+    await asyncio.sleep(0)
+
+    t0 = time.perf_counter()
+    await pipeline.start(random_walk(symbols=names, batch_size=args.batch_size, total=args.ticks,
+                                     volatility=0.002, seed=42))
+    await pipeline._tasks[0]
+    elapsed = time.perf_counter() - t0
+    await pipeline.stop()
+    matcher.cancel()
+
+    stats = pipeline.stats()
+    filled = sum(1 for o in memory.ARCHIVED_ORDERS if o["state"] == "EXECUTED")
+    print(f"{stats['ticks']} ticks in {elapsed:.2f}s ({stats['ticks'] / elapsed:,.0f} ticks/s)")
+    print(f"batches={stats['batches']} ltp_updates={stats['updates']} ws_ticks={stats['published']}")
+    print(f"limit orders filled: {filled}/{args.orders}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ticks", type=int, default=2_000_000)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--orders", type=int, default=10_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# benchmarks/bench_multiprocess.py
+"""
+Local multi-process throughput benchmark for order placement.
+
+Compares two deployments on this machine:
+
+    embedded   one `uvicorn app.main:app` process (engine in-process)
+    workers    `python -m app.engine` + `ENGINE_MODE=client uvicorn --workers N`
+
+Load comes from `--clients` generator processes, each holding a keep-alive
+connection and placing MARKET orders for `--seconds`.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_multiprocess --workers 4 --clients 16 --seconds 10
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+API_KEYS = ["demo-key", "alice-key", "bob-key"]
+SYMBOLS = ["RELIANCE", "TCS", "INFY"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(base_url: str, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(base_url + "/").status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not start")
+
+
+def generate_load(base_url: str, seconds: float, index: int, results):
+    headers = {"x-api-key": API_KEYS[index % len(API_KEYS)]}
+    done = errors = 0
+    with httpx.Client(base_url=base_url, headers=headers) as client:
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            payload = {"symbol": SYMBOLS[done % len(SYMBOLS)], "order_type": "BUY",
+                       "order_style": "MARKET", "quantity": 1}
+            r = client.post("/api/v1/orders", json=payload)
+            if r.status_code == 200:
+                done += 1
+            else:
+                errors += 1
+    results.put((done, errors))
+
+
+def run_load(base_url: str, clients: int, seconds: float):
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=generate_load, args=(base_url, seconds, i, results))
+             for i in range(clients)]
+    for p in procs:
+        p.start()
+    totals = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return sum(t[0] for t in totals), sum(t[1] for t in totals)
+
+
+def start(cmd, env):
+    return subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def stop(*procs):
+    for p in procs:
+        p.terminate()
+    for p in procs:
+        p.wait(timeout=10)
+
+
+def bench(mode: str, args) -> float:
+    env = dict(os.environ)
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    uvicorn = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"]
+    procs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        if mode == "workers":
+            env["ENGINE_MODE"] = "client"
+            env["ENGINE_SOCKET"] = os.path.join(tmp, "engine.sock")
+            procs.append(start([sys.executable, "-m", "app.engine"], env))
+            uvicorn += ["--workers", str(args.workers)]
+        procs.append(start(uvicorn, env))
+        try:
+            wait_until_up(base_url)
+            done, errors = run_load(base_url, args.clients, args.seconds)
+        finally:
+            stop(*reversed(procs))
+    rate = done / args.seconds
+    print(f"{mode:<9} orders={done:<8} errors={errors:<5} {rate:>9.0f} orders/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    embedded = bench("embedded", args)
+    workers = bench("workers", args)
+    print(f"speedup with {args.workers} workers: {workers / embedded:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+# benchmarks/bench_order_path.py
+"""
+Load generator and latency benchmark for the order -> fill -> broadcast path.
+
+Drives the ASGI `app` in-process (default) or a live local uvicorn (`--live`)
+with a seeded mix of MARKET, LIMIT and cancel requests from `--users` users over
+`--symbols` symbols, `--concurrency` requests in flight. `--listeners` WebSocket
+clients follow the public trade tape of every benchmarked symbol, and each user
+has a private listener for its own fills.
+
+Reported latencies (ms, with count/mean/p50/p99/p999/max):
+
+    market, limit, cancel   request sent -> response received, per kind
+    placement               market + limit
+    fill                    request sent -> owner's listener receives the trade
+    broadcast               trade published -> each tape listener receives it
+                            (live mode: from request sent, as the server's
+                            publish time is not visible to the client)
+
+LIMIT orders are marketable with probability `--marketable` (they fill at
+once); the rest rest 10% away from the LTP and are what cancels target.
+In-process, listeners are stand-in sockets fed by the real Broadcaster, so
+delivery covers queueing and the writer task but not the network.
+
+Results can be written as JSON (`--output`) and compared against a stored
+result (`--baseline`): throughput may not drop, and p50/p99 may not rise, by
+more than `--tolerance`; the exit status is 1 on a regression.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_order_path --orders 5000 --output /tmp/run.json
+    python -m benchmarks.bench_order_path --live --baseline /tmp/run.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.core import auth
+from app.main import app
+from app.services.broadcaster import broadcaster, trades_topic, user_topic
+from app.services.market_data import pipeline, random_walk
+from benchmarks.bench_multiprocess import free_port, start, stop, wait_until_up
+
+KINDS = ("market", "limit", "cancel")
+# Metrics where a larger value is better; all others are latencies
+HIGHER_IS_BETTER = {"throughput_rps"}
+
+
+def summarize(samples: List[float]) -> dict:
+    """
+    count/mean/p50/p99/p999/max of `samples` (seconds), in milliseconds.
+    """
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    n = len(ordered)
+
+    def pct(q: float) -> float:
+        return ordered[min(n - 1, int(q * n))] * 1000
+
+    return {
+        "count": n,
+        "mean": sum(ordered) / n * 1000,
+        "p50": pct(0.50),
+        "p99": pct(0.99),
+        "p999": pct(0.999),
+        "max": ordered[-1] * 1000,
+    }
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in KINDS:
+            raise ValueError(f"Unknown order kind in mix: {kind}")
+        mix[kind] = float(weight)
+    return mix
+
+
+class _Listener:
+    """
+    Stands in for a WebSocket client in-process; the Broadcaster's writer
+    task delivers to `send_text`.
+    """
+
+    def __init__(self):
+        self.received = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload: str):
+        self.received.append((time.perf_counter(), payload))
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+class OrderPathBench:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.mix = parse_mix(args.mix)
+        self.keys: List[str] = []
+        self.symbols: List[str] = []
+        self.ltp: Dict[str, float] = {}
+        # (kind, latency) per successful request
+        self.samples = []
+        self.errors = 0
+        # order_id -> time its request was sent
+        self.sent_at: Dict[str, float] = {}
+        # api key -> ids of resting LIMIT orders, for cancels
+        self.resting: Dict[str, List[str]] = {}
+        # trade_id -> publish time (in-process only)
+        self.published: Dict[str, float] = {}
+        self.private: List = []
+        self.tape: List = []
+
+    # -------- load --------
+    def next_request(self):
+        key = self.rng.choice(self.keys)
+        kind = self.rng.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        if kind == "cancel":
+            if self.resting[key]:
+                return key, kind, self.resting[key].pop(self.rng.randrange(len(self.resting[key]))), None
+            kind = "limit"
+        symbol = self.rng.choice(self.symbols)
+        side = self.rng.choice(("BUY", "SELL"))
+        payload = {"symbol": symbol, "order_type": side, "order_style": kind.upper(), "quantity": 1}
+        if kind == "limit":
+            ltp = self.ltp[symbol]
+            through = self.rng.random() < self.args.marketable
+            up = (side == "BUY") == through
+            payload["price"] = round(ltp * (1.01 if through else 1.1) if up else ltp * (0.99 if through else 0.9), 2)
+        return key, kind, None, payload
+
+    async def worker(self, client: httpx.AsyncClient, remaining: List[int]):
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            # An in-process request can complete without ever suspending; yield
+            # so workers and the broadcaster's writers interleave as with sockets
+            await asyncio.sleep(0)
+            key, kind, order_id, payload = self.next_request()
+            headers = {"x-api-key": key}
+            sent = time.perf_counter()
+            try:
+                if kind == "cancel":
+                    r = await client.post(f"/api/v1/orders/{order_id}/cancel", headers=headers)
+                else:
+                    r = await client.post("/api/v1/orders", json=payload, headers=headers)
+            except httpx.HTTPError:
+                self.errors += 1
+                continue
+            elapsed = time.perf_counter() - sent
+            if r.status_code != 200:
+                self.errors += 1
+                continue
+            self.samples.append((kind, elapsed))
+            if kind != "cancel":
+                order = r.json()
+                self.sent_at[order["order_id"]] = sent
+                if order["state"] == "PLACED":
+                    self.resting[key].append(order["order_id"])
+
+    async def drive(self, client: httpx.AsyncClient) -> float:
+        instruments = (await client.get("/api/v1/instruments")).json()
+        self.symbols = [inst["symbol"] for inst in instruments[: self.args.symbols]]
+        self.ltp = {inst["symbol"]: inst["last_traded_price"] for inst in instruments}
+        remaining = [self.args.orders]
+        started = time.perf_counter()
+        await asyncio.gather(*(self.worker(client, remaining) for _ in range(self.args.concurrency)))
+        return time.perf_counter() - started
+
+    async def drain(self, quiet: float = 0.2, limit: float = 10.0):
+        """
+        Wait until listeners have gone `quiet` seconds without a new message.
+        """
+        deadline = time.perf_counter() + limit
+        last = -1
+        while time.perf_counter() < deadline:
+            total = sum(len(listener.received) for listener in self.private + self.tape)
+            if total == last:
+                return
+            last = total
+            await asyncio.sleep(quiet)
+
+    # -------- in-process --------
+    def _record_publish(self, topic: str, message: dict):
+        if topic.startswith("trades:"):
+            now = time.perf_counter()
+            for trade in message.get("trades") or [message.get("trade")]:
+                self.published[trade["trade_id"]] = now
+
+    async def run_in_process(self) -> float:
+        saved_keys = dict(auth.API_KEYS)
+        users = [f"bench-{i}" for i in range(self.args.users)]
+        for user in users:
+            auth.API_KEYS[f"{user}-key"] = user
+        self.keys = [f"{user}-key" for user in users]
+        self.resting = {key: [] for key in self.keys}
+        broadcaster.add_sink(self._record_publish)
+        try:
+            async with app.router.lifespan_context(app):
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                    symbols = [inst["symbol"] for inst in (await client.get("/api/v1/instruments")).json()]
+                    symbols = symbols[: self.args.symbols]
+                    for user in users:
+                        self.private.append(await self._listen([user_topic(user)]))
+                    for _ in range(self.args.listeners):
+                        self.tape.append(await self._listen([trades_topic(s) for s in symbols]))
+                    if self.args.tick_rate:
+                        await pipeline.start(random_walk(symbols, ticks_per_second=self.args.tick_rate))
+                    try:
+                        elapsed = await self.drive(client)
+                        await self.drain()
+                    finally:
+                        if self.args.tick_rate:
+                            await pipeline.stop()
+                        for listener in self.private + self.tape:
+                            broadcaster.disconnect(listener)
+        finally:
+            broadcaster.remove_sink(self._record_publish)
+            auth.API_KEYS.clear()
+            auth.API_KEYS.update(saved_keys)
+        return elapsed
+
+    async def _listen(self, topics: List[str]) -> _Listener:
+        listener = _Listener()
+        await broadcaster.connect(listener)
+        broadcaster.subscribe(listener, topics)
+        return listener
+
+    # -------- live --------
+    async def run_live(self) -> float:
+        from websockets.asyncio.client import connect
+
+        self.keys = list(auth.API_KEYS)[: self.args.users]
+        if len(self.keys) < self.args.users:
+            print(f"live mode: the server only knows {len(self.keys)} API keys, using those users")
+        self.resting = {key: [] for key in self.keys}
+
+        env = dict(os.environ)
+        if self.args.tick_rate:
+            env["MARKET_DATA_SOURCE"] = f"random:{self.args.tick_rate}"
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+                        "--log-level", "warning"], env)
+        tasks = []
+        try:
+            wait_until_up(base_url)
+            limits = httpx.Limits(max_connections=self.args.concurrency)
+            async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+                symbols = [inst["symbol"] for inst in (await client.get("/api/v1/instruments")).json()]
+                symbols = symbols[: self.args.symbols]
+                url = f"ws://127.0.0.1:{port}/api/v1/ws"
+
+                async def listen(received: list, ready: asyncio.Event, key: Optional[str], topics: List[str]):
+                    headers = {"x-api-key": key} if key else {}
+                    async with connect(url, additional_headers=headers, max_queue=None) as ws:
+                        await ws.send(json.dumps({"action": "subscribe", "topics": topics}))
+                        async for raw in ws:
+                            if not ready.is_set():
+                                ready.set()  # the "subscribed" reply
+                                continue
+                            received.append((time.perf_counter(), raw))
+
+                specs = [(self.private, key, ["orders"]) for key in self.keys]
+                specs += [(self.tape, None, [f"trades:{s}" for s in symbols]) for _ in range(self.args.listeners)]
+                for group, key, topics in specs:
+                    listener, ready = _Listener(), asyncio.Event()
+                    group.append(listener)
+                    tasks.append(asyncio.create_task(listen(listener.received, ready, key, topics)))
+                    await asyncio.wait_for(ready.wait(), 10)
+
+                elapsed = await self.drive(client)
+                await self.drain()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            stop(server)
+        return elapsed
+
+    # -------- results --------
+    def results(self, elapsed: float) -> dict:
+        by_kind = {kind: [lat for k, lat in self.samples if k == kind] for kind in KINDS}
+
+        fills, trade_orders = [], {}
+        for listener in self.private:
+            for received, raw in listener.received:
+                message = json.loads(raw)
+                trades = message.get("trades") or ([message["trade"]] if message.get("type") == "trade" else [])
+                for trade in trades:
+                    trade_orders[trade["trade_id"]] = trade["order_id"]
+                    sent = self.sent_at.get(trade["order_id"])
+                    if sent is not None:
+                        fills.append(received - sent)
+
+        broadcasts = []
+        for listener in self.tape:
+            for received, raw in listener.received:
+                message = json.loads(raw)
+                for trade in message.get("trades") or [message["trade"]]:
+                    if self.published:
+                        origin = self.published.get(trade["trade_id"])
+                    else:
+                        origin = self.sent_at.get(trade_orders.get(trade["trade_id"]))
+                    if origin is not None:
+                        broadcasts.append(received - origin)
+
+        return {
+            "mode": "live" if self.args.live else "in-process",
+            "config": {name: getattr(self.args, name) for name in (
+                "orders", "concurrency", "users", "symbols", "listeners", "mix", "marketable", "tick_rate", "seed")},
+            "duration_s": elapsed,
+            "requests": len(self.samples),
+            "errors": self.errors,
+            "throughput_rps": len(self.samples) / elapsed if elapsed else 0.0,
+            "latency_ms": {
+                "market": summarize(by_kind["market"]),
+                "limit": summarize(by_kind["limit"]),
+                "cancel": summarize(by_kind["cancel"]),
+                "placement": summarize(by_kind["market"] + by_kind["limit"]),
+                "fill": summarize(fills),
+                "broadcast": summarize(broadcasts),
+            },
+        }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    Regressions of `results` against `baseline`, as printable lines.
+    """
+    checks = [("throughput_rps", results["throughput_rps"], baseline["throughput_rps"])]
+    for metric, summary in results["latency_ms"].items():
+        base = baseline["latency_ms"].get(metric, {})
+        for stat in ("p50", "p99"):
+            if stat in summary and stat in base:
+                checks.append((f"{metric}.{stat}", summary[stat], base[stat]))
+
+    regressions = []
+    for name, value, base in checks:
+        if not base:
+            continue
+        change = (value - base) / base
+        worse = -change if name in HIGHER_IS_BETTER else change
+        flag = "REGRESSION" if worse > tolerance else ""
+        print(f"  {name:<20} {base:>10.2f} -> {value:>10.2f}  {change:+7.1%}  {flag}")
+        if flag:
+            regressions.append(f"{name}: {base:.2f} -> {value:.2f} ({change:+.1%})")
+    return regressions
+
+
+def report(results: dict):
+    print(f"{results['mode']}: {results['requests']} requests, {results['errors']} errors, "
+          f"{results['throughput_rps']:.0f} req/s")
+    print(f"  {'latency (ms)':<12} {'count':>7} {'p50':>8} {'p99':>8} {'p999':>8} {'max':>8}")
+    for metric, s in results["latency_ms"].items():
+        if s["count"]:
+            print(f"  {metric:<12} {s['count']:>7} {s['p50']:>8.2f} {s['p99']:>8.2f} {s['p999']:>8.2f} {s['max']:>8.2f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", action="store_true", help="benchmark a local uvicorn instead of the in-process app")
+    parser.add_argument("--orders", type=int, default=5000, help="total requests")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--symbols", type=int, default=3)
+    parser.add_argument("--listeners", type=int, default=4, help="public trade tape WebSocket listeners")
+    parser.add_argument("--mix", default="market=0.5,limit=0.3,cancel=0.2")
+    parser.add_argument("--marketable", type=float, default=0.5, help="share of LIMIT orders priced to fill at once")
+    parser.add_argument("--tick-rate", type=float, default=0.0, help="random-walk ticks per second during the run")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="compare against results JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression (default 20%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    bench = OrderPathBench(args)
+    elapsed = asyncio.run(bench.run_live() if args.live else bench.run_in_process())
+    results = bench.results(elapsed)
+    report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"against {args.baseline} (tolerance {args.tolerance:.0%}):")
+        if (baseline["mode"], baseline["config"]) != (results["mode"], results["config"]):
+            print("  warning: the baseline was run in a different mode or configuration")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("regressions: " + "; ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# benchmarks/bench_records.py
+"""
+Memory and allocation benchmark for trade records.
+
+Builds `--trades` trades three ways and reports, per trade, the bytes still
+allocated (tracemalloc), the number of live allocations (blocks) and the
+build time:
+
+    dict          the previous engine form: str(uuid4()) ids, an ISO
+                  timestamp from datetime.utcnow() and one dict per trade
+    record        TradeRecord: 16-byte ids, epoch-ns int, enum side code
+    trade log     memory.TRADES as the engine fills it: epoch-ns dicts
+                  appended to a TradeLog (records plus its indexes)
+
+Usage (from the repo root):
+    python -m benchmarks.bench_records --trades 1000000
+
+Each build runs twice, once timed and once under tracemalloc; at 1M trades
+the traced passes dominate and the whole run takes several minutes.
+"""
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from uuid import uuid4
+
+from app.store.records import Side, TradeRecord, now_ns
+from app.store.trade_log import TradeLog
+
+SYMBOLS = ("RELIANCE", "TCS", "INFY")
+USERS = tuple(f"user{i}" for i in range(100))
+
+
+def build_dicts(n: int) -> list:
+    return [
+        {
+            "trade_id": str(uuid4()),
+            "order_id": str(uuid4()),
+            "symbol": SYMBOLS[i % 3],
+            "quantity": 1 + i % 9,
+            "price": 100.0 + i % 50,
+            "side": "BUY" if i % 2 else "SELL",
+            "timestamp": datetime.utcnow().isoformat(),
+            "user_id": USERS[i % 100],
+        }
+        for i in range(n)
+    ]
+
+
+def build_records(n: int) -> list:
+    return [
+        TradeRecord(
+            uuid4().bytes,
+            uuid4().bytes,
+            USERS[i % 100],
+            SYMBOLS[i % 3],
+            1 + i % 9,
+            100.0 + i % 50,
+            Side.BUY if i % 2 else Side.SELL,
+            now_ns(),
+        )
+        for i in range(n)
+    ]
+
+
+def build_trade_log(n: int) -> TradeLog:
+    log = TradeLog()
+    for i in range(n):
+        log.append({
+            "trade_id": str(uuid4()),
+            "order_id": str(uuid4()),
+            "symbol": SYMBOLS[i % 3],
+            "quantity": 1 + i % 9,
+            "price": 100.0 + i % 50,
+            "side": "BUY" if i % 2 else "SELL",
+            "timestamp": now_ns(),
+            "user_id": USERS[i % 100],
+        })
+    return log
+
+
+def measure(build, n: int) -> dict:
+    gc.collect()
+    start = time.perf_counter()
+    result = build(n)
+    elapsed = time.perf_counter() - start
+    del result
+    gc.collect()
+
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    result = build(n)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sys.getallocatedblocks() - blocks_before
+    del result
+    return {"bytes": current / n, "peak": peak / n, "blocks": blocks / n, "seconds": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trades", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    n = args.trades
+    print(f"{n:,} trades")
+    print(f"  {'':<10} {'bytes/trade':>12} {'peak/trade':>11} {'allocs/trade':>13} {'build s':>8}")
+    baseline = None
+    for name, build in (("dict", build_dicts), ("record", build_records), ("trade log", build_trade_log)):
+        r = measure(build, n)
+        baseline = baseline or r["bytes"]
+        print(
+            f"  {name:<10} {r['bytes']:12.0f} {r['peak']:11.0f} {r['blocks']:13.1f} {r['seconds']:8.2f}"
+            f"  ({baseline / r['bytes']:.1f}x smaller)"
+        )
+
+
+if __name__ == "__main__":
+    main()
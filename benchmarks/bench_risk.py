@@ -0,0 +1,89 @@
+# benchmarks/bench_risk.py
+"""
+Placement latency with and without pre-trade risk checks.
+
+Places `--orders` orders through `engine_ops.place_order` (in-process,
+memory store, no HTTP) spread over `--users` users, first with no risk
+limits and then with every limit set high enough never to reject, and
+reports the per-order latency of each run. Also times `risk.check` on
+its own against a user with `--open` resting orders, to show its cost
+does not grow with the book.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_risk --orders 20000 --open 100000
+"""
+import argparse
+import asyncio
+import time
+
+from app.services import engine_ops, order_book
+from app.services.risk import risk
+from app.store import memory
+
+LIMITS = {
+    "max_order_quantity": 1e9, "max_order_notional": 1e15, "max_position": 1e12,
+    "max_short": 1e12, "max_open_notional": 1e18, "cash": 1e18,
+}
+
+
+def reset():
+    memory.ORDERS.clear()
+    memory.ARCHIVED_ORDERS.clear()
+    memory.TRADES.clear()
+    memory.PORTFOLIO.clear()
+    order_book.BOOKS.clear()
+    risk.clear()
+
+
+def payload(i: int) -> dict:
+    # Half MARKET fills, half LIMIT orders resting far from the LTP
+    if i % 2:
+        return {"symbol": "TCS", "order_type": "BUY" if i % 4 == 1 else "SELL", "order_style": "MARKET", "quantity": 1}
+    return {"symbol": "INFY", "order_type": "BUY", "order_style": "LIMIT", "quantity": 1, "price": 1.0}
+
+
+async def place(n: int, users: int) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        await engine_ops.place_order(f"user{i % users}", payload(i))
+    return (time.perf_counter() - start) / n
+
+
+async def run(args):
+    results = {}
+    for name, limits in (("no limits", {}), ("all limits", LIMITS)):
+        reset()
+        risk.default_limits = dict(limits)
+        await place(min(1000, args.orders), args.users)  # warm up
+        reset()
+        results[name] = await place(args.orders, args.users)
+    base = results["no limits"]
+    print(f"{args.orders} orders, {args.users} users")
+    for name, seconds in results.items():
+        print(f"  {name:<11} {seconds * 1e6:8.1f} us/order  ({(seconds - base) * 1e6:+.1f} us)")
+
+    # risk.check alone, with a deep book of open orders for the same user
+    reset()
+    risk.default_limits = dict(LIMITS)
+    for _ in range(args.open):
+        await engine_ops.place_order("deep", payload(0))
+    n = 100_000
+    start = time.perf_counter()
+    for _ in range(n):
+        risk.check("deep", "INFY", "BUY", 1, 1.0)
+    print(f"  risk.check  {(time.perf_counter() - start) / n * 1e9:8.0f} ns with {args.open} open orders")
+    risk.default_limits = {}
+    reset()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--open", type=int, default=100000)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
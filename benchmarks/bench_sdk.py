@@ -0,0 +1,68 @@
+# benchmarks/bench_sdk.py
+"""
+Order placement throughput through the SDK clients against a local server.
+
+    sync       TradingSDK.place_order in a loop (one pooled keep-alive session)
+    async      AsyncTradingSDK.submit_orders with `--concurrency` requests in flight
+
+Usage (from the repo root):
+    python -m benchmarks.bench_sdk --orders 2000 --concurrency 4
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+from benchmarks.bench_multiprocess import SYMBOLS, free_port, start, stop, wait_until_up
+from sdk.trading_sdk import AsyncTradingSDK, TradingSDK
+
+
+def orders(n: int):
+    return [{"symbol": SYMBOLS[i % len(SYMBOLS)], "order_type": "BUY", "order_style": "MARKET", "quantity": 1}
+            for i in range(n)]
+
+
+def bench_sync(base_url: str, n: int) -> float:
+    with TradingSDK(base_url, api_key="demo-key") as sdk:
+        started = time.perf_counter()
+        for order in orders(n):
+            sdk.place_order(**order)
+        return time.perf_counter() - started
+
+
+async def bench_async(base_url: str, n: int, concurrency: int) -> float:
+    async with AsyncTradingSDK(base_url, api_key="demo-key", max_connections=concurrency) as sdk:
+        started = time.perf_counter()
+        results = await sdk.submit_orders(orders(n), concurrency=concurrency)
+        elapsed = time.perf_counter() - started
+    errors = sum(isinstance(r, Exception) for r in results)
+    if errors:
+        print(f"async: {errors} orders failed")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+                   dict(os.environ))
+    try:
+        wait_until_up(base_url)
+        sync_s = bench_sync(base_url, args.orders)
+        async_s = asyncio.run(bench_async(base_url, args.orders, args.concurrency))
+    finally:
+        stop(server)
+
+    print(f"{'sync':<6} orders={args.orders:<7} {args.orders / sync_s:>9.0f} orders/s")
+    print(f"{'async':<6} orders={args.orders:<7} {args.orders / async_s:>9.0f} orders/s  (concurrency {args.concurrency})")
+    print(f"speedup: {sync_s / async_s:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
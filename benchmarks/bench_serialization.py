@@ -0,0 +1,105 @@
+# benchmarks/bench_serialization.py
+"""
+Response serialization benchmark: response_model vs pre-serialized JSON.
+
+Serves `--rows` trade dicts from a throwaway FastAPI app four ways and
+times full in-process requests (httpx over ASGI):
+
+    response_model   return the dicts, FastAPI validates and encodes each row
+    raw (orjson)     RawJSONResponse(dumps(project(rows))), orjson if installed
+    raw (stdlib)     same, with the stdlib json fallback
+    cached           RawJSONResponse(bytes encoded once), as /instruments does
+
+Usage (from the repo root):
+    python -m benchmarks.bench_serialization --rows 1000 100000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.api.trades import TRADE_FIELDS
+from app.core import serialization
+from app.core.serialization import RawJSONResponse, dumps, project
+from app.models.trade import Trade
+
+
+def make_trades(n: int) -> List[dict]:
+    return [
+        {
+            "trade_id": f"{i:08x}-e89b-12d3-a456-426614174001",
+            "order_id": f"{i:08x}-e89b-12d3-a456-426614174000",
+            "symbol": ("RELIANCE", "TCS", "INFY")[i % 3],
+            "quantity": 1 + i % 50,
+            "price": 1000.0 + (i % 997) * 0.05,
+            "side": "BUY" if i % 2 else "SELL",
+            "timestamp": "2026-01-15T10:30:00.100000",
+            "user_id": "demo-user",
+        }
+        for i in range(n)
+    ]
+
+
+def build_app(rows: List[dict]) -> FastAPI:
+    bench = FastAPI()
+    cached = dumps(project(rows, TRADE_FIELDS))
+
+    @bench.get("/response_model", response_model=List[Trade])
+    async def via_response_model():
+        return rows
+
+    @bench.get("/raw", response_model=List[Trade])
+    async def via_raw():
+        return RawJSONResponse(dumps(project(rows, TRADE_FIELDS)))
+
+    @bench.get("/cached", response_model=List[Trade])
+    async def via_cache():
+        return RawJSONResponse(cached)
+
+    return bench
+
+
+async def time_path(client: AsyncClient, path: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        r = await client.get(path)
+        samples.append(time.perf_counter() - t0)
+        assert r.status_code == 200
+    return statistics.median(samples) * 1000
+
+
+async def run(rows: int, repeat: int):
+    data = make_trades(rows)
+    transport = ASGITransport(app=build_app(data))
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        results = [("response_model", await time_path(client, "/response_model", repeat))]
+        fast_name = "raw (orjson)" if serialization.orjson is not None else "raw (stdlib)"
+        results.append((fast_name, await time_path(client, "/raw", repeat)))
+        if serialization.orjson is not None:
+            orjson, serialization.orjson = serialization.orjson, None
+            results.append(("raw (stdlib)", await time_path(client, "/raw", repeat)))
+            serialization.orjson = orjson
+        results.append(("cached", await time_path(client, "/cached", repeat)))
+
+    baseline = results[0][1]
+    print(f"{rows} rows (median of {repeat})")
+    for name, ms in results:
+        print(f"  {name:<15} {ms:9.2f} ms  {baseline / ms:6.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for rows in args.rows:
+        asyncio.run(run(rows, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,14 +10,14 @@ import Instruments from './Instruments';
 import './Dashboard.css';
 
 const Dashboard = () => {
-  const { user, logout } = useAuth();
+  const { apiKey, user, logout } = useAuth();
   const navigate = useNavigate();
   const [activeTab, setActiveTab] = useState('orders');
   const [instruments, setInstruments] = useState([]);
   const [loading, setLoading] = useState(true);
   
   const wsUrl = 'ws://localhost:8000/api/v1/ws';
-  const { messages, isConnected } = useWebSocket(wsUrl);
+  const { messages, isConnected } = useWebSocket(wsUrl, { apiKey });
 
   useEffect(() => {
     if (!user) {
@@ -96,7 +96,7 @@ const Dashboard = () => {
         ) : (
           <>
             {activeTab === 'orders' && <Orders instruments={instruments} />}
-            {activeTab === 'portfolio' && <Portfolio />}
+            {activeTab === 'portfolio' && <Portfolio messages={messages} />}
             {activeTab === 'trades' && <Trades />}
             {activeTab === 'instruments' && <Instruments instruments={instruments} />}
           </>
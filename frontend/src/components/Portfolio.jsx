@@ -1,18 +1,41 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import api from '../services/api';
 import './Portfolio.css';
 
-const Portfolio = () => {
+const Portfolio = ({ messages = [] }) => {
   const [portfolio, setPortfolio] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
 
   useEffect(() => {
     loadPortfolio();
-    const interval = setInterval(loadPortfolio, 5000); // Refresh every 5 seconds
+    // Live updates arrive as WebSocket deltas; poll rarely as a fallback
+    const interval = setInterval(loadPortfolio, 60000);
     return () => clearInterval(interval);
   }, []);
 
+  // Merge pushed {type: 'portfolio', holdings, totals} deltas; reload only
+  // when the socket missed more than the server could replay. Every message
+  // since the last one handled is applied, in order, since several can
+  // arrive in one render.
+  const handledRef = useRef(0);
+  useEffect(() => {
+    const pending = messages.slice(handledRef.current);
+    handledRef.current = messages.length;
+    if (pending.some((m) => m.type === 'snapshot_required' && m.topic.startsWith('user:'))) {
+      loadPortfolio();
+      return;
+    }
+    const deltas = pending.filter((m) => m.type === 'portfolio');
+    if (deltas.length === 0) return;
+    setPortfolio((prev) => {
+      if (!prev) return prev;
+      const bySymbol = new Map(prev.holdings.map((h) => [h.symbol, h]));
+      deltas.forEach((delta) => delta.holdings.forEach((h) => bySymbol.set(h.symbol, h)));
+      return { ...prev, holdings: [...bySymbol.values()], totals: deltas[deltas.length - 1].totals };
+    });
+  }, [messages]);
+
   const loadPortfolio = async () => {
     try {
       const data = await api.getPortfolio();
@@ -33,12 +56,8 @@ const Portfolio = () => {
     return <div className="error-message">{error}</div>;
   }
 
-  const totalValue = portfolio.holdings.reduce((sum, holding) => sum + holding.current_value, 0);
-  const totalInvested = portfolio.holdings.reduce(
-    (sum, holding) => sum + holding.quantity * holding.avg_price,
-    0
-  );
-  const totalPnL = totalValue - totalInvested;
+  const { current_value: totalValue, cost: totalInvested, unrealized_pnl: totalPnL, realized_pnl: realizedPnL } =
+    portfolio.totals;
   const totalPnLPercent = totalInvested > 0 ? (totalPnL / totalInvested) * 100 : 0;
 
   return (
@@ -63,6 +82,10 @@ const Portfolio = () => {
             ₹{totalPnL.toFixed(2)} ({totalPnLPercent.toFixed(2)}%)
           </div>
         </div>
+        <div className={`summary-card ${realizedPnL >= 0 ? 'positive' : 'negative'}`}>
+          <div className="summary-label">Realized P&L</div>
+          <div className="summary-value">₹{realizedPnL.toFixed(2)}</div>
+        </div>
       </div>
 
       <div className="holdings-section">
@@ -83,9 +106,8 @@ const Portfolio = () => {
             </thead>
             <tbody>
               {portfolio.holdings.map((holding) => {
-                const invested = holding.quantity * holding.avg_price;
-                const pnl = holding.current_value - invested;
-                const pnlPercent = invested > 0 ? (pnl / invested) * 100 : 0;
+                const pnl = holding.unrealized_pnl;
+                const pnlPercent = holding.cost > 0 ? (pnl / holding.cost) * 100 : 0;
 
                 return (
                   <tr key={holding.symbol}>
@@ -1,11 +1,16 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import api from '../services/api';
 import './Trades.css';
 
+// Trades requested per page (the API's maximum)
+const PAGE_SIZE = 5000;
+
 const Trades = () => {
   const [trades, setTrades] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  // Oldest first; each refresh only fetches the pages after the last trade held
+  const loaded = useRef([]);
 
   useEffect(() => {
     loadTrades();
@@ -15,8 +20,19 @@ const Trades = () => {
 
   const loadTrades = async () => {
     try {
-      const data = await api.getTrades();
-      setTrades(data.sort((a, b) => new Date(b.timestamp) - new Date(a.timestamp)));
+      let fetched = 0;
+      for (;;) {
+        const last = loaded.current[loaded.current.length - 1];
+        const page = await api.getTrades(
+          last ? { limit: PAGE_SIZE, after: last.trade_id } : { limit: PAGE_SIZE }
+        );
+        loaded.current = loaded.current.concat(page);
+        fetched += page.length;
+        if (page.length < PAGE_SIZE) break;
+      }
+      if (fetched > 0) {
+        setTrades([...loaded.current].reverse());
+      }
       setError('');
     } catch (err) {
       setError(err.message);
@@ -1,52 +1,104 @@
 import { useEffect, useRef, useState } from 'react';
 
-export const useWebSocket = (url) => {
+const RECONNECT_DELAY_MS = 500;
+const MAX_RECONNECT_DELAY_MS = 10000;
+
+// topics: e.g. ['orders', 'trades:RELIANCE']; 'orders' is the user's own
+// order/trade stream and requires apiKey.
+//
+// Reconnects with backoff. Every event carries a per-topic `seq`; on
+// reconnect the hook resumes each topic from the last seq it saw, so only
+// the missed events are replayed. When the server can no longer replay a
+// topic it sends {type: 'snapshot_required', topic}, which is passed on in
+// `messages` so components reload that state over REST.
+export const useWebSocket = (url, { apiKey = null, topics = ['orders'] } = {}) => {
   const [messages, setMessages] = useState([]);
   const [isConnected, setIsConnected] = useState(false);
   const wsRef = useRef(null);
+  // Server epoch and last seq per topic, kept across reconnects
+  const resumeRef = useRef({ epoch: null, seqs: {} });
 
   useEffect(() => {
-    const ws = new WebSocket(url);
-    wsRef.current = ws;
+    let closed = false;
+    let reconnectTimer = null;
+    let delay = RECONNECT_DELAY_MS;
+    resumeRef.current = { epoch: null, seqs: {} };
 
-    ws.onopen = () => {
-      setIsConnected(true);
-      console.log('WebSocket connected');
-    };
+    const connect = () => {
+      const ws = new WebSocket(url);
+      wsRef.current = ws;
 
-    ws.onmessage = (event) => {
-      try {
-        const data = JSON.parse(event.data);
-        setMessages((prev) => [...prev, data]);
-      } catch (error) {
-        console.error('Error parsing WebSocket message:', error);
-      }
-    };
+      ws.onopen = () => {
+        setIsConnected(true);
+        delay = RECONNECT_DELAY_MS;
+        console.log('WebSocket connected');
+        if (apiKey) {
+          ws.send(JSON.stringify({ action: 'auth', api_key: apiKey }));
+        }
+        const { epoch, seqs } = resumeRef.current;
+        const subscribe = { action: 'subscribe', topics };
+        if (epoch) {
+          subscribe.epoch = epoch;
+          subscribe.resume_from = seqs;
+        }
+        ws.send(JSON.stringify(subscribe));
+      };
 
-    ws.onerror = (error) => {
-      console.error('WebSocket error:', error);
-    };
+      ws.onmessage = (event) => {
+        try {
+          const data = JSON.parse(event.data);
+          const resume = resumeRef.current;
+          if (data.type === 'subscribed') {
+            resume.epoch = data.epoch;
+            Object.entries(data.seqs).forEach(([topic, seq]) => {
+              if (!(topic in resume.seqs)) resume.seqs[topic] = seq;
+            });
+            return;
+          }
+          if (data.seq !== undefined) {
+            resume.seqs[data.topic] = data.seq;
+          }
+          setMessages((prev) => [...prev, data]);
+        } catch (error) {
+          console.error('Error parsing WebSocket message:', error);
+        }
+      };
+
+      ws.onerror = (error) => {
+        console.error('WebSocket error:', error);
+      };
 
-    ws.onclose = () => {
-      setIsConnected(false);
-      console.log('WebSocket disconnected');
+      ws.onclose = () => {
+        setIsConnected(false);
+        console.log('WebSocket disconnected');
+        if (!closed) {
+          reconnectTimer = setTimeout(connect, delay);
+          delay = Math.min(delay * 2, MAX_RECONNECT_DELAY_MS);
+        }
+      };
     };
 
+    connect();
+
     // Send ping every 30 seconds to keep connection alive
     const pingInterval = setInterval(() => {
-      if (ws.readyState === WebSocket.OPEN) {
+      const ws = wsRef.current;
+      if (ws && ws.readyState === WebSocket.OPEN) {
         ws.send('ping');
       }
     }, 30000);
 
     return () => {
+      closed = true;
       clearInterval(pingInterval);
-      if (ws.readyState === WebSocket.OPEN) {
+      clearTimeout(reconnectTimer);
+      const ws = wsRef.current;
+      if (ws && ws.readyState <= WebSocket.OPEN) {
         ws.close();
       }
     };
-  }, [url]);
+  // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [url, apiKey, topics.join(',')]);
 
   return { messages, isConnected };
 };
-
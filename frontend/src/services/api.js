@@ -50,7 +50,11 @@ export const api = {
   getPortfolio: () => apiRequest('/portfolio'),
 
   // Trades
-  getTrades: () => apiRequest('/trades'),
+  // One oldest-first page; pass the last trade_id seen as `after` for the next
+  getTrades: (params = {}) => {
+    const query = new URLSearchParams(params).toString();
+    return apiRequest(query ? `/trades?${query}` : '/trades');
+  },
 };
 
 export default api;
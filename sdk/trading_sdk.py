@@ -1,31 +1,118 @@
 # sdk/trading_sdk.py
 
+import asyncio
+import json
+import time
 import requests
-from typing import Dict, Any, List
+import httpx
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Any, AsyncIterator, Iterable, List, Optional, Sequence
+from uuid import uuid4
+
+# Seconds before a request is abandoned
+DEFAULT_TIMEOUT = 10.0
+# Retries for idempotent GETs and keyed order placements (and for connection
+# failures, which never reach the server)
+DEFAULT_RETRIES = 3
+# Backoff between retries: backoff * 2 ** attempt seconds
+DEFAULT_BACKOFF = 0.2
+RETRY_STATUSES = (502, 503, 504)
+# Trades fetched per request by get_trades (the server's maximum page size)
+TRADES_PAGE_SIZE = 5000
+
+
+def _order_payload(symbol: str, order_type: str, order_style: str, quantity: int, price: float | None) -> Dict[str, Any]:
+    payload = {
+        "symbol": symbol,
+        "order_type": order_type,
+        "order_style": order_style,
+        "quantity": quantity
+    }
+    if price is not None:
+        payload["price"] = price
+    return payload
+
 
 class TradingSDK:
     """
     Python SDK for Bajaj Broking Trading API
+
+    Uses one keep-alive session for all calls; close it with `close()` or
+    use the SDK as a context manager.
     """
 
-    def __init__(self, base_url: str, api_key: str | None = None):
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str | None = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        pool_size: int = 10,
+    ):
         """
         base_url example: http://127.0.0.1:8000
         """
         self.base_url = base_url.rstrip("/")
         self.headers = {"x-api-key": api_key} if api_key else {}
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
 
-    # -------- Instruments --------
-    def get_instruments(self) -> List[Dict[str, Any]]:
-        resp = requests.get(f"{self.base_url}/api/v1/instruments", headers=self.headers)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _get(self, path: str, params: Optional[Dict[str, Any]] = None):
+        resp = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
         resp.raise_for_status()
         return resp.json()
 
-    def get_instrument(self, symbol: str) -> Dict[str, Any]:
-        resp = requests.get(f"{self.base_url}/api/v1/instruments/{symbol}", headers=self.headers)
+    def _post(self, path: str, payload: Optional[Dict[str, Any]] = None, idempotency_key: str | None = None):
+        url = f"{self.base_url}{path}"
+        if idempotency_key is None:
+            resp = self.session.post(url, json=payload, timeout=self.timeout)
+        else:
+            # Safe to retry: the server answers a repeated key with the first result
+            headers = {"Idempotency-Key": idempotency_key}
+            for attempt in range(self.retries + 1):
+                try:
+                    resp = self.session.post(url, json=payload, headers=headers, timeout=self.timeout)
+                    if resp.status_code not in RETRY_STATUSES or attempt == self.retries:
+                        break
+                except (requests.ConnectionError, requests.Timeout):
+                    if attempt == self.retries:
+                        raise
+                time.sleep(self.backoff * 2 ** attempt)
         resp.raise_for_status()
         return resp.json()
 
+    # -------- Instruments --------
+    def get_instruments(self) -> List[Dict[str, Any]]:
+        return self._get("/api/v1/instruments")
+
+    def get_instrument(self, symbol: str) -> Dict[str, Any]:
+        return self._get(f"/api/v1/instruments/{symbol}")
+
     # -------- Orders --------
     def place_order(
         self,
@@ -33,38 +120,249 @@ class TradingSDK:
         order_type: str,
         order_style: str,
         quantity: int,
-        price: float | None = None
+        price: float | None = None,
+        idempotency_key: str | None = None,
     ) -> Dict[str, Any]:
-        payload = {     
-            "symbol": symbol,
-            "order_type": order_type,
-            "order_style": order_style,
-            "quantity": quantity
-        }
-        if price is not None:
-            payload["price"] = price
-
-        resp = requests.post(f"{self.base_url}/api/v1/orders", json=payload, headers=self.headers)
-        resp.raise_for_status()
-        return resp.json()
+        """
+        Place one order. It is sent with an Idempotency-Key (generated unless
+        given) that is reused across retries, so a retry never places twice.
+        """
+        payload = _order_payload(symbol, order_type, order_style, quantity, price)
+        return self._post("/api/v1/orders", payload, idempotency_key or str(uuid4()))
+
+    def place_orders(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Place a basket in one request. Each order is a dict with the same
+        fields as place_order. Returns one result per order, in order:
+        {"index", "ok", "order"} or {"index", "ok": False, "status_code", "detail"}.
+        """
+        return self._post("/api/v1/orders/batch", {"orders": orders})["results"]
+
+    def cancel_orders(self, order_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Cancel several orders in one request; one result per id, as in place_orders.
+        """
+        return self._post("/api/v1/orders/cancel-batch", {"order_ids": order_ids})["results"]
 
     def get_order(self, order_id: str) -> Dict[str, Any]:
-        resp = requests.get(f"{self.base_url}/api/v1/orders/{order_id}", headers=self.headers)
-        resp.raise_for_status()
-        return resp.json()
+        return self._get(f"/api/v1/orders/{order_id}")
 
     # -------- Trades --------
-    def get_trades(self) -> List[Dict[str, Any]]:
-        resp = requests.get(f"{self.base_url}/api/v1/trades", headers=self.headers)
-        resp.raise_for_status()
-        return resp.json()
+    def get_trades(self, symbol: str | None = None) -> List[Dict[str, Any]]:
+        """
+        Every trade of the user (optionally in one symbol), oldest first,
+        fetched page by page with the `after` cursor.
+        """
+        trades: List[Dict[str, Any]] = []
+        params: Dict[str, Any] = {"limit": TRADES_PAGE_SIZE}
+        if symbol:
+            params["symbol"] = symbol
+        while True:
+            page = self._get("/api/v1/trades", params=params)
+            trades.extend(page)
+            if len(page) < TRADES_PAGE_SIZE:
+                return trades
+            params["after"] = page[-1]["trade_id"]
 
     # -------- Portfolio --------
     def get_portfolio(self, user_id: str = "demo-user") -> Dict[str, Any]:
-        resp = requests.get(
-            f"{self.base_url}/api/v1/portfolio",
-            params={"user_id": user_id},
-            headers=self.headers
+        return self._get("/api/v1/portfolio", params={"user_id": user_id})
+
+
+class AsyncTradingSDK:
+    """
+    asyncio SDK for strategy code. One pooled keep-alive HTTP/1.1 client is
+    shared by all calls, so concurrent requests reuse open connections.
+
+        async with AsyncTradingSDK("http://127.0.0.1:8000", api_key="demo-key") as sdk:
+            results = await sdk.submit_orders(orders, concurrency=32)
+            async for event in sdk.stream(["orders", "ticks:TCS"]):
+                ...
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str | None = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        max_connections: int = 20,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.headers = {"x-api-key": api_key} if api_key else {}
+        self.retries = retries
+        self.backoff = backoff
+        self.max_connections = max_connections
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        if transport is None:
+            # No transport-level retries: _send is the only retry layer
+            transport = httpx.AsyncHTTPTransport(limits=limits)
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url, headers=self.headers, timeout=timeout, limits=limits, transport=transport
         )
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _send(self, method: str, path: str, retries: int, **kwargs):
+        """
+        Retry up to `retries` times on RETRY_STATUSES and transport errors.
+        A connection failure never reached the server, so it is retried up
+        to self.retries times for every method.
+        """
+        attempt = 0
+        while True:
+            try:
+                resp = await self.client.request(method, path, **kwargs)
+                if resp.status_code not in RETRY_STATUSES or attempt >= retries:
+                    break
+            except httpx.ConnectError:
+                if attempt >= self.retries:
+                    raise
+            except httpx.TransportError:
+                if attempt >= retries:
+                    raise
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+            attempt += 1
         resp.raise_for_status()
         return resp.json()
+
+    async def _get(self, path: str, params: Optional[Dict[str, Any]] = None):
+        return await self._send("GET", path, self.retries, params=params)
+
+    async def _post(self, path: str, payload: Optional[Dict[str, Any]] = None, idempotency_key: str | None = None):
+        if idempotency_key is None:
+            return await self._send("POST", path, 0, json=payload)
+        # Safe to retry: the server answers a repeated key with the first result
+        headers = {"Idempotency-Key": idempotency_key}
+        return await self._send("POST", path, self.retries, json=payload, headers=headers)
+
+    # -------- Instruments --------
+    async def get_instruments(self) -> List[Dict[str, Any]]:
+        return await self._get("/api/v1/instruments")
+
+    async def get_instrument(self, symbol: str) -> Dict[str, Any]:
+        return await self._get(f"/api/v1/instruments/{symbol}")
+
+    # -------- Orders --------
+    async def place_order(
+        self,
+        symbol: str,
+        order_type: str,
+        order_style: str,
+        quantity: int,
+        price: float | None = None,
+        idempotency_key: str | None = None,
+    ) -> Dict[str, Any]:
+        """
+        Place one order, with an Idempotency-Key reused across retries (see TradingSDK.place_order).
+        """
+        payload = _order_payload(symbol, order_type, order_style, quantity, price)
+        return await self._post("/api/v1/orders", payload, idempotency_key or str(uuid4()))
+
+    async def submit_orders(
+        self, orders: Iterable[Dict[str, Any]], concurrency: Optional[int] = None
+    ) -> List[Dict[str, Any] | Exception]:
+        """
+        Send each order as its own place_order request, at most `concurrency`
+        (default: the connection pool size) in flight. Returns the results in
+        input order; a failed order's slot holds its exception.
+        """
+        limit = asyncio.Semaphore(concurrency or self.max_connections)
+
+        async def submit(order: Dict[str, Any]):
+            async with limit:
+                return await self._post("/api/v1/orders", order, str(uuid4()))
+
+        return await asyncio.gather(*(submit(order) for order in orders), return_exceptions=True)
+
+    async def place_orders(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Place a basket in one request (POST /orders/batch); see TradingSDK.place_orders.
+        """
+        return (await self._post("/api/v1/orders/batch", {"orders": orders}))["results"]
+
+    async def cancel_orders(self, order_ids: List[str]) -> List[Dict[str, Any]]:
+        return (await self._post("/api/v1/orders/cancel-batch", {"order_ids": order_ids}))["results"]
+
+    async def get_order(self, order_id: str) -> Dict[str, Any]:
+        return await self._get(f"/api/v1/orders/{order_id}")
+
+    # -------- Trades --------
+    async def get_trades(self, symbol: str | None = None) -> List[Dict[str, Any]]:
+        """
+        Every trade of the user (optionally in one symbol), oldest first,
+        fetched page by page with the `after` cursor.
+        """
+        trades: List[Dict[str, Any]] = []
+        params: Dict[str, Any] = {"limit": TRADES_PAGE_SIZE}
+        if symbol:
+            params["symbol"] = symbol
+        while True:
+            page = await self._get("/api/v1/trades", params=params)
+            trades.extend(page)
+            if len(page) < TRADES_PAGE_SIZE:
+                return trades
+            params["after"] = page[-1]["trade_id"]
+
+    # -------- Portfolio --------
+    async def get_portfolio(self) -> Dict[str, Any]:
+        return await self._get("/api/v1/portfolio")
+
+    # -------- Streaming --------
+    async def stream(
+        self,
+        topics: Sequence[str] = ("orders",),
+        reconnect_delay: float = 0.5,
+        max_reconnect_delay: float = 10.0,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield events from /ws for `topics`, reconnecting (with backoff) and
+        re-subscribing whenever the connection drops. Protocol replies
+        (auth/subscribed) are not yielded. On reconnect the stream resumes
+        each topic from the last `seq` seen, so missed events are replayed;
+        if the server no longer has them a `snapshot_required` message is
+        yielded and the caller should reload that state over REST.
+        Needs the `websockets` package.
+        """
+        from websockets.asyncio.client import connect
+        from websockets.exceptions import WebSocketException
+
+        url = self.base_url.replace("http", "ws", 1) + "/api/v1/ws"
+        delay = reconnect_delay
+        epoch: Optional[str] = None
+        seqs: Dict[str, int] = {}
+        while True:
+            try:
+                async with connect(url, additional_headers=self.headers) as ws:
+                    subscribe: Dict[str, Any] = {"action": "subscribe", "topics": list(topics)}
+                    if epoch is not None:
+                        subscribe.update(epoch=epoch, resume_from=seqs)
+                    await ws.send(json.dumps(subscribe))
+                    delay = reconnect_delay
+                    async for raw in ws:
+                        message = json.loads(raw)
+                        kind = message.get("type")
+                        if kind == "subscribed":
+                            epoch = message["epoch"]
+                            for topic, seq in message["seqs"].items():
+                                seqs.setdefault(topic, seq)
+                            continue
+                        if kind in ("auth", "unsubscribed"):
+                            continue
+                        if "seq" in message:  # events, and snapshot_required (resume after it)
+                            seqs[message["topic"]] = message["seq"]
+                        yield message
+            except (OSError, WebSocketException):
+                pass
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_reconnect_delay)
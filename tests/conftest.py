@@ -1,6 +1,13 @@
 # tests/conftest.py
 import pytest
+from app.core.auth import rate_limiter
 from app.store import memory
+from app.services import limit_matcher, order_book, locks, versions
+from app.services.broadcaster import broadcaster
+from app.services.candles import candles
+from app.services.idempotency import idempotency
+from app.services.portfolio_valuation import valuation
+from app.services.risk import risk
 
 @pytest.fixture(autouse=True)
 def reset_store():
@@ -9,6 +16,38 @@ def reset_store():
     Clears the in-memory database to ensure test isolation.
     """
     memory.ORDERS.clear()
+    memory.ARCHIVED_ORDERS.clear()
     memory.TRADES.clear()
     memory.PORTFOLIO.clear()
-    # Note: We usually don't clear INSTRUMENTS as they are static seed data
\ No newline at end of file
+    order_book.BOOKS.clear()
+    locks.SYMBOL_LOCKS.clear()
+    locks.USER_LOCKS.clear()
+    valuation.clear()
+    risk.clear()
+    rate_limiter.reset()
+    idempotency.clear()
+    candles.clear()
+    versions.TRADE_VERSIONS.clear()
+    # Note: We usually don't clear INSTRUMENTS as they are static seed data
+
+
+@pytest.fixture
+def published():
+    """
+    Every (topic, message) the broadcaster publishes during the test.
+    """
+    events = []
+    sink = lambda topic, message: events.append((topic, message))
+    broadcaster.add_sink(sink)
+    yield events
+    broadcaster.remove_sink(sink)
+
+
+@pytest.fixture
+def restore_prices(monkeypatch):
+    """
+    Undo the test's LTP changes (seed instruments are shared across tests).
+    """
+    for inst in memory.INSTRUMENTS:
+        monkeypatch.setitem(inst, "last_traded_price", inst["last_traded_price"])
+    monkeypatch.setattr(limit_matcher, "_dirty_symbols", set())
@@ -0,0 +1,52 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.core.admission import RateLimiter
+from app.core.auth import API_KEY_LIMITS, rate_limiter
+from app.services import engine_ops
+
+MARKET = {"symbol": "TCS", "order_type": "BUY", "order_style": "MARKET", "quantity": 1}
+
+
+def test_token_buckets_refill_and_split_reads_from_writes():
+    now = [0.0]
+    limiter = RateLimiter({"k": {"write_rate": 2, "write_burst": 3, "read_rate": 0}}, clock=lambda: now[0])
+
+    assert [limiter.admit("k", "POST") for _ in range(4)] == [0, 0, 0, 1]
+    now[0] += 0.5  # one token back at 2/s
+    assert limiter.admit("k", "POST") == 0
+    assert limiter.admit("k", "POST") == 1
+    # A read rate of 0 disables the read bucket
+    assert all(limiter.admit("k", "GET") == 0 for _ in range(100))
+
+
+@pytest.mark.asyncio
+async def test_flooding_key_gets_429_without_affecting_others():
+    API_KEY_LIMITS["alice-key"] = {"write_rate": 0.01, "write_burst": 2}
+    rate_limiter.reset()
+    transport = ASGITransport(app=app)
+    try:
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            alice = {"x-api-key": "alice-key"}
+            codes = [(await ac.post("/api/v1/orders", json=MARKET, headers=alice)).status_code for _ in range(3)]
+            assert codes == [200, 200, 429]
+            r = await ac.post("/api/v1/orders", json=MARKET, headers=alice)
+            assert r.status_code == 429 and int(r.headers["retry-after"]) >= 1
+
+            # Reads and other keys have their own buckets
+            assert (await ac.get("/api/v1/trades", headers=alice)).status_code == 200
+            r = await ac.post("/api/v1/orders", json=MARKET, headers={"x-api-key": "bob-key"})
+            assert r.status_code == 200
+    finally:
+        API_KEY_LIMITS.pop("alice-key")
+
+
+@pytest.mark.asyncio
+async def test_engine_sheds_writes_beyond_its_in_flight_cap(monkeypatch):
+    monkeypatch.setattr(engine_ops, "ENGINE_MAX_IN_FLIGHT", 0)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers = {"x-api-key": "bob-key"}
+        r = await ac.post("/api/v1/orders", json=MARKET, headers=headers)
+        assert r.status_code == 503 and r.headers["retry-after"] == "1"
+        assert (await ac.get("/api/v1/portfolio", headers=headers)).status_code == 200
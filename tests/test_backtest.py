@@ -0,0 +1,76 @@
+import pytest
+from app.backtest import read_ticks, run_backtest, sweep
+from app.services.broadcaster import broadcaster
+from app.services.execution_engine import find_instrument
+from app.store import memory
+
+S = 1_000_000_000
+T0 = 1_704_067_200 * S
+
+
+class Scripted:
+    """
+    Buy 10 at market on the first tick, then offer them at 3320.
+    """
+
+    def __init__(self):
+        self.fills = []
+
+    async def on_tick(self, ctx, symbol, price):
+        if ctx.now == T0:
+            await ctx.buy(symbol, 10)
+            assert await ctx.sell(symbol, 10, price=3320.0) is not None
+            assert await ctx.buy("NOPE", 1) is None
+
+    async def on_fill(self, ctx, trade):
+        self.fills.append((trade["timestamp"], trade["side"], trade["price"], ctx.position(trade["symbol"])))
+
+
+@pytest.mark.asyncio
+async def test_backtest_runs_engine_on_simulated_time():
+    ltp = find_instrument("TCS")["last_traded_price"]
+    strategy = Scripted()
+    ticks = [(T0, "TCS", 3300.0), (T0 + S, "TCS", 3310.0), (T0 + 2 * S, "TCS", 3325.0), (T0 + 3 * S, "XYZ", 1.0)]
+    report = await run_backtest(strategy, ticks)
+
+    # The resting LIMIT sell fills at its price once a tick crosses it
+    assert strategy.fills == [(T0, "BUY", 3300.0, 10), (T0 + 2 * S, "SELL", 3320.0, 0)]
+    assert report["ticks"] == 4 and report["unknown_ticks"] == 1
+    assert (report["orders"], report["rejected"], report["fills"]) == (3, 1, 2)
+    assert report["realized_pnl"] == pytest.approx(200.0)
+    assert report["positions"] == {}
+    assert report["start"] == "2024-01-01T00:00:00" and report["end"] == "2024-01-01T00:00:02"
+    assert report["events_per_second"] > 0
+    # The engine is left as it was found
+    assert not memory.ORDERS and not memory.TRADES
+    assert find_instrument("TCS")["last_traded_price"] == ltp
+
+
+@pytest.mark.asyncio
+async def test_backtest_publishes_nothing_and_refuses_live_state(published):
+    await run_backtest(Scripted(), [(T0, "TCS", 3300.0), (T0 + S, "TCS", 3325.0)])
+    assert published == []
+    assert not broadcaster.muted
+
+    memory.PORTFOLIO["alice"] = {"TCS": {"quantity": 1, "avg_price": 1.0, "realized_pnl": 0.0}}
+    with pytest.raises(RuntimeError):
+        await run_backtest(Scripted(), [(T0, "TCS", 3300.0)])
+    assert memory.PORTFOLIO["alice"]["TCS"]["quantity"] == 1
+
+
+def test_read_ticks_and_sweep(tmp_path):
+    path = tmp_path / "ticks.csv"
+    path.write_text("timestamp,symbol,price\n1704067200.5,TCS,1\n2024-01-01T00:00:01,INFY,2\n")
+    assert list(read_ticks(str(path))) == [(T0 + S // 2, "TCS", 1.0), (T0 + S, "INFY", 2.0)]
+
+    prices = [100, 101, 102, 103, 104, 103, 101, 99, 98, 97, 98, 100, 103, 106, 108]
+    path.write_text("symbol,price\n" + "".join(f"TCS,{p}\n" for p in prices))
+    assert [ts for ts, _, _ in read_ticks(str(path), tick_interval_ns=S)][:2] == [T0, T0 + S]
+
+    reports = sweep(str(path), {"fast": [1, 2], "slow": [3]}, params={"quantity": 5}, workers=2)
+    assert [r["params"] for r in sorted(reports, key=lambda r: r["params"]["fast"])] == [
+        {"quantity": 5, "fast": 1, "slow": 3},
+        {"quantity": 5, "fast": 2, "slow": 3},
+    ]
+    assert all(r["ticks"] == len(prices) and r["fills"] > 0 for r in reports)
+    assert reports[0]["pnl"] >= reports[1]["pnl"]
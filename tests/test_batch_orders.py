@@ -0,0 +1,55 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.services.order_book import BOOKS
+
+HEADERS = {"x-api-key": "alice-key"}
+
+
+@pytest.mark.asyncio
+async def test_batch_place_and_cancel(published):
+    basket = [
+        {"symbol": "TCS", "order_type": "BUY", "order_style": "MARKET", "quantity": 2},
+        {"symbol": "NOPE", "order_type": "BUY", "order_style": "MARKET", "quantity": 1},
+        {"symbol": "INFY", "order_type": "BUY", "order_style": "LIMIT", "quantity": 1, "price": 1.0},
+        {"symbol": "TCS", "order_type": "SELL", "order_style": "MARKET", "quantity": 1},
+    ]
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.post("/api/v1/orders/batch", json={"orders": basket}, headers=HEADERS)
+        assert r.status_code == 200
+        results = r.json()["results"]
+        assert [res["ok"] for res in results] == [True, False, True, True]
+        assert results[1]["status_code"] == 404
+        assert [results[i]["order"]["state"] for i in (0, 2, 3)] == ["EXECUTED", "PLACED", "EXECUTED"]
+        assert len(BOOKS["INFY"]) == 1
+
+        # One coalesced message for the owner, one per symbol on the tape
+        assert [(t, m["type"]) for t, m in published] == [("user:alice", "batch"), ("trades:TCS", "trades")]
+        assert len(published[0][1]["trades"]) == 2
+        assert "user_id" not in published[1][1]["trades"][0]
+
+        r = await ac.get("/api/v1/portfolio", headers=HEADERS)
+        assert r.json()["holdings"][0]["quantity"] == 1
+
+        resting, executed = results[2]["order"]["order_id"], results[0]["order"]["order_id"]
+        r = await ac.post("/api/v1/orders/cancel-batch", json={"order_ids": [resting, executed, "missing"]}, headers=HEADERS)
+        results = r.json()["results"]
+        assert [res["ok"] for res in results] == [True, False, False]
+        assert [res["status_code"] for res in results[1:]] == [400, 404]
+        assert results[0]["order"]["state"] == "CANCELLED"
+        assert len(BOOKS["INFY"]) == 0
+
+
+@pytest.mark.asyncio
+async def test_malformed_basket_is_rejected_whole():
+    basket = [
+        {"symbol": "TCS", "order_type": "BUY", "order_style": "MARKET", "quantity": 1},
+        {"symbol": "TCS", "order_type": "BUY", "order_style": "LIMIT", "quantity": 1},
+    ]
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.post("/api/v1/orders/batch", json={"orders": basket}, headers=HEADERS)
+        assert r.status_code == 422
+        r = await ac.get("/api/v1/trades", headers=HEADERS)
+        assert r.json() == []
@@ -0,0 +1,25 @@
+import pytest
+from benchmarks.bench_order_path import OrderPathBench, compare, parse_args
+from app.core.auth import API_KEYS
+
+
+@pytest.mark.asyncio
+async def test_in_process_run_reports_every_stage():
+    args = parse_args(["--orders", "200", "--concurrency", "4", "--users", "3", "--listeners", "2"])
+    bench = OrderPathBench(args)
+    results = bench.results(await bench.run_in_process())
+
+    assert results["requests"] == 200 and results["errors"] == 0
+    latency = results["latency_ms"]
+    assert latency["placement"]["count"] == latency["market"]["count"] + latency["limit"]["count"]
+    assert latency["cancel"]["count"] > 0
+    # Every fill reaches its owner, and every tape listener sees every trade
+    assert latency["fill"]["count"] > 0
+    assert latency["broadcast"]["count"] == 2 * latency["fill"]["count"]
+    assert latency["fill"]["p50"] <= latency["fill"]["p999"] <= latency["fill"]["max"]
+    assert "bench-0-key" not in API_KEYS
+
+    assert compare(results, results, 0.2) == []
+    slower = dict(results, throughput_rps=results["throughput_rps"] / 2)
+    assert compare(slower, results, 0.2) == [f"throughput_rps: {results['throughput_rps']:.2f} -> "
+                                             f"{slower['throughput_rps']:.2f} (-50.0%)"]
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import time
+import pytest
+from app.services.broadcaster import Broadcaster
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.received = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        await asyncio.sleep(self.delay)
+        self.received.append(json.loads(data))
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+@pytest.mark.asyncio
+async def test_slow_client_drops_oldest_without_delaying_others():
+    b = Broadcaster(queue_size=2, policy="drop_oldest")
+    fast, slow = FakeWebSocket(), FakeWebSocket(delay=10)
+    await b.connect(fast)
+    await b.connect(slow)
+    b.subscribe(fast, ["trades:TCS"])
+    b.subscribe(slow, ["trades:TCS"])
+    await asyncio.sleep(0)
+
+    for i in range(5):
+        assert b.publish("trades:TCS", {"n": i}) == 2
+        await asyncio.sleep(0)
+    await asyncio.sleep(0.01)
+
+    assert [m["n"] for m in fast.received] == [0, 1, 2, 3, 4]
+    slow_stats = b.clients[slow].stats()
+    assert slow_stats["queue_depth"] == 2
+    assert slow_stats["dropped"] == 2
+    b.disconnect(fast)
+    b.disconnect(slow)
+
+
+@pytest.mark.asyncio
+async def test_disconnect_policy_closes_slow_client():
+    b = Broadcaster(queue_size=1, policy="disconnect")
+    slow = FakeWebSocket(delay=10)
+    await b.connect(slow)
+    b.subscribe(slow, ["trades:TCS"])
+    await asyncio.sleep(0)
+
+    b.publish("trades:TCS", {"n": 0})  # picked up by the writer, stuck in send
+    await asyncio.sleep(0)
+    b.publish("trades:TCS", {"n": 1})  # fills the queue
+    assert b.publish("trades:TCS", {"n": 2}) == 0
+    await asyncio.sleep(0)
+
+    assert slow not in b.clients
+    assert "trades:TCS" not in b.topics
+    assert slow.closed_with == 1013
+
+
+@pytest.mark.asyncio
+async def test_publish_only_reaches_topic_subscribers():
+    b = Broadcaster()
+    tcs, infy = FakeWebSocket(), FakeWebSocket()
+    await b.connect(tcs)
+    await b.connect(infy)
+    b.subscribe(tcs, ["trades:TCS"])
+    b.subscribe(infy, ["trades:INFY"])
+
+    assert b.publish("trades:TCS", {"type": "trade"}) == 1
+    await asyncio.sleep(0.01)
+    assert tcs.received == [{"topic": "trades:TCS", "seq": 1, "type": "trade"}]
+    assert infy.received == []
+
+    b.unsubscribe(tcs, ["trades:TCS"])
+    assert b.publish("trades:TCS", {"type": "trade"}) == 0
+    b.disconnect(tcs)
+    b.disconnect(infy)
+
+
+@pytest.mark.asyncio
+async def test_resume_replays_missed_events_or_asks_for_a_snapshot():
+    b = Broadcaster(replay_size=3)
+    b.publish("ticks:TCS", {"n": 0})  # before anyone subscribed: counted, not buffered
+    first = FakeWebSocket()
+    await b.connect(first)
+    b.subscribe(first, ["ticks:TCS"])
+    for n in range(1, 6):
+        b.publish("ticks:TCS", {"n": n})
+    b.disconnect(first)
+    b.publish("ticks:TCS", {"n": 6})
+    assert b.seqs["ticks:TCS"] == 7
+
+    again = FakeWebSocket()
+    await b.connect(again)
+    b.subscribe(again, ["ticks:TCS"])
+    assert b.resume(again, "ticks:TCS", 5)  # missed seqs 6 and 7
+    assert b.resume(again, "ticks:TCS", 7)  # missed nothing
+    assert not b.resume(again, "ticks:TCS", 3)  # seq 4 is no longer buffered
+    assert not b.resume(again, "ticks:TCS", 9)  # from another epoch
+    await asyncio.sleep(0.01)
+    assert [(m["seq"], m["n"]) for m in again.received] == [(6, 5), (7, 6)]
+    b.disconnect(again)
+
+
+@pytest.mark.asyncio
+async def test_replay_buffer_is_dropped_after_its_topic_stays_idle():
+    b = Broadcaster(replay_size=10, replay_ttl=60)
+    ws = FakeWebSocket()
+    await b.connect(ws)
+    b.subscribe(ws, ["user:alice", "user:bob"])
+    b.publish("user:alice", {"n": 1})
+    b.publish("user:bob", {"n": 1})
+    b.unsubscribe(ws, ["user:alice"])
+
+    assert b.evict_idle_history() == 0  # within the TTL it can still be resumed
+    assert b.evict_idle_history(time.monotonic() + 61) == 1
+    assert "user:alice" not in b._history and "user:bob" in b._history
+    assert not b.resume(ws, "user:alice", 0)
+
+    # Topics that regain a subscriber before the TTL keep their buffer
+    b.disconnect(ws)
+    again = FakeWebSocket()
+    await b.connect(again)
+    b.subscribe(again, ["user:bob"])
+    assert b.evict_idle_history(time.monotonic() + 61) == 0
+    assert b.resume(again, "user:bob", 0)
+    b.disconnect(again)
@@ -0,0 +1,72 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.api.ws import resolve_topic
+from app.services.candles import CandleAggregator
+
+S = 1_000_000_000
+
+
+def test_bars_roll_into_a_bounded_ring(published):
+    agg = CandleAggregator(history={"1s": 3, "1m": 3, "5m": 3})
+    t0 = 1_700_000_040 * S  # on a minute boundary
+    agg.on_trade("TCS", 100.0, 10, t0)
+    agg.on_trade("TCS", 102.0, 30, t0 + S // 2)
+    agg.on_tick("TCS", 99.0, t0 + S // 2)
+
+    (bar,) = agg.candles("TCS", "1s", 10)["candles"]
+    assert bar == {
+        "start": 1_700_000_040, "open": 100.0, "high": 102.0, "low": 99.0, "close": 99.0,
+        "volume": 40, "vwap": 101.5, "trades": 2,
+    }
+    assert published == []
+
+    # Five more seconds: the 1s ring keeps the last 3 closed bars (plus the forming one),
+    # and each closed bar is published once
+    for k in range(1, 6):
+        agg.on_trade("TCS", 100.0 + k, 1, t0 + k * S)
+    series = agg.candles("TCS", "1s", 10)
+    assert [b["start"] for b in series["candles"]] == [1_700_000_042, 1_700_000_043, 1_700_000_044, 1_700_000_045]
+    assert [b["start"] for b in agg.candles("TCS", "1s", 2)["candles"]] == [1_700_000_044, 1_700_000_045]
+    assert series["volume"] == 45
+    assert series["vwap"] == pytest.approx((100 * 10 + 102 * 30 + 101 + 102 + 103 + 104 + 105) / 45)
+    assert [m["candle"]["close"] for t, m in published if t == "candles:TCS:1s"] == [99.0, 101.0, 102.0, 103.0, 104.0]
+    assert agg.candles("TCS", "1m", 10)["candles"][0]["volume"] == 45
+
+    # The sweeper closes bars whose interval has passed without a new event
+    published.clear()
+    assert agg.close_due(t0 + 61 * S) == 3  # t0 + 60s also ends a 5m bar
+    assert sorted(t for t, m in published) == ["candles:TCS:1m", "candles:TCS:1s", "candles:TCS:5m"]
+    assert published[0][1]["candle"]["start"].startswith("2023-11-14T22:")
+    assert agg.close_due(t0 + 62 * S) == 0
+
+
+def test_candle_topics():
+    assert resolve_topic("candles:tcs:1m", None) == "candles:TCS:1m"
+    for name in ("candles:TCS", "candles:TCS:2m", "candles::1m"):
+        with pytest.raises(ValueError):
+            resolve_topic(name, None)
+
+
+@pytest.mark.asyncio
+async def test_candles_endpoint():
+    headers = {"x-api-key": "demo-key"}
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        for side in ("BUY", "SELL"):
+            payload = {"symbol": "INFY", "order_type": side, "order_style": "MARKET", "quantity": 2}
+            r = await ac.post("/api/v1/orders", json=payload, headers=headers)
+            assert r.status_code == 200
+
+        r = await ac.get("/api/v1/instruments/infy/candles?interval=5m&limit=5", headers=headers)
+        assert r.status_code == 200
+        data = r.json()
+        assert data["symbol"] == "INFY" and data["volume"] == 4
+        (bar,) = data["candles"]
+        assert bar["volume"] == 4 and bar["trades"] == 2
+        assert isinstance(bar["start"], str)
+
+        r = await ac.get("/api/v1/instruments/INFY/candles?interval=2m", headers=headers)
+        assert r.status_code == 422
+        r = await ac.get("/api/v1/instruments/NOPE/candles", headers=headers)
+        assert r.status_code == 404
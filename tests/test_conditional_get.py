@@ -0,0 +1,70 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.services.market_data import MarketDataPipeline
+
+HEADERS = {"x-api-key": "alice-key"}
+
+
+async def buy(ac, symbol, qty=1):
+    payload = {"symbol": symbol, "order_type": "BUY", "order_style": "MARKET", "quantity": qty}
+    return (await ac.post("/api/v1/orders", json=payload, headers=HEADERS)).json()
+
+
+@pytest.mark.asyncio
+async def test_trades_etag_and_since_version():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        first = await buy(ac, "TCS")
+        r = await ac.get("/api/v1/trades", headers=HEADERS)
+        etag = r.headers["etag"]
+        assert r.headers["cache-control"] == "private, no-cache"
+        assert [t["order_id"] for t in r.json()] == [first["order_id"]]
+
+        r = await ac.get("/api/v1/trades", headers={**HEADERS, "If-None-Match": etag})
+        assert r.status_code == 304
+        assert r.headers["etag"] == etag
+
+        # Another user's fill does not change alice's version
+        await ac.post("/api/v1/orders", headers={"x-api-key": "bob-key"},
+                      json={"symbol": "TCS", "order_type": "BUY", "order_style": "MARKET", "quantity": 1})
+        r = await ac.get("/api/v1/trades", headers={**HEADERS, "If-None-Match": etag})
+        assert r.status_code == 304
+
+        second = await buy(ac, "INFY")
+        r = await ac.get("/api/v1/trades", headers={**HEADERS, "If-None-Match": etag})
+        assert r.status_code == 200
+        assert r.headers["etag"] != etag
+
+        r = await ac.get("/api/v1/trades", params={"since_version": etag.strip('"')}, headers=HEADERS)
+        assert r.headers["x-delta"] == "true"
+        assert [t["order_id"] for t in r.json()] == [second["order_id"]]
+
+        # A token from another process (restart) falls back to the full list
+        r = await ac.get("/api/v1/trades", params={"since_version": "deadbeef-1"}, headers=HEADERS)
+        assert "x-delta" not in r.headers
+        assert len(r.json()) == 2
+
+
+@pytest.mark.asyncio
+async def test_portfolio_etag_tracks_fills_and_prices(restore_prices):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await buy(ac, "TCS", 2)
+        await buy(ac, "INFY", 3)
+        r = await ac.get("/api/v1/portfolio", headers=HEADERS)
+        etag = r.headers["etag"]
+        assert len(r.json()["holdings"]) == 2
+
+        r = await ac.get("/api/v1/portfolio", headers={**HEADERS, "If-None-Match": etag})
+        assert r.status_code == 304
+
+        MarketDataPipeline().apply([("INFY", 1234.0)])
+        r = await ac.get("/api/v1/portfolio", headers={**HEADERS, "If-None-Match": etag})
+        assert r.status_code == 200
+
+        r = await ac.get("/api/v1/portfolio", params={"since_version": etag.strip('"')}, headers=HEADERS)
+        body = r.json()
+        assert [h["symbol"] for h in body["holdings"]] == ["INFY"]
+        assert body["holdings"][0]["current_value"] == pytest.approx(3 * 1234.0)
+        assert body["totals"]["current_value"] > body["holdings"][0]["current_value"]
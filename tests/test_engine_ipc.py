@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+from app.services.engine_ipc import EngineClient, EngineServer
+from app.services.engine_ops import EngineError
+
+
+@pytest.mark.asyncio
+async def test_worker_forwards_ops_and_receives_events(tmp_path):
+    server = EngineServer(str(tmp_path / "engine.sock"))
+    await server.start()
+    events = []
+    client = EngineClient(server.path, publish=lambda topic, msg: events.append((topic, msg)))
+    await client.connect()
+    try:
+        payload = {"symbol": "tcs", "order_type": "BUY", "order_style": "MARKET", "quantity": 4, "price": None}
+        orders = await asyncio.gather(*(
+            client.call("place_order", {"user_id": "alice", "payload": payload}) for _ in range(5)
+        ))
+        assert {o["state"] for o in orders} == {"EXECUTED"}
+
+        portfolio = await client.call("get_portfolio", {"user_id": "alice"})
+        assert portfolio["holdings"][0]["quantity"] == 20
+
+        with pytest.raises(EngineError) as exc:
+            await client.call("get_order", {"user_id": "bob", "order_id": orders[0]["order_id"]})
+        assert exc.value.status_code == 403
+
+        await asyncio.sleep(0.05)
+        topics = [topic for topic, _ in events]
+        assert topics.count("trades:TCS") == 5
+        assert topics.count("user:alice") == 10
+    finally:
+        await client.close()
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_worker_reconnects_after_engine_restart(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.services.engine_ipc.ENGINE_RECONNECT_DELAY", 0.01)
+    server = EngineServer(str(tmp_path / "engine.sock"))
+    await server.start()
+    client = EngineClient(server.path)
+    await client.connect()
+    try:
+        await client.call("get_instrument", {"symbol": "TCS"})
+        await server.stop()
+        await asyncio.sleep(0.05)
+        with pytest.raises(EngineError) as exc:
+            await client.call("get_instrument", {"symbol": "TCS"})
+        assert exc.value.status_code == 503
+
+        server = EngineServer(server.path)
+        await server.start()
+        for _ in range(100):
+            try:
+                assert (await client.call("get_instrument", {"symbol": "TCS"}))["symbol"] == "TCS"
+                break
+            except EngineError:
+                await asyncio.sleep(0.01)
+        else:
+            pytest.fail("worker did not reconnect")
+    finally:
+        await client.close()
+        await server.stop()
@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.services.idempotency import IdempotencyCache, idempotency
+from app.services.locks import order_locks
+from app.store import memory
+
+MARKET = {"symbol": "TCS", "order_type": "BUY", "order_style": "MARKET", "quantity": 1}
+
+
+def headers(key):
+    return {"x-api-key": "alice-key", "Idempotency-Key": key}
+
+
+@pytest.mark.asyncio
+async def test_retry_with_the_same_key_returns_the_first_order():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        first = (await ac.post("/api/v1/orders", json=MARKET, headers=headers("k1"))).json()
+        retry = (await ac.post("/api/v1/orders", json=MARKET, headers=headers("k1"))).json()
+        other = (await ac.post("/api/v1/orders", json=MARKET, headers=headers("k2"))).json()
+        assert retry == first and other["order_id"] != first["order_id"]
+        assert len(memory.TRADES) == 2
+
+        r = await ac.post("/api/v1/orders", json={**MARKET, "quantity": 2}, headers=headers("k1"))
+        assert r.status_code == 422
+        # Keys are per user
+        r = await ac.post("/api/v1/orders", json=MARKET, headers={"x-api-key": "bob-key", "Idempotency-Key": "k1"})
+        assert r.json()["order_id"] != first["order_id"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_coalesce_onto_one_placement():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        async with order_locks(["TCS"], ["alice"]):
+            # The first placement waits for the locks; its duplicates arrive meanwhile
+            tasks = [asyncio.create_task(ac.post("/api/v1/orders", json=MARKET, headers=headers("k"))) for _ in range(5)]
+            await asyncio.sleep(0.05)
+            assert len(idempotency._in_flight) == 1
+        responses = await asyncio.gather(*tasks)
+
+    assert {r.json()["order_id"] for r in responses} == {responses[0].json()["order_id"]}
+    assert all(r.json()["state"] == "EXECUTED" for r in responses)
+    assert len(memory.TRADES) == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_is_bounded_by_size_and_ttl():
+    now = [0.0]
+    cache = IdempotencyCache(max_entries=2, ttl=10, clock=lambda: now[0])
+    placed = []
+
+    async def place():
+        placed.append(len(placed))
+        return {**MARKET, "order_id": f"o{len(placed)}", "user_id": "u", "price": None,
+                "state": "EXECUTED", "created_at": 0, "executed_at": 0}
+
+    for key in ("a", "b", "a", "c"):
+        await cache.run("u", key, 1, place)
+    assert len(placed) == 3 and len(cache) == 2
+    # "b" was least recently used when "c" arrived
+    assert (await cache.run("u", "b", 1, place))["order_id"] == "o4"
+
+    now[0] = 11
+    await cache.run("u", "c", 1, place)
+    assert len(placed) == 5
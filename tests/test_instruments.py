@@ -0,0 +1,44 @@
+import json
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.store.instrument_registry import InstrumentRegistry
+
+
+def test_registry_indexes_and_pagination(tmp_path):
+    master = tmp_path / "master.csv"
+    master.write_text(
+        "symbol,exchange,instrument_type,last_traded_price\n"
+        "sbin,NSE,EQ,600\n"
+        "SBIN24FUT,NSE,FUT,605\n"
+        "HDFCBANK,BSE,EQ,1600\n"
+        "ITC,NSE,EQ,450\n"
+    )
+    reg = InstrumentRegistry()
+    assert reg.load_file(str(master)) == 4
+
+    assert reg.get(" Sbin ")["last_traded_price"] == 600.0
+    assert [i["symbol"] for i in reg.list(exchange="nse", instrument_type="eq")] == ["SBIN", "ITC"]
+    assert [i["symbol"] for i in reg.list(instrument_type="EQ", offset=1, limit=1)] == ["HDFCBANK"]
+    assert len(reg.list(limit=2)) == 2
+
+    # Re-listing a symbol under another exchange moves it between indexes
+    json_master = tmp_path / "master.json"
+    json_master.write_text(json.dumps([{"symbol": "ITC", "exchange": "BSE", "instrument_type": "EQ", "last_traded_price": 451}]))
+    reg.load_file(str(json_master))
+    assert [i["symbol"] for i in reg.list(exchange="BSE")] == ["HDFCBANK", "ITC"]
+    assert [i["symbol"] for i in reg.list(exchange="NSE", instrument_type="EQ")] == ["SBIN"]
+    assert [i["symbol"] for i in reg.list(offset=2)] == ["HDFCBANK", "ITC"]
+    assert len(reg) == 4
+
+
+@pytest.mark.asyncio
+async def test_instrument_filters():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.get("/api/v1/instruments", params={"exchange": "NSE", "limit": 2})
+        assert r.status_code == 200
+        assert len(r.json()) == 2
+
+        r = await ac.get("/api/v1/instruments/reliance")
+        assert r.json()["symbol"] == "RELIANCE"
@@ -0,0 +1,36 @@
+import asyncio
+import pytest
+from app.services.locks import order_locks
+
+
+@pytest.mark.asyncio
+async def test_independent_symbols_hold_locks_concurrently():
+    inside = []
+    peak = 0
+
+    async def fill(symbol, user):
+        nonlocal peak
+        async with order_locks([symbol], [user]):
+            inside.append(symbol)
+            peak = max(peak, len(inside))
+            await asyncio.sleep(0.01)
+            inside.remove(symbol)
+
+    await asyncio.gather(fill("TCS", "alice"), fill("INFY", "bob"))
+    assert peak == 2
+
+    peak = 0
+    await asyncio.gather(fill("TCS", "alice"), fill("TCS", "bob"))
+    assert peak == 1
+
+
+@pytest.mark.asyncio
+async def test_opposite_request_order_does_not_deadlock():
+    async def hold(symbols, users):
+        async with order_locks(symbols, users):
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(
+        asyncio.gather(hold(["TCS", "INFY"], ["alice"]), hold(["INFY", "TCS"], ["alice"])),
+        timeout=1,
+    )
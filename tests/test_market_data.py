@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+from app.services import limit_matcher
+from app.services.execution_engine import find_instrument
+from app.services.market_data import (
+    MarketDataPipeline,
+    decode_ticks,
+    encode_ticks,
+    random_walk,
+    replay_file,
+    tcp_feed,
+)
+from app.store import memory, records
+
+
+def test_apply_keeps_last_price_per_symbol(restore_prices, published, monkeypatch):
+    # Ticks carry the engine clock, so a backtest's simulated time applies
+    monkeypatch.setattr(records, "_clock", lambda: 1_704_067_200_000_000_000)
+    pipeline = MarketDataPipeline()
+    changed = pipeline.apply([("TCS", 3001.0), ("INFY", 1401.0), ("TCS", 3002.5), ("NOPE", 1.0)])
+
+    assert changed == 2
+    assert find_instrument("TCS")["last_traded_price"] == 3002.5
+    assert limit_matcher._dirty_symbols == {"TCS", "INFY"}
+    assert pipeline.unknown == 1
+    # Nothing goes out until the conflation interval flushes
+    assert published == []
+
+    pipeline.apply([("TCS", 3003.0)])
+    assert pipeline.flush() == 2
+    assert sorted((t, m["price"]) for t, m in published) == [("ticks:INFY", 1401.0), ("ticks:TCS", 3003.0)]
+    assert {m["timestamp"] for _, m in published} == {"2024-01-01T00:00:00"}
+    assert pipeline.flush() == 0
+
+
+def test_binary_ticks_round_trip():
+    ticks = [("RELIANCE", 2500.25), ("TCS", 3100.0)]
+    data = encode_ticks(ticks)
+    assert decode_ticks(data + data[:5]) == ticks
+
+
+@pytest.mark.asyncio
+async def test_replay_file_sources(tmp_path):
+    csv_path = tmp_path / "ticks.csv"
+    csv_path.write_text("timestamp,symbol,price\n1,TCS,3001\n2,INFY,1401.5\n3,TCS,3002\n")
+    bin_path = tmp_path / "ticks.bin"
+    bin_path.write_bytes(encode_ticks([("TCS", 3001.0), ("INFY", 1401.5), ("TCS", 3002.0)]))
+
+    for path in (csv_path, bin_path):
+        batches = [batch async for batch in replay_file(str(path), batch_size=2)]
+        assert batches == [[("TCS", 3001.0), ("INFY", 1401.5)], [("TCS", 3002.0)]]
+
+
+@pytest.mark.asyncio
+async def test_random_walk_is_bounded_and_reproducible(restore_prices):
+    first = [b async for b in random_walk(symbols=["TCS", "INFY"], batch_size=100, total=250, seed=7)]
+    second = [b async for b in random_walk(symbols=["TCS", "INFY"], batch_size=100, total=250, seed=7)]
+    assert [len(b) for b in first] == [100, 100, 50]
+    assert first == second
+
+
+@pytest.mark.asyncio
+async def test_tcp_feed_moves_price_and_fills_limit_order(restore_prices):
+    async def serve_ticks(reader, writer):
+        data = encode_ticks([("INFY", 1420.0), ("INFY", 1390.0)])
+        # Split mid-record to exercise reassembly
+        writer.write(data[:10])
+        await writer.drain()
+        writer.write(data[10:])
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(serve_ticks, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    order = {
+        "order_id": "o1", "symbol": "INFY", "order_type": "BUY", "order_style": "LIMIT",
+        "quantity": 1, "price": 1400.0, "state": "PLACED", "user_id": "alice",
+    }
+    memory.ORDERS["o1"] = order
+    limit_matcher.rest_order(order)
+
+    pipeline = MarketDataPipeline()
+    await pipeline.run(tcp_feed("127.0.0.1", port))
+    server.close()
+
+    assert pipeline.ticks == 2
+    assert find_instrument("INFY")["last_traded_price"] == 1390.0
+    assert await limit_matcher.match_symbol("INFY") == 1
+    assert order["state"] == "EXECUTED"
@@ -0,0 +1,44 @@
+import random
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.core import metrics
+from app.main import app
+
+
+def test_histogram_quantiles_within_bucket_precision():
+    h = metrics.Histogram()
+    rng = random.Random(7)
+    values = sorted(int(rng.lognormvariate(12, 2)) for _ in range(20000))
+    for v in values:
+        h.record(v)
+    for q in (0.5, 0.99, 0.999):
+        exact = values[int(q * len(values)) - 1]
+        assert abs(h.quantile(q) / exact - 1) <= 1 / metrics.SUB_BUCKETS
+    assert h.count == len(values) and h.total == sum(values) and h.max == values[-1]
+    # Small values are exact
+    h.reset()
+    for v in (0, 3, 17, 31):
+        h.record(v)
+    assert [h.quantile(q) for q in (0.25, 0.5, 0.75, 1.0)] == [0, 3, 17, 31]
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exposes_hot_path_timings():
+    metrics.reset()
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        payload = {"symbol": "TCS", "order_type": "BUY", "order_style": "MARKET", "quantity": 1}
+        r = await ac.post("/api/v1/orders", json=payload, headers={"x-api-key": "alice-key"})
+        order_id = r.json()["order_id"]
+        await ac.get(f"/api/v1/orders/{order_id}", headers={"x-api-key": "alice-key"})
+
+        r = await ac.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = r.text
+    assert "# TYPE engine_lock_wait_seconds summary" in text
+    assert "engine_lock_hold_seconds_count 1" in text
+    # Routes are labelled by template, not by order id
+    assert 'http_requests_total{method="POST",route="/api/v1/orders",status="200"} 1' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/orders/{order_id}"} 1' in text
+    assert order_id not in text
@@ -0,0 +1,100 @@
+import threading
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.store import memory
+from app.store.order_archive import ArchivedOrder, OrderArchive
+
+HEADERS = {"x-api-key": "alice-key"}
+
+
+def make_order(i: int, state: str = "EXECUTED") -> dict:
+    return {
+        "order_id": f"o{i}", "user_id": "alice", "symbol": "TCS", "order_type": "BUY",
+        "order_style": "MARKET", "quantity": i, "price": None, "state": state,
+        "created_at": 1767258900_000000000, "executed_at": 1767258901_000000000,
+    }
+
+
+@pytest.mark.asyncio
+async def test_terminal_orders_leave_the_live_map():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        market = {"symbol": "TCS", "order_type": "BUY", "order_style": "MARKET", "quantity": 1}
+        limit = {"symbol": "TCS", "order_type": "BUY", "order_style": "LIMIT", "quantity": 1, "price": 1.0}
+        executed = (await ac.post("/api/v1/orders", json=market, headers=HEADERS)).json()
+        resting = (await ac.post("/api/v1/orders", json=limit, headers=HEADERS)).json()
+        assert list(memory.ORDERS) == [resting["order_id"]]
+
+        await ac.post(f"/api/v1/orders/{resting['order_id']}/cancel", headers=HEADERS)
+        assert memory.ORDERS == {}
+        assert len(memory.ARCHIVED_ORDERS) == 2
+
+        # Still served through the id index
+        r = await ac.get(f"/api/v1/orders/{executed['order_id']}", headers=HEADERS)
+        assert r.json() == executed
+        r = await ac.get(f"/api/v1/orders/{resting['order_id']}", headers=HEADERS)
+        assert r.json()["state"] == "CANCELLED"
+        r = await ac.get(f"/api/v1/orders/{executed['order_id']}", headers={"x-api-key": "bob-key"})
+        assert r.status_code == 403
+
+
+def test_archived_records_are_compact():
+    record = ArchivedOrder.from_dict(make_order(1))
+    assert not hasattr(record, "__dict__")
+    other = ArchivedOrder.from_dict({**make_order(2), "symbol": "".join(["T", "CS"])})
+    assert other.symbol is record.symbol
+    assert record.to_dict() == make_order(1)
+
+
+def test_eviction_by_size_and_age_keeps_orders_readable(tmp_path):
+    archive = OrderArchive(path=str(tmp_path / "archive.db"), max_entries=3, max_age=60, evict_batch=1)
+    for i in range(5):
+        archive.add(make_order(i))
+    assert len(archive) == 3 and archive.evicted == 2
+    assert [o["order_id"] for o in archive] == ["o2", "o3", "o4"]
+    assert archive.get("o0") == make_order(0)
+    assert archive.get("missing") is None
+
+    # Everything archived over a minute ago goes
+    assert archive.evict(now=archive._orders["o4"].archived_at + 61) == 3
+    assert len(archive) == 0
+    assert archive.get("o4")["quantity"] == 4
+    archive.close()
+
+
+@pytest.mark.asyncio
+async def test_eviction_on_the_loop_runs_in_the_background(tmp_path, monkeypatch):
+    archive = OrderArchive(path=str(tmp_path / "archive.db"), max_entries=2, evict_batch=2)
+    archive.add(make_order(0))
+    archive.add(make_order(1))
+
+    # Nothing may block the loop: syncing the cold store there fails the test
+    cold = archive._cold_db()
+    loop_thread = threading.get_ident()
+    sync = cold.sync
+
+    def sync_off_the_loop():
+        assert threading.get_ident() != loop_thread
+        sync()
+
+    monkeypatch.setattr(cold, "sync", sync_off_the_loop)
+    for i in range(2, 7):
+        archive.add(make_order(i))
+    assert archive.evicted == 0 and len(archive) == 7
+
+    await archive._evicting
+    # Rounds of at most evict_batch until only max_entries remain
+    assert len(archive) == 2 and archive.evicted == 5
+    assert archive._evicting is None
+    assert await archive.lookup("o0") == make_order(0)
+    assert await archive.lookup("o6") == make_order(6)
+    assert await archive.lookup("missing") is None
+    archive.close()
+
+
+def test_without_a_cold_store_nothing_is_evicted():
+    archive = OrderArchive(path=None, max_entries=1, evict_batch=1)
+    for i in range(3):
+        archive.add(make_order(i))
+    assert len(archive) == 3 and archive.evict() == 0
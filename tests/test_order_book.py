@@ -0,0 +1,61 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.services import limit_matcher
+from app.services.execution_engine import find_instrument
+from app.services.market_data import MarketDataPipeline
+from app.services.order_book import BOOKS, OrderBook
+
+
+def make_order(order_id, side, price):
+    return {"order_id": order_id, "order_type": side, "price": price, "state": "PLACED"}
+
+
+def test_pop_crossing_returns_only_crossed_levels():
+    book = OrderBook("TCS")
+    book.add(make_order("b1", "BUY", 100.0))
+    book.add(make_order("b2", "BUY", 105.0))
+    book.add(make_order("a1", "SELL", 110.0))
+    book.add(make_order("a2", "SELL", 120.0))
+
+    assert [o["order_id"] for o in book.pop_crossing(104.0)] == ["b2"]
+    assert [o["order_id"] for o in book.pop_crossing(115.0)] == ["a1"]
+    assert set(book.live) == {"b1", "a2"}
+
+
+def test_cancelled_orders_are_skipped():
+    book = OrderBook("TCS")
+    book.add(make_order("b1", "BUY", 100.0))
+    book.add(make_order("b2", "BUY", 100.0))
+    book.remove("b1")
+
+    assert [o["order_id"] for o in book.pop_crossing(90.0)] == ["b2"]
+    assert len(book) == 0
+
+
+@pytest.mark.asyncio
+async def test_limit_order_fills_on_price_change(monkeypatch):
+    inst = find_instrument("INFY")
+    monkeypatch.setitem(inst, "last_traded_price", inst["last_traded_price"])
+    headers = {"x-api-key": "alice-key"}
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        payload = {"symbol": "INFY", "order_type": "BUY", "order_style": "LIMIT", "quantity": 3, "price": 1400.0}
+        r = await ac.post("/api/v1/orders", json=payload, headers=headers)
+        resting = r.json()
+        assert resting["state"] == "PLACED"
+
+        payload["price"] = 1300.0
+        r = await ac.post("/api/v1/orders", json=payload, headers=headers)
+        cancelled = r.json()
+        r = await ac.post(f"/api/v1/orders/{cancelled['order_id']}/cancel", headers=headers)
+        assert r.json()["state"] == "CANCELLED"
+        assert len(BOOKS["INFY"]) == 1
+
+        MarketDataPipeline().apply([("INFY", 1250.0)])
+        assert await limit_matcher.match_symbol("INFY") == 1
+
+        r = await ac.get(f"/api/v1/orders/{resting['order_id']}", headers=headers)
+        assert r.json()["state"] == "EXECUTED"
+        r = await ac.get(f"/api/v1/orders/{cancelled['order_id']}", headers=headers)
+        assert r.json()["state"] == "CANCELLED"
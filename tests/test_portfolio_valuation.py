@@ -0,0 +1,87 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.services.market_data import MarketDataPipeline
+from app.services.portfolio_valuation import valuation
+from app.store import memory
+
+
+async def place(ac, key, symbol, side, qty):
+    payload = {"symbol": symbol, "order_type": side, "order_style": "MARKET", "quantity": qty}
+    r = await ac.post("/api/v1/orders", json=payload, headers={"x-api-key": key})
+    assert r.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_fills_and_price_moves_update_pnl(restore_prices, published):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        MarketDataPipeline().apply([("TCS", 3000.0)])
+        # First read loads the user into the valuation cache
+        r = await ac.get("/api/v1/portfolio", headers={"x-api-key": "alice-key"})
+        assert r.json()["holdings"] == []
+
+        await place(ac, "alice-key", "TCS", "BUY", 10)
+        await place(ac, "bob-key", "INFY", "BUY", 5)
+        MarketDataPipeline().apply([("TCS", 3100.0)])
+        await place(ac, "alice-key", "TCS", "SELL", 4)
+        MarketDataPipeline().apply([("TCS", 3050.0)])
+
+        r = await ac.get("/api/v1/portfolio", headers={"x-api-key": "alice-key"})
+        body = r.json()
+
+    (holding,) = body["holdings"]
+    assert holding["quantity"] == 6
+    assert holding["cost"] == pytest.approx(18000.0)
+    assert holding["current_value"] == pytest.approx(6 * 3050.0)
+    assert holding["unrealized_pnl"] == pytest.approx(300.0)
+    assert holding["realized_pnl"] == pytest.approx(400.0)
+    assert body["totals"]["unrealized_pnl"] == pytest.approx(300.0)
+    assert body["totals"]["realized_pnl"] == pytest.approx(400.0)
+
+    # The fill was pushed at once; the last price move waits for the next flush
+    deltas = [m for t, m in published if t == "user:alice" and m["type"] == "portfolio"]
+    assert [d["holdings"][0]["quantity"] for d in deltas] == [10, 6]
+    assert valuation.flush() == 1
+    assert published[-1][1]["holdings"][0]["last_traded_price"] == 3050.0
+
+
+def test_price_change_only_touches_holders(restore_prices):
+    memory.PORTFOLIO["alice"] = {"TCS": {"quantity": 2, "avg_price": 100.0}}
+    memory.PORTFOLIO["bob"] = {"INFY": {"quantity": 3, "avg_price": 100.0}}
+    valuation.portfolio("alice")
+    valuation.portfolio("bob")
+
+    valuation.on_price("TCS", 150.0)
+
+    assert valuation._dirty == {"alice": {"TCS"}}
+    assert valuation.portfolio("alice")["totals"]["unrealized_pnl"] == pytest.approx(100.0)
+
+
+@pytest.mark.asyncio
+async def test_short_open_and_cover_cycle(restore_prices):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers = {"x-api-key": "alice-key"}
+        await ac.get("/api/v1/portfolio", headers=headers)
+        MarketDataPipeline().apply([("INFY", 1500.5)])
+        await place(ac, "alice-key", "INFY", "SELL", 10)
+
+        (short,) = (await ac.get("/api/v1/portfolio", headers=headers)).json()["holdings"]
+        assert (short["quantity"], short["avg_price"]) == (-10, 1500.5)
+        assert short["cost"] == pytest.approx(-15005.0)
+        assert short["unrealized_pnl"] == pytest.approx(0.0)
+
+        MarketDataPipeline().apply([("INFY", 1400.0)])
+        (short,) = (await ac.get("/api/v1/portfolio", headers=headers)).json()["holdings"]
+        assert short["unrealized_pnl"] == pytest.approx(1005.0)
+
+        # Cover 15: 10 close the short, 5 open a long at the fill price
+        await place(ac, "alice-key", "INFY", "BUY", 15)
+        body = (await ac.get("/api/v1/portfolio", headers=headers)).json()
+
+    (holding,) = body["holdings"]
+    assert (holding["quantity"], holding["avg_price"]) == (5, 1400.0)
+    assert holding["realized_pnl"] == pytest.approx(1005.0)
+    assert holding["unrealized_pnl"] == pytest.approx(0.0)
+    assert memory.PORTFOLIO["alice"]["INFY"]["realized_pnl"] == pytest.approx(1005.0)
@@ -0,0 +1,46 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.store import memory
+from app.store.records import TradeRecord, pack_id, to_iso, to_ns, unpack_id
+
+HEADERS = {"x-api-key": "alice-key"}
+
+
+def test_ids_and_timestamps_round_trip():
+    order_id = "3f2b8c1e-9a4d-4e6f-8b7a-1c2d3e4f5a6b"
+    assert pack_id(order_id) == bytes.fromhex(order_id.replace("-", ""))
+    for other in ("t1", order_id.upper(), "{" + order_id[1:-1] + "}"):
+        assert pack_id(other) == other
+        assert unpack_id(pack_id(other)) == other
+    assert unpack_id(pack_id(order_id)) == order_id
+
+    ns = to_ns("2026-01-01T09:15:00.123456")
+    assert ns == 1767258900_123456000
+    assert to_iso(ns) == "2026-01-01T09:15:00.123456"
+    assert to_ns("2026-01-01T14:45:00+05:30") == to_ns("2026-01-01T09:15:00")
+
+
+def test_trade_record_is_compact():
+    trade = {
+        "trade_id": "3f2b8c1e-9a4d-4e6f-8b7a-1c2d3e4f5a6b", "order_id": "o1", "symbol": "TCS",
+        "quantity": 2, "price": 10.0, "side": "SELL", "timestamp": 1767258900_000000000, "user_id": "alice",
+    }
+    record = TradeRecord.from_dict(trade)
+    assert not hasattr(record, "__dict__")
+    assert len(record.trade_id) == 16 and record.side == 1
+    assert record.to_dict() == trade
+
+
+@pytest.mark.asyncio
+async def test_timestamps_are_ints_inside_and_iso_outside():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        market = {"symbol": "TCS", "order_type": "BUY", "order_style": "MARKET", "quantity": 1}
+        order = (await ac.post("/api/v1/orders", json=market, headers=HEADERS)).json()
+        (trade,) = (await ac.get("/api/v1/trades", headers=HEADERS)).json()
+
+    (stored,) = memory.TRADES
+    assert isinstance(stored["timestamp"], int)
+    assert trade["timestamp"] == to_iso(stored["timestamp"]) == order["executed_at"]
+    assert to_ns(order["created_at"]) <= stored["timestamp"]
@@ -0,0 +1,96 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.services.risk import risk
+from app.store.repository import get_store
+
+HEADERS = {"x-api-key": "alice-key"}
+
+
+@pytest.fixture
+def limits():
+    saved = dict(risk._user_limits), dict(risk.default_limits)
+    yield risk
+    risk._user_limits, risk.default_limits = saved[0], saved[1]
+
+
+def order(side, quantity, style="MARKET", price=None):
+    payload = {"symbol": "TCS", "order_type": side, "order_style": style, "quantity": quantity}
+    if price is not None:
+        payload["price"] = price
+    return payload
+
+
+@pytest.mark.asyncio
+async def test_orders_breaching_limits_are_rejected(limits):
+    ltp = get_store().instruments.get("TCS")["last_traded_price"]
+    limits.set_limits("alice", max_order_quantity=10, max_short=0, cash=2.5 * ltp)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        async def place(payload):
+            return await ac.post("/api/v1/orders", json=payload, headers=HEADERS)
+
+        r = await place(order("BUY", 11))
+        assert r.status_code == 400 and r.json()["detail"] == "Risk limit exceeded: max_order_quantity"
+        assert (await place(order("SELL", 1))).json()["detail"] == "Risk limit exceeded: max_short"
+
+        assert (await place(order("BUY", 2))).json()["state"] == "EXECUTED"
+        assert (await place(order("BUY", 1))).json()["detail"] == "Risk limit exceeded: cash"
+        # A resting SELL reserves the position it could close
+        assert (await place(order("SELL", 2, "LIMIT", ltp * 10))).json()["state"] == "PLACED"
+        assert (await place(order("SELL", 1))).json()["detail"] == "Risk limit exceeded: max_short"
+
+        # Bob has no limits
+        r = await ac.post("/api/v1/orders", json=order("SELL", 50), headers={"x-api-key": "bob-key"})
+        assert r.json()["state"] == "EXECUTED"
+
+
+@pytest.mark.asyncio
+async def test_market_order_price_does_not_bypass_limits(limits):
+    ltp = get_store().instruments.get("TCS")["last_traded_price"]
+    limits.set_limits("alice", cash=1000, max_order_notional=5000)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        for payload in (order("BUY", 100), order("BUY", 100, price=0.01)):
+            r = await ac.post("/api/v1/orders", json=payload, headers=HEADERS)
+            assert r.status_code == 400 and r.json()["detail"].startswith("Risk limit exceeded")
+    assert ltp * 100 > 5000
+    assert risk.exposure("alice")["available_cash"] == 1000
+    assert not get_store().portfolio.holdings("alice")
+
+
+@pytest.mark.asyncio
+async def test_incremental_exposure_matches_a_reload(limits):
+    ltp = get_store().instruments.get("TCS")["last_traded_price"]
+    limits.set_limits("alice", cash=100 * ltp)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        for payload in (order("BUY", 5), order("SELL", 2), order("BUY", 3, "LIMIT", ltp / 2),
+                        order("SELL", 1, "LIMIT", ltp * 2), order("BUY", 4, "LIMIT", ltp / 4)):
+            r = await ac.post("/api/v1/orders", json=payload, headers=HEADERS)
+            assert r.status_code == 200
+        await ac.post(f"/api/v1/orders/{r.json()['order_id']}/cancel", headers=HEADERS)
+
+    incremental = risk.exposure("alice")
+    assert incremental["positions"] == {"TCS": 3}
+    assert incremental["open_buy_notional"] == 3 * ltp / 2
+    risk.clear()
+    assert risk.exposure("alice") == incremental
+
+
+@pytest.mark.asyncio
+async def test_short_cover_cash_matches_a_reload(limits, monkeypatch):
+    inst = get_store().instruments.get("TCS")
+    monkeypatch.setitem(inst, "last_traded_price", 1000.0)
+    limits.set_limits("alice", cash=1_000_000.0)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.post("/api/v1/orders", json=order("SELL", 10), headers=HEADERS)
+        inst["last_traded_price"] = 900.0
+        await ac.post("/api/v1/orders", json=order("BUY", 15), headers=HEADERS)
+
+    incremental = risk.exposure("alice")
+    # +1000 realized on the cover, 5 bought at 900
+    assert incremental["available_cash"] == pytest.approx(1_000_000.0 + 1000.0 - 4500.0)
+    risk.clear()
+    assert risk.exposure("alice") == incremental
@@ -0,0 +1,150 @@
+import asyncio
+import socket
+import httpx
+import pytest
+import uvicorn
+from httpx import ASGITransport
+from app.main import app
+from app.services.broadcaster import broadcaster
+from sdk import trading_sdk
+from sdk.trading_sdk import AsyncTradingSDK
+
+
+class CountingTransport(httpx.AsyncBaseTransport):
+    """
+    ASGI transport that records the peak number of requests in flight.
+    """
+
+    def __init__(self):
+        self.inner = ASGITransport(app=app)
+        self.in_flight = 0
+        self.peak = 0
+
+    async def handle_async_request(self, request):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0.001)
+            return await self.inner.handle_async_request(request)
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.mark.asyncio
+async def test_submit_orders_caps_concurrency_and_keeps_order():
+    transport = CountingTransport()
+    orders = [{"symbol": "TCS", "order_type": "BUY", "order_style": "MARKET", "quantity": 1}] * 12
+    orders.insert(5, {"symbol": "NOPE", "order_type": "BUY", "order_style": "MARKET", "quantity": 1})
+    async with AsyncTradingSDK("http://test", api_key="alice-key", transport=transport) as sdk:
+        results = await sdk.submit_orders(orders, concurrency=4)
+        assert transport.peak == 4
+        assert isinstance(results[5], httpx.HTTPStatusError)
+        assert results[5].response.status_code == 404
+        assert [r["state"] for i, r in enumerate(results) if i != 5] == ["EXECUTED"] * 12
+
+        portfolio = await sdk.get_portfolio()
+        assert portfolio["holdings"][0]["quantity"] == 12
+
+
+@pytest.mark.asyncio
+async def test_get_and_keyed_post_retry_but_other_posts_do_not():
+    calls = []
+
+    def handler(request):
+        calls.append((request.method, request.headers.get("idempotency-key")))
+        if len(calls) < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, json=[])
+
+    transport = httpx.MockTransport(handler)
+    async with AsyncTradingSDK("http://test", transport=transport, backoff=0) as sdk:
+        assert await sdk.get_instruments() == []
+        assert [method for method, _ in calls] == ["GET"] * 3
+
+        calls.clear()
+        with pytest.raises(httpx.HTTPStatusError):
+            await sdk.cancel_orders(["o1"])
+        assert calls == [("POST", None)]
+
+        # place_order reuses one generated Idempotency-Key across its retries
+        calls.clear()
+        await sdk.place_order("TCS", "BUY", "MARKET", 1)
+        assert len(calls) == 3 and len({key for _, key in calls}) == 1 and calls[0][1]
+
+
+@pytest.mark.asyncio
+async def test_get_trades_follows_the_cursor_past_one_page(monkeypatch):
+    monkeypatch.setattr(trading_sdk, "TRADES_PAGE_SIZE", 2)
+    trades = [{"trade_id": f"t{i}"} for i in range(5)]
+    cursors = []
+
+    def handler(request):
+        after = request.url.params.get("after")
+        cursors.append(after)
+        start = 0 if after is None else int(after[1:]) + 1
+        return httpx.Response(200, json=trades[start:start + int(request.url.params["limit"])])
+
+    async with AsyncTradingSDK("http://test", transport=httpx.MockTransport(handler)) as sdk:
+        assert await sdk.get_trades() == trades
+    assert cursors == [None, "t1", "t3"]
+
+
+@pytest.mark.asyncio
+async def test_dead_server_costs_one_attempt_per_retry():
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        raise httpx.ConnectError("refused", request=request)
+
+    transport = httpx.MockTransport(handler)
+    async with AsyncTradingSDK("http://test", transport=transport, retries=2, backoff=0) as sdk:
+        with pytest.raises(httpx.ConnectError):
+            await sdk.get_instruments()
+        assert calls == ["GET"] * 3
+
+        # Never reached the server, so even an unkeyed POST is retried
+        calls.clear()
+        with pytest.raises(httpx.ConnectError):
+            await sdk.cancel_orders(["o1"])
+        assert calls == ["POST"] * 3
+
+
+@pytest.mark.asyncio
+async def test_stream_reconnects_and_resumes():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, port=port, lifespan="off", log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    async def subscribed():
+        while "user:alice" not in broadcaster.topics:
+            await asyncio.sleep(0.01)
+
+    sdk = AsyncTradingSDK(f"http://127.0.0.1:{port}", api_key="alice-key")
+    events = sdk.stream(["orders"], reconnect_delay=0.01)
+    try:
+        first = asyncio.ensure_future(events.__anext__())
+        await asyncio.wait_for(subscribed(), 5)
+        broadcaster.publish("user:alice", {"type": "order_update", "n": 1})
+        assert (await asyncio.wait_for(first, 5))["n"] == 1
+
+        # Drop the connection server-side; the stream comes back on its own
+        # and replays what was published meanwhile
+        (ws,) = list(broadcaster.clients)
+        await ws.close()
+        broadcaster.publish("user:alice", {"type": "order_update", "n": 2})
+        second = asyncio.ensure_future(events.__anext__())
+        await asyncio.sleep(0.05)
+        await asyncio.wait_for(subscribed(), 5)
+        broadcaster.publish("user:alice", {"type": "order_update", "n": 3})
+        assert (await asyncio.wait_for(second, 5))["n"] == 2
+        assert (await asyncio.wait_for(events.__anext__(), 5))["n"] == 3
+    finally:
+        await events.aclose()
+        await sdk.close()
+        server.should_exit = True
+        await serving
@@ -0,0 +1,74 @@
+import json
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.core import serialization
+from app.core.serialization import VersionedCache, dumps
+from app.api import instruments as instruments_api
+from app.main import app
+from app.services import engine_ops
+from app.services.market_data import MarketDataPipeline
+
+
+def test_stdlib_fallback_matches_orjson(monkeypatch):
+    rows = [{"symbol": "TCS", "price": 3800.5, "quantity": 3, "note": "₹"}]
+    fast = dumps(rows)
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert dumps(rows) == json.dumps(rows, separators=(",", ":"), ensure_ascii=False).encode()
+    assert json.loads(dumps(rows)) == json.loads(fast)
+
+
+def test_versioned_cache_drops_other_versions():
+    cache = VersionedCache(max_entries=2)
+    cache.put("v1", "a", b"1")
+    cache.put("v1", "b", b"2")
+    cache.put("v1", "c", b"3")
+    assert cache.get("v1", "a") is None
+    assert cache.get("v1", "c") == b"3"
+    assert cache.get("v2", "c") is None
+    cache.put("v2", "a", b"4")
+    assert cache.get("v1", "c") is None
+
+
+@pytest.mark.asyncio
+async def test_instrument_pages_are_cached_and_a_tick_only_refetches_prices(monkeypatch, restore_prices):
+    calls = []
+    original = engine_ops.OPS["list_instruments"]
+
+    async def counting(**kwargs):
+        calls.append(kwargs)
+        return await original(**kwargs)
+
+    monkeypatch.setitem(engine_ops.OPS, "list_instruments", counting)
+    monkeypatch.setattr(instruments_api, "_pages", VersionedCache())
+    monkeypatch.setattr(instruments_api, "_rows", VersionedCache())
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        first = await ac.get("/api/v1/instruments")
+        second = await ac.get("/api/v1/instruments")
+        assert first.content == second.content
+        assert len(calls) == 1
+
+        r = await ac.get("/api/v1/instruments", headers={"If-None-Match": first.headers["etag"]})
+        assert r.status_code == 304
+
+        MarketDataPipeline().apply([("TCS", 3333.0)])
+        r = await ac.get("/api/v1/instruments")
+        assert r.headers["etag"] != first.headers["etag"]
+        assert {i["symbol"]: i["last_traded_price"] for i in r.json()}["TCS"] == 3333.0
+        # The static rows were reused; only the prices were fetched
+        assert len(calls) == 1
+        assert [i["symbol"] for i in r.json()] == [i["symbol"] for i in first.json()]
+
+
+@pytest.mark.asyncio
+async def test_trades_response_keeps_the_model_fields():
+    headers = {"x-api-key": "bob-key"}
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        payload = {"symbol": "TCS", "order_type": "BUY", "order_style": "MARKET", "quantity": 1}
+        await ac.post("/api/v1/orders", json=payload, headers=headers)
+        r = await ac.get("/api/v1/trades", headers=headers)
+
+    assert r.headers["content-type"] == "application/json"
+    (trade,) = r.json()
+    assert set(trade) == {"trade_id", "order_id", "symbol", "quantity", "price", "side", "timestamp"}
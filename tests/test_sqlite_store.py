@@ -0,0 +1,101 @@
+import sqlite3
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.store.repository import set_store
+from app.store.sqlite_store import SqliteStore
+
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    store = SqliteStore(str(tmp_path / "trading.db"))
+    previous = set_store(store)
+    yield store
+    set_store(previous)
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_order_flow_on_sqlite(sqlite_store, tmp_path):
+    headers = {"x-api-key": "bob-key"}
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.get("/api/v1/instruments", params={"exchange": "NSE"})
+        assert {i["symbol"] for i in r.json()} == {"RELIANCE", "TCS", "INFY"}
+
+        market = {"symbol": "TCS", "order_type": "BUY", "order_style": "MARKET", "quantity": 2}
+        ids = [(await ac.post("/api/v1/orders", json=market, headers=headers)).json()["order_id"] for _ in range(3)]
+
+        limit = {"symbol": "TCS", "order_type": "BUY", "order_style": "LIMIT", "quantity": 1, "price": 1.0}
+        resting = (await ac.post("/api/v1/orders", json=limit, headers=headers)).json()
+        r = await ac.post(f"/api/v1/orders/{resting['order_id']}/cancel", headers=headers)
+        assert r.json()["state"] == "CANCELLED"
+
+        r = await ac.get("/api/v1/trades", params={"limit": 2}, headers=headers)
+        page = r.json()
+        assert [t["order_id"] for t in page] == ids[:2]
+        r = await ac.get("/api/v1/trades", params={"after": page[-1]["trade_id"]}, headers=headers)
+        assert [t["order_id"] for t in r.json()] == ids[2:]
+
+        r = await ac.get("/api/v1/portfolio", headers=headers)
+        assert r.json()["holdings"][0]["quantity"] == 6
+
+    # Everything is on disk after the store is closed and reopened
+    sqlite_store.close()
+    reopened = SqliteStore(str(tmp_path / "trading.db"))
+    try:
+        assert reopened.orders.get(resting["order_id"])["state"] == "CANCELLED"
+        assert reopened.orders.get(ids[0])["state"] == "EXECUTED"
+        assert reopened.portfolio.get("bob", "TCS")["quantity"] == 6
+        assert len(reopened.trades.page(user_id="bob")) == 3
+        # Seqs continue after a reopen
+        assert [t["order_id"] for t in reopened.trades.page(user_id="bob", after_seq=2)] == ids[2:]
+        assert reopened.trades.append({**page[0], "trade_id": "t-new", "user_id": "bob"}) == 4
+    finally:
+        reopened.close()
+
+
+def test_a_fill_is_written_whole_or_not_at_all(sqlite_store, tmp_path):
+    order = {
+        "order_id": "o-1", "user_id": "bob", "symbol": "TCS", "order_type": "BUY", "order_style": "MARKET",
+        "quantity": 1, "price": None, "state": "PLACED", "created_at": 1, "executed_at": None,
+    }
+    trade = {
+        "trade_id": "t-1", "order_id": "o-1", "user_id": "bob", "symbol": "TCS",
+        "quantity": 1, "price": 10.0, "side": "BUY", "timestamp": 2,
+    }
+    sqlite_store.orders.add(order)
+    sqlite_store.trades.append(trade)
+
+    # The duplicate trade_id fails in the writer, so the whole unit is dropped
+    order.update(state="EXECUTED", executed_at=2)
+    with sqlite_store.transaction():
+        sqlite_store.orders.update(order)
+        sqlite_store.trades.append(trade)
+        sqlite_store.portfolio.put("bob", "TCS", {"quantity": 1, "avg_price": 10.0})
+    sqlite_store.flush()
+
+    conn = sqlite3.connect(str(tmp_path / "trading.db"))
+    try:
+        assert conn.execute("SELECT state FROM orders WHERE order_id = 'o-1'").fetchone() == ("PLACED",)
+        assert conn.execute("SELECT COUNT(*) FROM trades").fetchone() == (1,)
+        assert conn.execute("SELECT COUNT(*) FROM holdings").fetchone() == (0,)
+    finally:
+        conn.close()
+
+
+@pytest.mark.asyncio
+async def test_fills_never_query_the_database(sqlite_store, monkeypatch):
+    def no_query(*args):
+        raise AssertionError("queried on the fill path")
+
+    monkeypatch.setattr(sqlite_store.db, "query", no_query)
+    monkeypatch.setattr(sqlite_store.db, "query_one", no_query)
+    headers = {"x-api-key": "alice-key"}
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        payload = {"symbol": "TCS", "order_type": "BUY", "order_style": "MARKET", "quantity": 2}
+        r = await ac.post("/api/v1/orders", json=payload, headers=headers)
+        assert r.json()["state"] == "EXECUTED"
+        r = await ac.get("/api/v1/portfolio", headers=headers)
+        assert r.json()["holdings"][0]["quantity"] == 2
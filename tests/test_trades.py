@@ -0,0 +1,53 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.store import memory
+
+
+def seed_trades():
+    for i in range(10):
+        memory.TRADES.append({
+            "trade_id": f"t{i}",
+            "order_id": f"o{i}",
+            "symbol": "TCS" if i % 2 else "INFY",
+            "quantity": 1,
+            "price": 100.0,
+            "side": "BUY",
+            "timestamp": f"2026-01-01T10:00:{i:02d}",
+            "user_id": "alice" if i < 8 else "bob",
+        })
+
+
+def test_trade_log_page_uses_indexes():
+    seed_trades()
+    log = memory.TRADES
+
+    assert [t["trade_id"] for t in log.page(user_id="alice", limit=3)] == ["t0", "t1", "t2"]
+    assert [t["trade_id"] for t in log.page(user_id="alice", after="t2", limit=3)] == ["t3", "t4", "t5"]
+    assert [t["trade_id"] for t in log.page(user_id="alice", symbol="TCS", after="t2")] == ["t3", "t5", "t7"]
+    assert [t["trade_id"] for t in log.page(
+        user_id="alice", since="2026-01-01T10:00:04", until="2026-01-01T10:00:06"
+    )] == ["t4", "t5", "t6"]
+    assert [t["trade_id"] for t in log.page(user_id="bob")] == ["t8", "t9"]
+    with pytest.raises(KeyError):
+        log.page(user_id="alice", after="missing")
+
+
+@pytest.mark.asyncio
+async def test_trades_cursor_pagination():
+    seed_trades()
+    headers = {"x-api-key": "alice-key"}
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.get("/api/v1/trades", params={"limit": 5}, headers=headers)
+        page = r.json()
+        assert [t["trade_id"] for t in page] == ["t0", "t1", "t2", "t3", "t4"]
+
+        r = await ac.get("/api/v1/trades", params={"limit": 5, "after": page[-1]["trade_id"]}, headers=headers)
+        assert [t["trade_id"] for t in r.json()] == ["t5", "t6", "t7"]
+
+        r = await ac.get("/api/v1/trades", params={"symbol": "infy", "since": "2026-01-01T10:00:03"}, headers=headers)
+        assert [t["trade_id"] for t in r.json()] == ["t4", "t6"]
+
+        r = await ac.get("/api/v1/trades", params={"after": "nope"}, headers=headers)
+        assert r.status_code == 400
@@ -0,0 +1,73 @@
+from fastapi.testclient import TestClient
+from app.main import app
+
+
+def test_ws_subscriptions_are_filtered_per_topic_and_user():
+    with TestClient(app) as client:
+        with client.websocket_connect("/api/v1/ws?api_key=alice-key") as ws:
+            ws.send_json({"action": "subscribe", "topics": ["orders", "trades:TCS"]})
+            ack = ws.receive_json()
+            assert (ack["type"], ack["topics"]) == ("subscribed", ["trades:TCS", "user:alice"])
+
+            order = {"symbol": "TCS", "order_type": "BUY", "order_style": "MARKET", "quantity": 1}
+            # bob trades INFY (not subscribed) then TCS (public tape only)
+            client.post("/api/v1/orders", json={**order, "symbol": "INFY"}, headers={"x-api-key": "bob-key"})
+            client.post("/api/v1/orders", json=order, headers={"x-api-key": "bob-key"})
+            msg = ws.receive_json()
+            assert msg["topic"] == "trades:TCS"
+            assert "user_id" not in msg["trade"]
+
+            # alice's own order arrives on her private topic as well
+            client.post("/api/v1/orders", json=order, headers={"x-api-key": "alice-key"})
+            topics = {ws.receive_json()["topic"] for _ in range(3)}
+            assert topics == {"user:alice", "trades:TCS"}
+
+
+def test_ws_private_topic_requires_auth():
+    with TestClient(app) as client:
+        with client.websocket_connect("/api/v1/ws") as ws:
+            ws.send_json({"action": "subscribe", "topics": ["orders"]})
+            assert ws.receive_json()["type"] == "error"
+
+            ws.send_json({"action": "auth", "api_key": "bob-key"})
+            assert ws.receive_json() == {"type": "auth", "user_id": "bob"}
+            ws.send_json({"action": "subscribe", "topics": ["orders"]})
+            assert ws.receive_json()["topics"] == ["user:bob"]
+
+
+def test_ws_resume_from_seq_after_reconnect():
+    order = {"symbol": "INFY", "order_type": "BUY", "order_style": "MARKET", "quantity": 1}
+    headers = {"x-api-key": "bob-key"}
+    with TestClient(app) as client:
+        with client.websocket_connect("/api/v1/ws?api_key=bob-key") as ws:
+            ws.send_json({"action": "subscribe", "topics": ["orders"]})
+            ack = ws.receive_json()
+            epoch, seq = ack["epoch"], ack["seqs"]["user:bob"]
+            client.post("/api/v1/orders", json=order, headers=headers)
+            seen = [ws.receive_json() for _ in range(2)]
+            assert [m["seq"] for m in seen] == [seq + 1, seq + 2]
+            last = seen[-1]["seq"]
+
+        # Two more events while disconnected
+        client.post("/api/v1/orders", json=order, headers=headers)
+        with client.websocket_connect("/api/v1/ws?api_key=bob-key") as ws:
+            ws.send_json({"action": "subscribe", "topics": ["orders"], "epoch": epoch, "resume_from": {"orders": last}})
+            assert ws.receive_json()["seqs"] == {"user:bob": last + 2}
+            assert [ws.receive_json()["seq"] for _ in range(2)] == [last + 1, last + 2]
+
+        with client.websocket_connect("/api/v1/ws?api_key=bob-key") as ws:
+            ws.send_json({"action": "subscribe", "topics": ["orders"], "epoch": "old", "resume_from": last})
+            ws.receive_json()
+            assert ws.receive_json() == {"type": "snapshot_required", "topic": "user:bob", "seq": last + 2}
+
+
+def test_ws_stats_requires_a_key_and_hides_users():
+    with TestClient(app) as client:
+        assert client.get("/api/v1/ws/stats").status_code == 401
+        with client.websocket_connect("/api/v1/ws?api_key=alice-key") as ws:
+            ws.send_json({"action": "subscribe", "topics": ["orders"]})
+            ws.receive_json()
+            r = client.get("/api/v1/ws/stats", headers={"x-api-key": "bob-key"})
+            assert r.status_code == 200
+            (stats,) = r.json()["clients"]
+            assert set(stats) == {"client", "queue_depth", "sent", "dropped"}